@@ -0,0 +1,657 @@
+import io
+import os
+import sys
+import signal
+import asyncio
+import logging
+import tempfile
+import threading
+from http import HTTPStatus
+from urllib.parse import unquote
+
+from EasyAPI import asgi
+from EasyAPI.server import _date_cache
+
+logger = logging.getLogger('EasyAPI.server')
+
+# Pause reading from a connection while this much is buffered but unparsed
+BUFFER_HIGH_WATER = 256 * 1024
+# Unread request bodies up to this size are skipped to keep the connection
+MAX_DRAIN = 256 * 1024
+
+_NO_BODY_STATUSES = ('1', '204', '304')
+_HEX_DIGITS = b'0123456789abcdefABCDEF'
+
+
+class _ProtocolError(Exception):
+    """
+    A malformed request; answered with ``status`` and the connection closed.
+    """
+    def __init__(self, status):
+        super().__init__(status)
+        self.status = status
+
+
+class HTTPProtocol(asyncio.Protocol):
+    """
+    One HTTP/1.1 connection.
+
+    Incoming data is appended to a single buffer that lives as long as the
+    connection, and requests are parsed from it in place: pipelined requests
+    simply wait in the buffer until the previous response has been written.
+    Small bodies are sliced from the buffer once; larger ones are spooled like
+    ASGI request bodies.
+    """
+    def __init__(self, server):
+        self.server = server
+        self.loop = server.loop
+        self.transport = None
+        self.peer = ''
+        self.buffer = bytearray()
+        self.idle = True
+        self._eof = False
+        self._waiter = None
+        self._drain_waiter = None
+        self._reading_paused = False
+        self._writing_paused = False
+        self._task = None
+
+    # asyncio callbacks
+
+    def connection_made(self, transport):
+        self.transport = transport
+        peer = transport.get_extra_info('peername')
+        if peer:
+            self.peer = peer[0]
+        self.server.connections.add(self)
+        self._task = self.loop.create_task(self._serve())
+
+    def data_received(self, data):
+        self.buffer += data
+        if len(self.buffer) > BUFFER_HIGH_WATER and not self._reading_paused:
+            self._reading_paused = True
+            self.transport.pause_reading()
+        self._wake()
+
+    def eof_received(self):
+        self._eof = True
+        self._wake()
+        # Keep the write side open to answer requests that are already buffered
+        return True
+
+    def connection_lost(self, exc):
+        self._eof = True
+        self._wake()
+        waiter = self._drain_waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_exception(ConnectionResetError())
+        self.server.connections.discard(self)
+
+    def pause_writing(self):
+        self._writing_paused = True
+
+    def resume_writing(self):
+        self._writing_paused = False
+        waiter = self._drain_waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    # Reading
+
+    def _wake(self):
+        waiter = self._waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    async def _fill(self, timeout):
+        """
+        Wait until more data is buffered.
+
+        Raises:
+            ConnectionResetError: If the client closed the connection.
+            TimeoutError: If no data arrived within ``timeout`` seconds.
+        """
+        if self._eof:
+            raise ConnectionResetError()
+        if timeout <= 0:
+            raise TimeoutError()
+        if self._reading_paused:
+            self._reading_paused = False
+            self.transport.resume_reading()
+        waiter = self._waiter = self.loop.create_future()
+        timer = self.loop.call_later(timeout, _expire, waiter)
+        try:
+            await waiter
+        finally:
+            timer.cancel()
+            self._waiter = None
+
+    async def _find(self, separator, limit, timeout, deadline=None, status='400 Bad Request'):
+        """
+        Wait until ``separator`` is buffered and return its index.
+
+        Args:
+            separator (bytes): The bytes to look for.
+            limit (int): Answer with ``status`` if this much is buffered without it.
+            timeout (float): Seconds to wait for each read.
+            deadline (float): Loop time by which it must have arrived, if any.
+            status (str): The error status when ``limit`` is exceeded.
+        """
+        buffer = self.buffer
+        start = 0
+        while True:
+            index = buffer.find(separator, start)
+            if index >= 0:
+                return index
+            if len(buffer) > limit:
+                raise _ProtocolError(status)
+            start = max(0, len(buffer) - len(separator) + 1)
+            if deadline is not None:
+                timeout = min(timeout, deadline - self.loop.time())
+            await self._fill(timeout)
+
+    async def _read_into(self, out, size):
+        buffer = self.buffer
+        while size:
+            if not buffer:
+                await self._fill(self.server.body_timeout)
+            chunk = memoryview(buffer)[:size]
+            out.write(chunk)
+            taken = len(chunk)
+            chunk.release()
+            del buffer[:taken]
+            size -= taken
+
+    async def _read_body(self, length, spool_threshold):
+        buffer = self.buffer
+        if len(buffer) >= length:
+            # Common case: the body arrived with the head
+            body = bytes(buffer[:length])
+            del buffer[:length]
+            return io.BytesIO(body)
+        body = tempfile.SpooledTemporaryFile(max_size=spool_threshold)
+        await self._read_into(body, length)
+        body.seek(0)
+        return body
+
+    async def _read_chunked(self, max_size, spool_threshold):
+        """
+        Decode a chunked request body.
+
+        Returns:
+            tuple: The body file and its length. Reading stops once the length
+            exceeds ``max_size``, leaving the connection unusable.
+        """
+        buffer = self.buffer
+        timeout = self.server.body_timeout
+        body = tempfile.SpooledTemporaryFile(max_size=spool_threshold)
+        length = 0
+        while True:
+            end = await self._find(b'\r\n', 1024, timeout)
+            size_line = bytes(buffer[:end]).split(b';', 1)[0].strip()
+            del buffer[:end + 2]
+            if not size_line or size_line.strip(_HEX_DIGITS):
+                raise _ProtocolError('400 Bad Request')
+            size = int(size_line, 16)
+            if size == 0:
+                break
+            length += size
+            if max_size is not None and length > max_size:
+                body.seek(0)
+                return body, length
+            await self._read_into(body, size)
+            while len(buffer) < 2:
+                await self._fill(timeout)
+            if buffer[:2] != b'\r\n':
+                raise _ProtocolError('400 Bad Request')
+            del buffer[:2]
+        # Skip trailers up to the empty line
+        while True:
+            end = await self._find(b'\r\n', self.server.max_head_size, timeout)
+            del buffer[:end + 2]
+            if end == 0:
+                break
+        body.seek(0)
+        return body, length
+
+    async def _discard(self, size):
+        buffer = self.buffer
+        while size:
+            if not buffer:
+                await self._fill(self.server.body_timeout)
+            taken = min(size, len(buffer))
+            del buffer[:taken]
+            size -= taken
+
+    # Writing
+
+    def write(self, data):
+        self.transport.write(data)
+
+    async def drain(self):
+        if self._writing_paused and not self.transport.is_closing():
+            self._drain_waiter = self.loop.create_future()
+            try:
+                await self._drain_waiter
+            finally:
+                self._drain_waiter = None
+
+    def _send_error(self, status):
+        body = status.encode('latin-1')
+        self.write(
+            b'HTTP/1.1 %s\r\nServer: EasyAPI\r\nDate: %s\r\nConnection: close\r\n'
+            b'Content-Type: text/plain\r\nContent-Length: %d\r\n\r\n%s'
+            % (body, _date_cache.get().encode('latin-1'), len(body), body)
+        )
+
+    # Requests
+
+    async def _serve(self):
+        server = self.server
+        buffer = self.buffer
+        try:
+            while True:
+                self.idle = True
+                # Tolerate empty lines between pipelined requests
+                while buffer[:2] == b'\r\n':
+                    del buffer[:2]
+                if not buffer:
+                    if self._eof or server.draining:
+                        break
+                    try:
+                        await self._fill(server.keepalive_timeout)
+                    except TimeoutError:
+                        break
+                    continue
+                self.idle = False
+                deadline = self.loop.time() + server.header_timeout
+                try:
+                    end = await self._find(b'\r\n\r\n', server.max_head_size, server.header_timeout,
+                                           deadline, '431 Request Header Fields Too Large')
+                except TimeoutError:
+                    raise _ProtocolError('408 Request Timeout')
+                head = bytes(buffer[:end])
+                del buffer[:end + 4]
+                if not await self._handle(head):
+                    break
+                server.count_request()
+                if server.draining:
+                    break
+        except _ProtocolError as e:
+            self._send_error(e.status)
+        except (ConnectionError, TimeoutError):
+            pass
+        except Exception:
+            logger.exception('Error handling connection')
+        finally:
+            self.transport.close()
+
+    def _parse_head(self, head):
+        """
+        Parse the request line and headers into an environ.
+
+        Returns:
+            tuple: The environ and whether the client allows keep-alive.
+        """
+        lines = head.decode('latin-1').split('\r\n')
+        parts = lines[0].split(' ')
+        if len(parts) != 3:
+            raise _ProtocolError('400 Bad Request')
+        method, target, version = parts
+        if version not in ('HTTP/1.1', 'HTTP/1.0'):
+            if version.startswith('HTTP/'):
+                raise _ProtocolError('505 HTTP Version Not Supported')
+            raise _ProtocolError('400 Bad Request')
+        path, _, query = target.partition('?')
+        server = self.server
+        environ = {
+            'REQUEST_METHOD': method,
+            'SCRIPT_NAME': '',
+            'PATH_INFO': unquote(path, 'latin-1'),
+            'QUERY_STRING': query,
+            'SERVER_NAME': server.server_name,
+            'SERVER_PORT': server.server_port,
+            'SERVER_PROTOCOL': version,
+            'REMOTE_ADDR': self.peer,
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': server.multiprocess,
+            'wsgi.run_once': False,
+        }
+        for line in lines[1:]:
+            name, sep, value = line.partition(':')
+            if not sep or not name or name[-1] in ' \t':
+                raise _ProtocolError('400 Bad Request')
+            key = name.upper().replace('-', '_')
+            value = value.strip(' \t')
+            if key == 'CONTENT_TYPE' or key == 'CONTENT_LENGTH':
+                if key in environ and environ[key] != value:
+                    raise _ProtocolError('400 Bad Request')
+                environ[key] = value
+                continue
+            key = 'HTTP_' + key
+            if key in environ:
+                environ[key] += ',' + value
+            else:
+                environ[key] = value
+
+        connection = environ.get('HTTP_CONNECTION', '').lower()
+        if version == 'HTTP/1.1':
+            keep_alive = 'close' not in connection
+        else:
+            keep_alive = 'keep-alive' in connection
+        return environ, keep_alive
+
+    async def _handle(self, head):
+        """
+        Read the body of one request, run it through the application and write the response.
+
+        Returns:
+            bool: Whether the connection can be reused for another request.
+        """
+        server = self.server
+        app = server.app
+        environ, keep_alive = self._parse_head(head)
+        request = app.make_request(environ)
+        max_size = request.max_body_size
+
+        transfer_encoding = environ.get('HTTP_TRANSFER_ENCODING', '').lower()
+        if transfer_encoding:
+            if 'CONTENT_LENGTH' in environ:
+                # Ambiguous framing is how requests are smuggled; refuse it
+                raise _ProtocolError('400 Bad Request')
+            if transfer_encoding != 'chunked':
+                raise _ProtocolError('501 Not Implemented')
+        try:
+            length = int(environ.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            raise _ProtocolError('400 Bad Request')
+        if length < 0:
+            raise _ProtocolError('400 Bad Request')
+
+        # Bodies that are too large are left unread; the application answers 413
+        unread = 0
+        if request.content_too_large:
+            unread = length
+        elif transfer_encoding or length:
+            if environ.get('HTTP_EXPECT', '').lower() == '100-continue':
+                self.write(b'HTTP/1.1 100 Continue\r\n\r\n')
+            if transfer_encoding:
+                body, length = await self._read_chunked(max_size, request.spool_threshold)
+                environ['CONTENT_LENGTH'] = str(length)
+                if request.content_too_large:
+                    keep_alive = False
+            else:
+                body = await self._read_body(length, request.spool_threshold)
+            environ['wsgi.input'] = body
+        else:
+            environ['wsgi.input'] = io.BytesIO()
+        if unread:
+            environ['wsgi.input'] = io.BytesIO()
+            if unread > MAX_DRAIN:
+                keep_alive = False
+        if server.draining:
+            keep_alive = False
+
+        response = _ResponseWriter(self, environ, keep_alive)
+        try:
+            result = await app.handle_request_async(request)
+        except Exception:
+            logger.exception('Error handling %s %s', environ['REQUEST_METHOD'], environ['PATH_INFO'])
+            self._send_error('500 Internal Server Error')
+            return False
+        try:
+            await asgi.send_response(result, environ, response.send)
+        except (ConnectionError, TimeoutError):
+            return False
+        except Exception:
+            logger.exception('Error sending response for %s %s', environ['REQUEST_METHOD'], environ['PATH_INFO'])
+            if not response.started:
+                self._send_error('500 Internal Server Error')
+            return False
+        if unread and response.keep_alive:
+            await self._discard(unread)
+        return response.keep_alive
+
+
+def _expire(waiter):
+    if not waiter.done():
+        waiter.set_exception(TimeoutError())
+
+
+class _ResponseWriter:
+    """
+    ASGI ``send`` channel writing HTTP/1.1 responses to a connection.
+
+    The head is held back until the first body chunk so both go out in one
+    write. A response whose body arrives in one piece gets a Content-Length;
+    longer unsized bodies use chunked encoding on HTTP/1.1 and close the
+    connection on HTTP/1.0.
+    """
+    def __init__(self, protocol, environ, keep_alive):
+        self.protocol = protocol
+        self.version = environ['SERVER_PROTOCOL']
+        self.head_only = environ['REQUEST_METHOD'] == 'HEAD'
+        self.keep_alive = keep_alive
+        self.started = False
+        self.status = None
+        self.headers = None
+        self.has_length = False
+        self.chunked = False
+        self.no_body = False
+        self.pending = None
+
+    async def send(self, message):
+        if message['type'] == 'http.response.start':
+            self.status = message['status']
+            self.headers = message.get('headers', [])
+            self.has_length = any(name == b'content-length' for name, _ in self.headers)
+            self.no_body = str(self.status).startswith(_NO_BODY_STATUSES) or self.head_only
+            return
+
+        body = message.get('body', b'')
+        more = message.get('more_body', False)
+        protocol = self.protocol
+        if not self.started:
+            if more and not self.has_length and not self.no_body:
+                if self.pending is None:
+                    self.pending = body
+                    return
+                # A second chunk: the length is unknown, so stream it
+                self._frame_unsized()
+                body = self._chunk(self.pending) + self._chunk(body)
+                self.pending = None
+                protocol.write(self._head() + body)
+            else:
+                if self.pending is not None:
+                    body = self.pending + body
+                    self.pending = None
+                if not (self.has_length or more or str(self.status).startswith(_NO_BODY_STATUSES)):
+                    self.headers.append((b'content-length', b'%d' % len(body)))
+                    self.has_length = True
+                if self.no_body:
+                    body = b''
+                protocol.write(self._head() + body)
+            self.started = True
+        elif not self.no_body:
+            if self.chunked:
+                body = self._chunk(body)
+            if body:
+                protocol.write(body)
+        if not more and self.chunked:
+            protocol.write(b'0\r\n\r\n')
+        await protocol.drain()
+
+    def _frame_unsized(self):
+        if self.version == 'HTTP/1.1':
+            self.headers.append((b'transfer-encoding', b'chunked'))
+            self.chunked = True
+        else:
+            self.keep_alive = False
+
+    def _chunk(self, data):
+        if not self.chunked or not data:
+            return data
+        return b'%x\r\n%s\r\n' % (len(data), data)
+
+    def _head(self):
+        status = self.status
+        reason = _REASONS.get(status, b'')
+        lines = [b'%s %d %s\r\nServer: EasyAPI\r\nDate: %s\r\n' % (
+            self.version.encode('latin-1'), status, reason, _date_cache.get().encode('latin-1'))]
+        if not self.keep_alive:
+            lines.append(b'Connection: close\r\n')
+        elif self.version == 'HTTP/1.0':
+            lines.append(b'Connection: keep-alive\r\n')
+        for name, value in self.headers:
+            lines.append(b'%s: %s\r\n' % (name, value))
+        lines.append(b'\r\n')
+        return b''.join(lines)
+
+
+_REASONS = {status.value: status.phrase.encode('latin-1') for status in HTTPStatus}
+
+
+class AsyncHTTPServer:
+    def __init__(self, app, sock, max_requests=0, keepalive_timeout=5, header_timeout=10,
+                 body_timeout=30, max_head_size=65536, graceful_timeout=None, multiprocess=False):
+        """
+        Initialize the event-loop server on an already listening socket.
+
+        Connections are handled on one asyncio event loop, which parses
+        HTTP/1.1 itself and dispatches through ``EasyAPI.handle_request_async``:
+        coroutine handlers run on the loop and plain handlers on the
+        application's thread pool. Connections are kept alive and pipelined
+        requests are answered in order.
+
+        Args:
+            app (EasyAPI): The application to serve.
+            sock (socket.socket): The listening socket.
+            max_requests (int): Stop serving after this many requests (0 disables).
+            keepalive_timeout (float): Seconds an idle keep-alive connection is kept open.
+            header_timeout (float): Seconds a client has to send a complete request head.
+            body_timeout (float): Seconds a request body may stall between reads.
+            max_head_size (int): Maximum size of the request line and headers.
+            graceful_timeout (float): Seconds open connections get to finish once
+                draining, after which they are closed (None waits for them).
+            multiprocess (bool): Whether other processes share the socket.
+        """
+        self.app = app
+        self.socket = sock
+        host, port = sock.getsockname()[:2]
+        self.server_name = host
+        self.server_port = str(port)
+        self.max_requests = max_requests
+        self.keepalive_timeout = keepalive_timeout
+        self.header_timeout = header_timeout
+        self.body_timeout = body_timeout
+        self.max_head_size = max_head_size
+        self.graceful_timeout = graceful_timeout
+        self.multiprocess = multiprocess
+        self.draining = False
+        self.requests_handled = 0
+        self.connections = set()
+        self.loop = None
+        self._server = None
+        self._stopped = None
+        self._ready = threading.Event()
+
+    def serve_forever(self):
+        """
+        Run the event loop until the server is drained.
+
+        The application's startup and shutdown hooks run on the loop.
+        """
+        asyncio.run(self.serve())
+
+    async def serve(self):
+        """
+        Serve connections until ``drain`` is called and open requests finish.
+        """
+        self.loop = asyncio.get_running_loop()
+        self._stopped = self.loop.create_future()
+        await self.app.startup_async()
+        try:
+            self._server = await self.loop.create_server(lambda: HTTPProtocol(self), sock=self.socket)
+            self._ready.set()
+            if self.draining:
+                self._drain()
+            await self._stopped
+            self._server.close()
+            deadline = None if self.graceful_timeout is None else self.loop.time() + self.graceful_timeout
+            while self.connections:
+                if deadline is not None and self.loop.time() >= deadline:
+                    logger.warning('Closing %d connections still open after %ss',
+                                   len(self.connections), self.graceful_timeout)
+                    for connection in list(self.connections):
+                        connection.transport.abort()
+                    break
+                await asyncio.sleep(0.05)
+        finally:
+            self._ready.set()
+            await self.app.shutdown_async()
+
+    def wait_ready(self, timeout=None):
+        """
+        Block until the server accepts connections; for use from other threads.
+        """
+        return self._ready.wait(timeout)
+
+    def count_request(self):
+        """
+        Count a handled request and start draining once ``max_requests`` is reached.
+        """
+        self.requests_handled += 1
+        if self.max_requests and self.requests_handled >= self.max_requests and not self.draining:
+            logger.info('Worker %s reached max_requests, recycling', os.getpid())
+            self._drain()
+
+    def drain(self):
+        """
+        Stop accepting connections and let in-flight requests finish.
+
+        Safe to call from signal handlers and other threads.
+        """
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self._drain)
+        else:
+            self.draining = True
+
+    def shutdown(self):
+        self.drain()
+
+    def _drain(self):
+        self.draining = True
+        if self._server is not None:
+            self._server.close()
+        for connection in list(self.connections):
+            if connection.idle and not connection.buffer:
+                connection.transport.close()
+        if self._stopped is not None and not self._stopped.done():
+            self._stopped.set_result(None)
+
+
+def serve_async(app, sock, threads=8, install_signals=True, **options):
+    """
+    Serve an application on a listening socket with ``AsyncHTTPServer``.
+
+    Args:
+        app (EasyAPI): The application to serve.
+        sock (socket.socket): The listening socket.
+        threads (int): Size of the application's thread pool for plain handlers,
+            unless the application sets ``thread_pool_size`` itself.
+        install_signals (bool): Drain on SIGTERM.
+        **options: Options for ``AsyncHTTPServer``.
+    """
+    if app.thread_pool_size is None:
+        app.thread_pool_size = threads
+    server = AsyncHTTPServer(app, sock, **options)
+    if install_signals:
+        try:
+            signal.signal(signal.SIGTERM, lambda signum, frame: server.drain())
+        except ValueError:
+            # Not running in the main thread
+            pass
+    server.serve_forever()
@@ -1,33 +1,79 @@
 import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from EasyAPI import asgi
+from EasyAPI.blueprint import join_prefix, mount_blueprints
+from EasyAPI.concurrency import ConcurrencyLimiter
+from EasyAPI.container import Container
+from EasyAPI.exceptions import HTTPException, NotFound, RequestEntityTooLarge
+from EasyAPI.metrics import DEFAULT_BUCKETS, Metrics
+from EasyAPI.multipart import DEFAULT_SPOOL_THRESHOLD
+from EasyAPI.profiler import Profiler
+from EasyAPI.pipeline import AFTER, AROUND, BEFORE, classify_middleware, compile_async_pipeline, compile_pipeline
 from EasyAPI.request import Request
 from EasyAPI.response import Response
+from EasyAPI.routing import Router
+from EasyAPI.static import StaticFiles
+from EasyAPI.utils.logs import setup_logging
 import logging
 import inspect
 
+# Environ key holding the thread pool of the application handling a request
+EXECUTOR_ENVIRON_KEY = 'easyapi.executor'
+
+
 class EasyAPI:
-    def __init__(self):
+    def __init__(self, thread_pool_size=None, max_body_size=None, body_spool_threshold=DEFAULT_SPOOL_THRESHOLD):
         """
         Initialize the EasyAPI application.
+
+        Args:
+            thread_pool_size (int): Maximum number of threads used to run synchronous
+                handlers when serving over ASGI. Defaults to the executor's default.
+            max_body_size (int): Maximum accepted request body size in bytes. Larger
+                requests get a 413 response. None disables the limit.
+            body_spool_threshold (int): Size above which buffered request bodies and
+                uploaded files are spooled to a temporary file.
         """
         self.routes = {}
+        self.router = Router()
         self.error_handlers = {}
         self.middlewares = []
-        self.blueprints = {}
+        self.middleware_hooks = {BEFORE: [], AFTER: [], AROUND: []}
+        # (url_prefix, blueprint)
+        self.blueprints = []
+        self._mounts = {}
         self.static_folder = None
+        self.static_files = None
+        self.startup_handlers = []
+        self.shutdown_handlers = []
+        self.thread_pool_size = thread_pool_size
+        self.max_body_size = max_body_size
+        self.body_spool_threshold = body_spool_threshold
+        self._executor = None
+        self._pipeline = None
+        self._async_pipeline = None
+        self.container = Container()
+        self.container.register('app', instance=self)
+        self.metrics = None
+        self.profiler = None
+        self.concurrency = None
 
-        # Set up basic logging
-        logging.basicConfig(level=logging.INFO)
+        # Logging is configured by the application, or by run() through setup_logging
         self.logger = logging.getLogger('EasyAPI')
 
-    def add_route(self, path, handler, methods=['GET']):
+    def add_route(self, path, handler, methods=['GET'], **options):
         """
         Add a route to the application.
 
         Args:
             path (str): The URL path.
-            handler (function): The function that handles requests to this path.
+            handler (function): The function or coroutine function that handles requests to this path.
             methods (list): The list of HTTP methods this route should respond to.
+            **options: Per-route settings available to middleware as
+                ``request.route.options``, such as ``cache`` for ``ResponseCache``.
         """
+        self.router.add(path, handler, methods, **options)
         for method in methods:
             self.routes[(path, method)] = handler
         self.logger.info(f'Route added: {path} [{", ".join(methods)}]')
@@ -61,32 +107,102 @@ class EasyAPI:
         """
         Add middleware to the application.
 
+        Functions taking ``(request)`` run before the handler and may return a
+        response to short-circuit it; functions taking ``(request, response)``
+        run after it and may replace the response. Objects can implement any of
+        ``before``, ``after`` and ``around`` methods.
+
         Args:
-            middleware (function): The middleware function.
+            middleware (function|object): The middleware function or object.
         """
+        hooks = classify_middleware(middleware)
+        for phase, hook in hooks:
+            self.middleware_hooks[phase].append(hook)
         self.middlewares.append(middleware)
-        self.logger.info(f'Middleware added: {middleware.__name__}')
+        self._pipeline = None
+        name = getattr(middleware, '__name__', type(middleware).__name__)
+        phases = ', '.join(phase for phase, _ in hooks)
+        self.logger.info(f'Middleware added: {name} [{phases}]')
+
+    def before_request(self, hook):
+        """
+        Register a hook called as ``hook(request)`` before the handler.
+
+        Returning a response from the hook skips the rest of the pipeline.
+
+        Args:
+            hook (function): The hook function or coroutine function.
+
+        Returns:
+            function: The hook, so this can be used as a decorator.
+        """
+        self.middleware_hooks[BEFORE].append(hook)
+        self._pipeline = None
+        return hook
+
+    def after_request(self, hook):
+        """
+        Register a hook called as ``hook(request, response)`` after the handler.
+
+        Returning a response from the hook replaces the current one.
+
+        Args:
+            hook (function): The hook function or coroutine function.
+
+        Returns:
+            function: The hook, so this can be used as a decorator.
+        """
+        self.middleware_hooks[AFTER].append(hook)
+        self._pipeline = None
+        return hook
+
+    def around_request(self, hook):
+        """
+        Register a hook called as ``hook(request, call_next)`` that wraps the handler.
+
+        The hook must call ``call_next(request)`` to continue the pipeline and
+        return a response.
+
+        Args:
+            hook (function): The hook function or coroutine function.
+
+        Returns:
+            function: The hook, so this can be used as a decorator.
+        """
+        self.middleware_hooks[AROUND].append(hook)
+        self._pipeline = None
+        return hook
 
     def register_blueprint(self, blueprint, url_prefix=''):
         """
-        Register a blueprint to the application.
+        Mount a blueprint, and the blueprints nested in it, at a URL prefix.
+
+        Requests under the prefix are matched against the blueprint's own
+        routes first and run through its middleware and error handlers, inside
+        the application's middleware. Routes of the application itself, or of
+        a blueprint mounted at a longer prefix, skip the blueprint's middleware
+        entirely.
 
         Args:
             blueprint (Blueprint): The blueprint instance.
             url_prefix (str): The URL prefix for the blueprint routes.
         """
-        for route, handler in blueprint.routes.items():
-            self.add_route(url_prefix + route, handler, blueprint.methods.get(route, ['GET']))
+        self.blueprints.append((url_prefix, blueprint))
+        self._pipeline = None
+        self.logger.info(f'Blueprint registered: {blueprint.name or type(blueprint).__name__} at {join_prefix("", url_prefix) or "/"}')
 
-    def set_static_folder(self, folder_path):
+    def set_static_folder(self, folder_path, **options):
         """
         Set the folder for serving static files.
 
         Args:
             folder_path (str): The path to the static files folder.
+            **options: Options for ``StaticFiles`` such as ``max_age``,
+                ``precompressed`` and the in-memory cache limits.
         """
         if os.path.isdir(folder_path):
             self.static_folder = folder_path
+            self.static_files = StaticFiles(folder_path, **options)
             self.logger.info(f'Serving static files from: {folder_path}')
         else:
             raise FileNotFoundError(f'Static folder {folder_path} does not exist.')
@@ -102,14 +218,324 @@ class EasyAPI:
         Returns:
             Response: The response containing the static file content.
         """
-        file_path = os.path.join(self.static_folder, path)
-        if os.path.isfile(file_path):
-            with open(file_path, 'rb') as f:
-                content = f.read()
-            mime_type = 'text/plain'  # You can improve this by using the mimetypes module
-            return Response(content, headers=[('Content-Type', mime_type)])
-        else:
-            return self.error_handlers.get(404, lambda req: Response("404 Not Found", status='404 NOT FOUND'))(request)
+        response = self.static_files.serve(request, path)
+        if response is None:
+            return self._not_found(request)
+        return response
+
+    def register_service(self, name, factory=None, instance=None, scope='singleton',
+                         on_startup=None, on_shutdown=None):
+        """
+        Register a service that handlers receive by naming it as a parameter.
+
+        A handler ``def get_login(request, oauth_service)`` is called with the
+        service registered as ``oauth_service``. Handler signatures are
+        inspected when the route is added and services are resolved when the
+        application is finalized, so dispatch does no lookups.
+
+        Args:
+            name (str): The parameter name handlers use for the service.
+            factory (function): Called without arguments to create the service.
+            instance (object): An already created service, used instead of ``factory``.
+            scope (str): ``'singleton'`` for one shared instance, or ``'worker'``
+                for one instance per worker process, created after fork.
+            on_startup (function): Called with the service once it is created.
+            on_shutdown (function): Called with the service when the application shuts down.
+        """
+        self.container.register(name, factory, instance, scope, on_startup, on_shutdown)
+        self._pipeline = None
+        self.logger.info(f'Service registered: {name} ({scope})')
+
+    def finalize(self, bind_services=True):
+        """
+        Compile the application's routes and middleware pipeline.
+
+        Called automatically on the first request, but can be called at startup
+        so the first request does not pay for it. Routes or middleware added
+        afterwards trigger a recompile.
+
+        Args:
+            bind_services (bool): Whether to resolve the services handlers take.
+                The pre-fork master skips this so worker services are only
+                created in the workers.
+        """
+        self.router.compile()
+        routers = [self.router]
+        self._mounts = mount_blueprints(self.blueprints)
+        for mounts in self._mounts.values():
+            for mount in mounts:
+                mount.router.compile()
+                mount.compile(*self._endpoints(self._call_route, self._call_route_async))
+                routers.append(mount.router)
+                for route in mount.router.routes:
+                    for method in route.methods:
+                        self.routes[(route.path, method)] = route.handler
+        if bind_services:
+            for router in routers:
+                for route in router.routes:
+                    route.args = self.container.bind(route)
+        hooks = self.middleware_hooks
+        endpoint, endpoint_async = self._endpoints(self._dispatch, self._dispatch_async)
+        self._pipeline = compile_pipeline(endpoint, hooks[BEFORE], hooks[AFTER], hooks[AROUND])
+        self._async_pipeline = compile_async_pipeline(
+            endpoint_async, hooks[BEFORE], hooks[AFTER], hooks[AROUND]
+        )
+        if self.concurrency is not None:
+            self._pipeline = self.concurrency.wrap(self._pipeline)
+            self._async_pipeline = self.concurrency.wrap_async(self._async_pipeline)
+        if self.metrics is not None:
+            self._pipeline = self.metrics.track(self._pipeline)
+            self._async_pipeline = self.metrics.track_async(self._async_pipeline)
+        if self.profiler is not None:
+            self._pipeline = self.profiler.wrap(self._pipeline)
+            self._async_pipeline = self.profiler.wrap_async(self._async_pipeline)
+
+    def enable_concurrency_limits(self, limit=None, queue_size=100, queue_timeout=1.0, adaptive=None, retry_after=1):
+        """
+        Bound the requests in flight and shed load before queues grow unbounded.
+
+        Requests over a limit wait in a bounded queue for up to
+        ``queue_timeout`` seconds and are answered with a 503 once the queue
+        is full or their wait would exceed it. Routes can set their own limit
+        with a ``concurrency`` option, e.g. ``concurrency=10`` or
+        ``concurrency={'limit': 10, 'queue_timeout': 0.2}``, so a route whose
+        dependency slows down sheds its own requests instead of tying up the
+        whole worker.
+
+        Args:
+            limit (int): Global in-flight limit, or None for per-route limits only.
+            queue_size (int): Maximum requests waiting for a global slot.
+            queue_timeout (float): Seconds a request may wait for a global slot.
+            adaptive (bool|dict|AIMD): Adjust the global limit from observed
+                latency with AIMD; a dict holds ``AIMD`` arguments.
+            retry_after (int): Value of the ``Retry-After`` header on 503 responses.
+
+        Returns:
+            ConcurrencyLimiter: The limiter, whose ``stats()`` reports each gate.
+        """
+        self.concurrency = ConcurrencyLimiter(limit, queue_size, queue_timeout, adaptive, retry_after)
+        self._pipeline = None
+        return self.concurrency
+
+    def _endpoints(self, endpoint, endpoint_async):
+        if self.metrics is not None:
+            endpoint = self.metrics.time_handler(endpoint)
+            endpoint_async = self.metrics.time_handler_async(endpoint_async)
+        return endpoint, endpoint_async
+
+    def enable_metrics(self, path='/metrics', instrument_services=True, buckets=DEFAULT_BUCKETS):
+        """
+        Record per-route request metrics and serve them in Prometheus format.
+
+        Requests are counted by route, method and status, and their latency is
+        recorded in histograms for the whole pipeline, the handler alone and
+        the middleware around it. When metrics are not enabled none of this
+        code is on the request path.
+
+        Args:
+            path (str): The route serving the metrics, or None to not add one.
+            instrument_services (bool): Whether to time the method calls of
+                registered services. Call this before the application starts
+                so the services are wrapped when they are created.
+            buckets (list): Upper bounds of the latency histogram buckets, in seconds.
+
+        Returns:
+            Metrics: The metrics registry.
+        """
+        self.metrics = Metrics(buckets)
+        if instrument_services:
+            metrics = self.metrics
+            self.container.wrappers.append(
+                lambda name, service: service if service is self else metrics.instrument(name, service)
+            )
+        if path:
+            self.add_route(path, self.metrics.endpoint)
+        self._pipeline = None
+        return self.metrics
+
+    def _match_route(self, request):
+        """
+        Find the route for a request and attach it with its path parameters.
+
+        Blueprints mounted at a prefix of the path are tried first, innermost
+        first, then the application's own routes. A request that matches none
+        of them keeps the innermost blueprint covering its path, so that
+        blueprint's middleware and 404 handler apply. Static file paths are
+        left unmatched so the endpoint serves them.
+
+        Args:
+            request (Request): The request object.
+        """
+        path = request.path
+        if self.static_folder and path.startswith('/static/'):
+            return
+        if self._mounts:
+            # Look up each prefix of the path, longest first
+            end = len(path)
+            while end >= 0:
+                for mount in self._mounts.get(path[:end], ()):
+                    route, params = mount.router.match(path, request.method)
+                    if route is not None:
+                        request.route = route
+                        request.path_params = params
+                        request.mount = mount
+                        return
+                    if request.mount is None and mount.prefix:
+                        request.mount = mount
+                end = path.rfind('/', 0, end) if end else -1
+        route, params = self.router.match(path, request.method)
+        if route is not None:
+            request.route = route
+            request.path_params = params
+            request.mount = None
+
+    def _dispatch(self, request):
+        """
+        Call the handler for a request; the innermost step of the pipeline.
+
+        Args:
+            request (Request): The request object.
+
+        Returns:
+            Response: The response for the request.
+        """
+        if request.mount is not None:
+            return request.mount.pipeline(request)
+        if request.route is None:
+            if self.static_folder and request.path.startswith('/static/'):
+                return self.serve_static(request, request.path[len('/static/'):])
+            return self._not_found(request)
+        return self._call_route(request)
+
+    async def _dispatch_async(self, request):
+        if request.mount is not None:
+            return await request.mount.async_pipeline(request)
+        if request.route is None:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), self._dispatch, request)
+        return await self._call_route_async(request)
+
+    def _call_route(self, request):
+        """
+        Call the matched route's handler; the innermost step of blueprint pipelines.
+
+        Args:
+            request (Request): The request object.
+
+        Returns:
+            Response: The handler's response.
+        """
+        route = request.route
+        if route is None:
+            raise NotFound()
+        if route.is_async:
+            return asyncio.run(route.handler(request, *route.args))
+        return route.handler(request, *route.args)
+
+    async def _call_route_async(self, request):
+        route = request.route
+        if route is None:
+            raise NotFound()
+        if route.is_async:
+            return await route.handler(request, *route.args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), route.handler, request, *route.args)
+
+    def _not_found(self, request):
+        return self.error_handlers.get(404, lambda req: Response("404 Not Found", status='404 NOT FOUND'))(request)
+
+    def _http_error(self, request, error):
+        """
+        Build the response for an HTTPException.
+
+        Args:
+            request (Request): The request object.
+            error (HTTPException): The raised error.
+
+        Returns:
+            Response: The error response.
+        """
+        handler = self.error_handlers.get(error.code)
+        if handler is not None:
+            return handler(request)
+        return Response(error.message, status=error.status)
+
+    def enable_profiling(self, directory, rate=0.0, secret=None, mode='cprofile', **options):
+        """
+        Profile a sample of requests and write per-route profiles to a directory.
+
+        Args:
+            directory (str): Where profiles are written.
+            rate (float): Fraction of requests to profile, between 0 and 1.
+            secret (str): Key for signed tokens that force profiling of a request
+                sending them in the ``X-Profile`` header; see ``Profiler.sign``.
+            mode (str): ``'cprofile'`` or ``'sample'`` for the stack sampler.
+            **options: Other ``Profiler`` options such as ``header`` and ``interval``.
+
+        Returns:
+            Profiler: The profiler.
+        """
+        self.profiler = Profiler(directory, rate=rate, secret=secret, mode=mode, **options)
+        self._pipeline = None
+        self.logger.info(f'Profiling {rate:.1%} of requests to {directory} ({mode})')
+        return self.profiler
+
+    def make_request(self, environ):
+        """
+        Create the Request object for an environ using the application's body limits.
+
+        Args:
+            environ (dict): The WSGI environment dictionary.
+
+        Returns:
+            Request: The request object.
+        """
+        return Request(environ, max_body_size=self.max_body_size, spool_threshold=self.body_spool_threshold)
+
+    def handle_request(self, request):
+        """
+        Dispatch a request through middleware, routing and error handlers.
+
+        Args:
+            request (Request): The request object.
+
+        Returns:
+            Response: The response for the request.
+        """
+        if self._pipeline is None or self.router.dirty:
+            self.finalize()
+        try:
+            if request.content_too_large:
+                raise RequestEntityTooLarge()
+            self._match_route(request)
+            return self._pipeline(request)
+        except HTTPException as e:
+            return self._http_error(request, e)
+
+    async def handle_request_async(self, request):
+        """
+        Dispatch a request on the event loop.
+
+        Coroutine handlers are awaited directly, while plain handlers run on the
+        application's bounded thread pool so they never block the loop.
+
+        Args:
+            request (Request): The request object.
+
+        Returns:
+            Response: The response for the request.
+        """
+        if self._async_pipeline is None or self.router.dirty:
+            self.finalize()
+        # Lets services such as cache batchers share the bounded thread pool
+        request.environ[EXECUTOR_ENVIRON_KEY] = self._get_executor()
+        try:
+            if request.content_too_large:
+                raise RequestEntityTooLarge()
+            self._match_route(request)
+            return await self._async_pipeline(request)
+        except HTTPException as e:
+            return self._http_error(request, e)
 
     def wsgi_app(self, environ, start_response):
         """
@@ -122,57 +548,184 @@ class EasyAPI:
         Returns:
             list: The response body as a list of bytes.
         """
-        request = Request(environ)
-
-        # Middleware processing (pre-route)
-        for middleware in self.middlewares:
-            response = middleware(request)
-            if response:
-                return response(environ, start_response)
+        request = self.make_request(environ)
+        response = self.handle_request(request)
+        return response(environ, start_response)
 
-        # Handle static files
-        if self.static_folder and request.path.startswith('/static/'):
-            static_path = request.path[len('/static/'):]
-            response = self.serve_static(request, static_path)
-            return response(environ, start_response)
+    async def asgi_app(self, scope, receive, send):
+        """
+        The ASGI application callable.
 
-        handler = self.routes.get((request.path, request.method), None)
+        Args:
+            scope (dict): The ASGI connection scope.
+            receive (function): The awaitable that receives ASGI events.
+            send (function): The awaitable that sends ASGI events.
+        """
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            raise ValueError(f"Unsupported ASGI scope type: {scope['type']}")
 
-        if handler is not None:
-            response = handler(request)
+        environ = asgi.build_environ(scope)
+        request = self.make_request(environ)
+        try:
+            if request.content_too_large:
+                raise RequestEntityTooLarge()
+            await asgi.read_body(environ, receive, self.max_body_size, self.body_spool_threshold)
+        except HTTPException as e:
+            response = self._http_error(request, e)
         else:
-            response = self.error_handlers.get(404, lambda req: Response("404 Not Found", status='404 NOT FOUND'))(request)
+            response = await self.handle_request_async(request)
+        await asgi.send_response(response, environ, send)
 
-        # Middleware processing (post-route)
-        for middleware in self.middlewares:
-            post_response = middleware(request, response)
-            if post_response:
-                response = post_response
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    await self.startup_async()
+                except Exception as e:
+                    self.logger.exception('Application startup failed')
+                    await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                    return
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                try:
+                    await self.shutdown_async()
+                except Exception as e:
+                    self.logger.exception('Application shutdown failed')
+                    await send({'type': 'lifespan.shutdown.failed', 'message': str(e)})
+                    return
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
 
-        return response(environ, start_response)
+    def on_startup(self, handler):
+        """
+        Register a function to run when the application starts.
+
+        Args:
+            handler (function): A function or coroutine function taking no arguments.
+
+        Returns:
+            function: The handler, so this can be used as a decorator.
+        """
+        self.startup_handlers.append(handler)
+        return handler
 
-    def __call__(self, environ, start_response):
+    def on_shutdown(self, handler):
         """
-        Make the EasyAPI instance callable as a WSGI application.
+        Register a function to run when the application shuts down.
 
         Args:
-            environ (dict): The WSGI environment dictionary.
-            start_response (function): The function to start the HTTP response.
+            handler (function): A function or coroutine function taking no arguments.
 
         Returns:
-            list: The response body as a list of bytes.
+            function: The handler, so this can be used as a decorator.
         """
-        return self.wsgi_app(environ, start_response)
+        self.shutdown_handlers.append(handler)
+        return handler
 
-    def run(self, host='127.0.0.1', port=5000):
+    def startup(self):
+        """
+        Start the application's services, finalize it and run its startup handlers.
         """
-        Run the application using the built-in WSGI server.
+        self.container.startup()
+        self.finalize()
+        for handler in self.startup_handlers:
+            result = handler()
+            if inspect.isawaitable(result):
+                asyncio.run(result)
+
+    def shutdown(self):
+        """
+        Run the application's shutdown handlers, stop its services and release its thread pool.
+        """
+        for handler in self.shutdown_handlers:
+            result = handler()
+            if inspect.isawaitable(result):
+                asyncio.run(result)
+        self.container.shutdown()
+        if self.profiler is not None:
+            self.profiler.close()
+        self._shutdown_executor()
+
+    async def startup_async(self):
+        """
+        Start the application's services, finalize it and await its startup handlers.
+        """
+        # Service factories usually open connections, so keep them off the loop
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.container.startup)
+        self.finalize()
+        for handler in self.startup_handlers:
+            result = handler()
+            if inspect.isawaitable(result):
+                await result
+
+    async def shutdown_async(self):
+        """
+        Await the application's shutdown handlers, stop its services and release its thread pool.
+        """
+        for handler in self.shutdown_handlers:
+            result = handler()
+            if inspect.isawaitable(result):
+                await result
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.container.shutdown)
+        if self.profiler is not None:
+            self.profiler.close()
+        self._shutdown_executor()
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.thread_pool_size, thread_name_prefix='EasyAPI'
+            )
+        return self._executor
+
+    def _shutdown_executor(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def __call__(self, *args):
+        """
+        Make the EasyAPI instance callable as a WSGI or ASGI application.
+
+        Called with ``(environ, start_response)`` it behaves as a WSGI
+        application; called with ``(scope, receive, send)`` it returns the ASGI
+        coroutine.
+
+        Returns:
+            list|coroutine: The WSGI response body, or the ASGI coroutine.
+        """
+        if len(args) == 3:
+            return self.asgi_app(*args)
+        return self.wsgi_app(*args)
+
+    def run(self, host='127.0.0.1', port=5000, workers=1, threads=8, **options):
+        """
+        Run the application using the built-in HTTP/1.1 server.
+
+        Each process serves its connections from an asyncio event loop that
+        parses HTTP/1.1 itself, with keep-alive, pipelining and chunked bodies;
+        plain handlers run on a pool of ``threads`` threads. With ``workers``
+        greater than one the server pre-forks worker processes that share a
+        single listening socket and are respawned if they crash or reach
+        ``max_requests``. SIGTERM drains in-flight requests before exiting.
 
         Args:
             host (str): The hostname to listen on.
             port (int): The port to listen on.
+            workers (int): Number of worker processes.
+            threads (int): Number of threads per worker.
+            **options: Extra server options such as ``max_requests``,
+                ``max_requests_jitter``, ``graceful_timeout``, ``keepalive_timeout``,
+                ``header_timeout``, ``body_timeout`` and ``worker_class``
+                (``'threaded'`` for the thread-per-connection server).
         """
-        from wsgiref.simple_server import make_server
-        server = make_server(host, port, self)
-        self.logger.info(f"Serving on http://{host}:{port}")
-        server.serve_forever()
+        from EasyAPI.server import serve
+        if not self.logger.handlers:
+            setup_logging()
+        serve(self, host, port, workers=workers, threads=threads, **options)
@@ -0,0 +1,158 @@
+import io
+import sys
+import asyncio
+import tempfile
+
+from EasyAPI.exceptions import RequestEntityTooLarge
+from EasyAPI.multipart import DEFAULT_SPOOL_THRESHOLD
+
+
+async def read_body(environ, receive, max_size=None, spool_threshold=DEFAULT_SPOOL_THRESHOLD):
+    """
+    Read the request body from an ASGI receive channel into ``wsgi.input``.
+
+    The body is written to a temporary file that stays in memory below
+    ``spool_threshold``, and reading stops as soon as ``max_size`` is exceeded.
+
+    Args:
+        environ (dict): The environ built by ``build_environ``; updated in place.
+        receive (function): The awaitable that receives ASGI events.
+        max_size (int): Maximum accepted body size in bytes, or None for no limit.
+        spool_threshold (int): Size above which the body is written to disk.
+
+    Raises:
+        RequestEntityTooLarge: If the body exceeds ``max_size``.
+    """
+    body = tempfile.SpooledTemporaryFile(max_size=spool_threshold)
+    length = 0
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            break
+        chunk = message.get('body', b'')
+        length += len(chunk)
+        if max_size is not None and length > max_size:
+            body.close()
+            raise RequestEntityTooLarge()
+        body.write(chunk)
+        if not message.get('more_body', False):
+            break
+    body.seek(0)
+    environ['wsgi.input'] = body
+    environ['CONTENT_LENGTH'] = str(length)
+
+
+def build_environ(scope):
+    """
+    Build a WSGI-style environ from an ASGI HTTP scope.
+
+    The application core works on environ dictionaries, so ASGI requests are
+    translated once here and then follow the same path as WSGI requests. The
+    body is attached afterwards by ``read_body``.
+
+    Args:
+        scope (dict): The ASGI connection scope.
+
+    Returns:
+        dict: The environ dictionary.
+    """
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client')
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        'PATH_INFO': scope['path'],
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+        'asgi.scope': scope,
+    }
+    if client:
+        environ['REMOTE_ADDR'] = client[0]
+        environ['REMOTE_PORT'] = str(client[1])
+
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+            continue
+        if name == 'CONTENT_LENGTH':
+            environ['CONTENT_LENGTH'] = value
+            continue
+        key = 'HTTP_' + name
+        if key in environ:
+            environ[key] += ',' + value
+        else:
+            environ[key] = value
+    return environ
+
+
+async def send_response(response, environ, send):
+    """
+    Send a Response over an ASGI send channel.
+
+    Async streaming bodies are iterated on the loop; other streaming bodies
+    are read on the default executor so file and generator I/O never blocks it.
+
+    Args:
+        response (Response): The response to send.
+        environ (dict): The environ the response was produced for.
+        send (function): The awaitable that sends ASGI events.
+    """
+    if getattr(response, 'is_async', False):
+        await _send_start(send, response.status, response.headers)
+        async for chunk in response.content:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            if chunk:
+                await send({'type': 'http.response.body', 'body': bytes(chunk), 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+        return
+
+    started = {}
+
+    def start_response(status, headers, exc_info=None):
+        started['status'] = status
+        started['headers'] = headers
+
+    body = response(environ, start_response)
+    try:
+        await _send_start(send, started['status'], started['headers'])
+        if getattr(response, 'is_streaming', False):
+            loop = asyncio.get_running_loop()
+            iterator = iter(body)
+            while True:
+                chunk = await loop.run_in_executor(None, next, iterator, None)
+                if chunk is None:
+                    break
+                if chunk:
+                    await send({'type': 'http.response.body', 'body': bytes(chunk), 'more_body': True})
+        else:
+            for chunk in body:
+                if chunk:
+                    await send({'type': 'http.response.body', 'body': bytes(chunk), 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+    finally:
+        close = getattr(body, 'close', None)
+        if close is not None:
+            close()
+
+
+async def _send_start(send, status, headers):
+    await send({
+        'type': 'http.response.start',
+        'status': int(status.split(' ', 1)[0]),
+        'headers': [
+            (name.lower().encode('latin-1'), str(value).encode('latin-1'))
+            for name, value in headers
+        ],
+    })
@@ -1,24 +1,232 @@
+from EasyAPI.exceptions import HTTPException
+from EasyAPI.pipeline import AFTER, AROUND, BEFORE, classify_middleware, compile_async_pipeline, compile_pipeline
+from EasyAPI.routing import Router
+
+
+def join_prefix(prefix, path):
+    """
+    Join a mount prefix and a route rule or nested prefix.
+
+    Args:
+        prefix (str): The prefix, e.g. ``/api``. Empty for the root.
+        path (str): The path to append.
+
+    Returns:
+        str: The joined path without a trailing slash, or an empty string for the root.
+    """
+    prefix = prefix.strip('/')
+    path = path.strip('/')
+    joined = '/'.join(part for part in (prefix, path) if part)
+    return '/' + joined if joined else ''
+
+
 class Blueprint:
-    def __init__(self):
+    def __init__(self, name=None):
         """
-        Initialize the Blueprint with empty routes and methods.
+        Initialize the Blueprint.
+
+        A blueprint groups routes with the middleware and error handlers that
+        apply to them only. Blueprints are mounted at a prefix with
+        ``register_blueprint`` and can contain other blueprints.
+
+        Args:
+            name (str): A name used in logs.
         """
-        self.routes = {}
-        self.methods = {}
+        self.name = name
+        # (path, handler, methods, options)
+        self.routes = []
+        self.middlewares = []
+        self.middleware_hooks = {BEFORE: [], AFTER: [], AROUND: []}
+        self.error_handlers = {}
+        # (url_prefix, blueprint)
+        self.blueprints = []
 
-    def route(self, path, methods=['GET']):
+    def route(self, path, methods=['GET'], **options):
         """
         Define a route within the blueprint.
 
         Args:
-            path (str): The URL path.
+            path (str): The URL path, relative to the blueprint's prefix.
             methods (list): The list of HTTP methods this route should respond to.
+            **options: Per-route settings, as for ``EasyAPI.add_route``.
 
         Returns:
             function: The decorator that adds the route.
         """
         def wrapper(handler):
-            self.routes[path] = handler
-            self.methods[path] = methods
+            self.add_route(path, handler, methods, **options)
             return handler
         return wrapper
+
+    def add_route(self, path, handler, methods=['GET'], **options):
+        """
+        Add a route to the blueprint.
+
+        Args:
+            path (str): The URL path, relative to the blueprint's prefix.
+            handler (function): The function or coroutine function that handles requests to this path.
+            methods (list): The list of HTTP methods this route should respond to.
+            **options: Per-route settings, as for ``EasyAPI.add_route``.
+        """
+        self.routes.append((path, handler, list(methods), options))
+
+    def use_middleware(self, middleware):
+        """
+        Add middleware that runs only for this blueprint's routes.
+
+        Args:
+            middleware (function|object): The middleware function or object,
+                classified like ``EasyAPI.use_middleware``.
+        """
+        for phase, hook in classify_middleware(middleware):
+            self.middleware_hooks[phase].append(hook)
+        self.middlewares.append(middleware)
+
+    def before_request(self, hook):
+        """
+        Register a hook called as ``hook(request)`` before this blueprint's handlers.
+        """
+        self.middleware_hooks[BEFORE].append(hook)
+        return hook
+
+    def after_request(self, hook):
+        """
+        Register a hook called as ``hook(request, response)`` after this blueprint's handlers.
+        """
+        self.middleware_hooks[AFTER].append(hook)
+        return hook
+
+    def around_request(self, hook):
+        """
+        Register a hook called as ``hook(request, call_next)`` around this blueprint's handlers.
+        """
+        self.middleware_hooks[AROUND].append(hook)
+        return hook
+
+    def register_error_handler(self, status_code, handler):
+        """
+        Register an error handler for errors raised within this blueprint.
+
+        Applies to ``HTTPException`` errors raised by the blueprint's routes and
+        middleware, including 404 for unmatched paths under its prefix. Codes
+        without a handler fall back to the enclosing blueprint and then to the
+        application.
+
+        Args:
+            status_code (int): The HTTP status code.
+            handler (function): The function that handles the error.
+        """
+        self.error_handlers[status_code] = handler
+
+    def register_blueprint(self, blueprint, url_prefix=''):
+        """
+        Nest a blueprint inside this one.
+
+        Args:
+            blueprint (Blueprint): The blueprint to nest.
+            url_prefix (str): Its prefix, relative to this blueprint's prefix.
+        """
+        self.blueprints.append((url_prefix, blueprint))
+
+
+class Mount:
+    """
+    A blueprint compiled at its full prefix.
+
+    Each mount has its own router holding the blueprint's routes under their
+    full paths, and a pipeline made of the blueprint's middleware nested
+    inside that of its enclosing blueprints.
+    """
+    def __init__(self, blueprint, prefix, parent=None):
+        self.blueprint = blueprint
+        self.prefix = prefix
+        self.parent = parent
+        self.router = Router()
+        self.error_handlers = dict(parent.error_handlers) if parent is not None else {}
+        self.error_handlers.update(blueprint.error_handlers)
+        self.pipeline = None
+        self.async_pipeline = None
+        for path, handler, methods, options in blueprint.routes:
+            self.router.add(join_prefix(prefix, path) or '/', handler, methods, **options)
+
+    def __repr__(self):
+        return f'<Mount {self.blueprint.name or "blueprint"} at {self.prefix or "/"}>'
+
+    def chain(self):
+        """
+        The mounts from this one out to the outermost blueprint.
+        """
+        mount = self
+        while mount is not None:
+            yield mount
+            mount = mount.parent
+
+    def compile(self, endpoint, endpoint_async):
+        """
+        Build this mount's pipelines around the route endpoints.
+
+        Args:
+            endpoint (function): Calls the matched route's handler.
+            endpoint_async (function): Coroutine variant of ``endpoint``.
+        """
+        pipeline, async_pipeline = endpoint, endpoint_async
+        for mount in self.chain():
+            hooks = mount.blueprint.middleware_hooks
+            pipeline = compile_pipeline(pipeline, hooks[BEFORE], hooks[AFTER], hooks[AROUND])
+            async_pipeline = compile_async_pipeline(async_pipeline, hooks[BEFORE], hooks[AFTER], hooks[AROUND])
+        self.pipeline = self._guard(pipeline)
+        self.async_pipeline = self._guard_async(async_pipeline)
+
+    def _guard(self, pipeline):
+        error_handlers = self.error_handlers
+        if not error_handlers:
+            return pipeline
+
+        def guarded(request):
+            try:
+                return pipeline(request)
+            except HTTPException as e:
+                handler = error_handlers.get(e.code)
+                if handler is None:
+                    raise
+                return handler(request)
+        return guarded
+
+    def _guard_async(self, pipeline):
+        error_handlers = self.error_handlers
+        if not error_handlers:
+            return pipeline
+
+        async def guarded(request):
+            try:
+                return await pipeline(request)
+            except HTTPException as e:
+                handler = error_handlers.get(e.code)
+                if handler is None:
+                    raise
+                return handler(request)
+        return guarded
+
+
+def mount_blueprints(blueprints):
+    """
+    Compile registered blueprints, and the blueprints nested in them, into mounts.
+
+    Args:
+        blueprints (list): ``(url_prefix, blueprint)`` pairs registered on the application.
+
+    Returns:
+        dict: The mounts grouped by their full prefix, so dispatch can find the
+        mounts covering a path with one lookup per path segment.
+    """
+    mounts = {}
+
+    def visit(blueprint, prefix, parent):
+        mount = Mount(blueprint, prefix, parent)
+        mounts.setdefault(prefix, []).append(mount)
+        for child_prefix, child in blueprint.blueprints:
+            visit(child, join_prefix(prefix, child_prefix), mount)
+
+    for prefix, blueprint in blueprints:
+        visit(blueprint, join_prefix('', prefix), None)
+    return mounts
@@ -0,0 +1,316 @@
+import zlib
+import hashlib
+import importlib.util
+
+from EasyAPI.response import Response
+from EasyAPI.utils.lru import LRUCache
+from EasyAPI.utils.providers import ProviderRegistry
+
+# Optional compressors are imported the first time a response uses them
+libraries = ProviderRegistry('content encoding')
+
+
+@libraries.register('br', package='brotli')
+def _brotli():
+    import brotli
+    return brotli
+
+
+@libraries.register('zstd', package='zstandard')
+def _zstandard():
+    import zstandard
+    return zstandard
+
+
+DEFAULT_LEVELS = {'br': 4, 'zstd': 3, 'gzip': 6}
+
+# Content types worth compressing; everything else (images, archives, video) is
+# usually compressed already
+COMPRESSIBLE_TYPES = (
+    'text/',
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'application/xhtml+xml',
+    'application/x-ndjson',
+    'application/graphql-response+json',
+    'image/svg+xml',
+)
+
+
+def parse_accept_encoding(header):
+    """
+    Parse an ``Accept-Encoding`` header.
+
+    Args:
+        header (str): The header value, e.g. ``gzip;q=0.8, br``.
+
+    Returns:
+        dict: Quality values keyed by lower-cased encoding name. Encodings with
+        ``q=0`` are left out.
+    """
+    encodings = {}
+    for item in header.split(','):
+        name, _, params = item.partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        params = params.replace(' ', '')
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if quality > 0:
+            encodings[name] = quality
+    return encodings
+
+
+class _GzipCompressor:
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class _BrotliCompressor:
+    def __init__(self, level):
+        self._compressor = libraries.load('br').Compressor(quality=level)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class _ZstdCompressor:
+    def __init__(self, level):
+        zstandard = libraries.load('zstd')
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+        self._flush_block = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(self._flush_block)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+def available_encodings():
+    """
+    List the encodings supported in this environment, in order of preference.
+
+    Installed packages are looked up without importing them.
+
+    Returns:
+        list: Encoding names.
+    """
+    encodings = []
+    if importlib.util.find_spec('brotli') is not None:
+        encodings.append('br')
+    if importlib.util.find_spec('zstandard') is not None:
+        encodings.append('zstd')
+    encodings.append('gzip')
+    return encodings
+
+
+_COMPRESSORS = {
+    'gzip': _GzipCompressor,
+    'br': _BrotliCompressor,
+    'zstd': _ZstdCompressor,
+}
+
+
+class _CompressedStream(Response):
+    """
+    Response wrapper that compresses a streaming body chunk by chunk.
+
+    Each chunk is flushed as it is produced so streamed output (server-sent
+    events, progressive CSV exports) still reaches the client incrementally.
+    """
+    is_streaming = True
+
+    def __init__(self, response, encoding, level):
+        self.response = response
+        self.status = response.status
+        self.headers = response.headers
+        self.encoding = encoding
+        self.level = level
+
+    def __call__(self, environ, start_response):
+        # The wrapped response is called without a file wrapper so its body is
+        # always iterable through Python
+        environ = dict(environ)
+        environ.pop('wsgi.file_wrapper', None)
+
+        def capture(status, headers, exc_info=None):
+            pass
+
+        body = self.response(environ, capture)
+        headers = [(name, value) for name, value in self.headers if name.lower() != 'content-length']
+        start_response(self.status, headers)
+        return self._compress(body)
+
+    def _compress(self, body):
+        compressor = _COMPRESSORS[self.encoding](self.level)
+        try:
+            for chunk in body:
+                if not chunk:
+                    continue
+                data = compressor.compress(bytes(chunk)) + compressor.flush()
+                if data:
+                    yield data
+            data = compressor.finish()
+            if data:
+                yield data
+        finally:
+            close = getattr(body, 'close', None)
+            if close is not None:
+                close()
+
+
+class CompressionMiddleware:
+    def __init__(self, minimum_size=500, levels=None, encodings=None,
+                 cache_max_entries=256, cache_max_bytes=16 * 1024 * 1024):
+        """
+        Initialize the response compression middleware.
+
+        The middleware negotiates ``Accept-Encoding`` against the available
+        encodings (brotli and zstd when their packages are installed, gzip
+        always), skips small bodies, non-compressible content types and
+        responses that are already encoded, and compresses streaming responses
+        incrementally. Compressed output of cacheable responses is kept in an
+        LRU keyed on a digest of the body so hot responses are compressed only
+        once.
+
+        Args:
+            minimum_size (int): Bodies smaller than this are sent uncompressed.
+            levels (dict): Compression level per encoding, merged with the defaults.
+            encodings (list): Encodings to offer, in order of preference.
+            cache_max_entries (int): Maximum number of cached compressed bodies.
+            cache_max_bytes (int): Maximum total size of cached compressed bodies.
+        """
+        self.minimum_size = minimum_size
+        self.levels = dict(DEFAULT_LEVELS)
+        if levels:
+            self.levels.update(levels)
+        available = available_encodings()
+        self.encodings = [e for e in (encodings or available) if e in available]
+        self.cache = LRUCache(cache_max_entries, cache_max_bytes) if cache_max_entries else None
+
+    def after(self, request, response):
+        return self.compress(request, response)
+
+    def select_encoding(self, request):
+        """
+        Pick the best encoding accepted by the client.
+
+        Args:
+            request (Request): The request object.
+
+        Returns:
+            str: The encoding name, or None if nothing acceptable is available.
+        """
+        header = request.headers.get('accept-encoding')
+        if not header:
+            return None
+        accepted = parse_accept_encoding(header)
+        best, best_quality = None, 0
+        for encoding in self.encodings:
+            quality = accepted.get(encoding, accepted.get('*', 0))
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+        return best
+
+    def _should_compress(self, response):
+        status = response.status
+        if not status.startswith('2') or status.startswith(('204', '206')):
+            return False
+        if response.get_header('Content-Encoding'):
+            return False
+        if 'no-transform' in (response.get_header('Cache-Control') or ''):
+            return False
+        content_type = (response.get_header('Content-Type') or '').lower()
+        return content_type.startswith(COMPRESSIBLE_TYPES) or content_type.endswith(('+json', '+xml'))
+
+    def _cache_key(self, response, encoding):
+        cache_control = (response.get_header('Cache-Control') or '').lower()
+        if 'no-store' in cache_control or 'private' in cache_control:
+            return None
+        if not (response.get_header('ETag') or 'max-age' in cache_control or 'public' in cache_control):
+            return None
+        # ETags are only unique per resource, so the key is always the body itself
+        digest = hashlib.blake2b(response.content, digest_size=16).digest()
+        return (digest, encoding, self.levels[encoding])
+
+    def compress(self, request, response):
+        """
+        Compress a response if the client and the response allow it.
+
+        Args:
+            request (Request): The request object.
+            response (Response): The response returned by the handler.
+
+        Returns:
+            Response: The compressed response, or the original one.
+        """
+        if not isinstance(response, Response) or not self._should_compress(response):
+            return response
+        encoding = self.select_encoding(request)
+        _add_vary(response)
+        if encoding is None:
+            return response
+        level = self.levels[encoding]
+
+        if getattr(response, 'is_streaming', False):
+            compressed = _CompressedStream(response, encoding, level)
+            _mark_encoded(compressed, encoding)
+            return compressed
+
+        content = response.content
+        if len(content) < self.minimum_size:
+            return response
+
+        key = self._cache_key(response, encoding) if self.cache is not None else None
+        data = self.cache.get(key) if key is not None else None
+        if data is None:
+            compressor = _COMPRESSORS[encoding](level)
+            data = compressor.compress(bytes(content)) + compressor.finish()
+            if key is not None:
+                self.cache.set(key, data)
+
+        response.content = data
+        response.remove_header('Content-Length')
+        _mark_encoded(response, encoding)
+        return response
+
+
+def _add_vary(response):
+    vary = response.get_header('Vary')
+    if not vary:
+        response.set_header('Vary', 'Accept-Encoding')
+    elif 'accept-encoding' not in vary.lower():
+        response.set_header('Vary', vary + ', Accept-Encoding')
+
+
+def _mark_encoded(response, encoding):
+    response.set_header('Content-Encoding', encoding)
+    etag = response.get_header('ETag')
+    # The encoded body is a different representation, so a strong ETag must change
+    if etag and not etag.startswith('W/') and etag.endswith('"'):
+        response.set_header('ETag', f'{etag[:-1]}-{encoding}"')
@@ -0,0 +1,372 @@
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+
+from EasyAPI.exceptions import HTTPException
+from EasyAPI.response import Response
+
+logger = logging.getLogger('EasyAPI.concurrency')
+
+
+class AIMD:
+    def __init__(self, initial=20, min_limit=1, max_limit=200, latency_threshold=1.0,
+                 backoff=0.9, increase=1.0):
+        """
+        Initialize an additive-increase, multiplicative-decrease limit.
+
+        Every request slower than ``latency_threshold`` or failing with a 5xx
+        shrinks the limit by ``backoff``; while the limit is saturated and
+        requests are fast it grows by about ``increase`` per round of
+        ``limit`` requests. The limit thus follows what the slowest
+        dependency behind the routes can absorb.
+
+        Args:
+            initial (int): The starting limit.
+            min_limit (int): The limit never goes below this.
+            max_limit (int): The limit never goes above this.
+            latency_threshold (float): Seconds above which a request counts as slow.
+            backoff (float): Factor applied to the limit on a slow or failed request.
+            increase (float): Growth of the limit per round of successful requests.
+        """
+        self.value = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_threshold = latency_threshold
+        self.backoff = backoff
+        self.increase = increase
+
+    @property
+    def limit(self):
+        return int(self.value)
+
+    def update(self, latency, failed, inflight):
+        """
+        Adjust the limit after a request.
+
+        Args:
+            latency (float): How long the request took, in seconds.
+            failed (bool): Whether it failed with a server error.
+            inflight (int): Requests in flight when it finished, itself included.
+
+        Returns:
+            int: The new limit.
+        """
+        if failed or latency > self.latency_threshold:
+            self.value = max(float(self.min_limit), self.value * self.backoff)
+        elif inflight >= self.limit:
+            self.value = min(float(self.max_limit), self.value + self.increase / self.value)
+        return self.limit
+
+
+class _ThreadWaiter:
+    __slots__ = ('lock', 'granted')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.lock.acquire()
+        self.granted = False
+
+    def wake(self):
+        self.lock.release()
+
+
+class _AsyncWaiter:
+    __slots__ = ('loop', 'future', 'granted')
+
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.future = self.loop.create_future()
+        self.granted = False
+
+    def wake(self):
+        self.loop.call_soon_threadsafe(_resolve, self.future)
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class ConcurrencyGate:
+    def __init__(self, name, limit=None, queue_size=100, queue_timeout=1.0, adaptive=None):
+        """
+        Initialize a gate bounding the requests in flight.
+
+        Requests over the limit wait in a FIFO queue. A request is turned away
+        at once when the queue is full or when, from the average latency, it
+        could not be admitted within ``queue_timeout``; otherwise it waits up
+        to ``queue_timeout`` before being turned away.
+
+        Args:
+            name (str): Name used in logs and stats.
+            limit (int): Maximum requests in flight. Ignored with ``adaptive``.
+            queue_size (int): Maximum requests waiting for a slot.
+            queue_timeout (float): Seconds a request may wait for a slot.
+            adaptive (AIMD): Adjusts the limit from observed latency.
+        """
+        if limit is None and adaptive is None:
+            raise ValueError('A concurrency gate needs a limit or an adaptive limit')
+        self.name = name
+        self.adaptive = adaptive
+        self.limit = adaptive.limit if adaptive is not None else limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.inflight = 0
+        self.queue = deque()
+        self.shed = 0
+        # Moving average of request latency, in seconds
+        self.latency = 0.0
+        self._lock = threading.Lock()
+
+    def _admit(self, waiter_class):
+        """
+        Take a slot, join the queue or refuse the request.
+
+        Returns:
+            bool|object: True with a slot, False when shed, or the waiter to wait on.
+        """
+        with self._lock:
+            if self.inflight < self.limit and not self.queue:
+                self.inflight += 1
+                return True
+            waiting = len(self.queue)
+            # Slots free up at about limit / latency per second
+            expected_wait = self.latency * (waiting + 1) / max(self.limit, 1)
+            if waiting >= self.queue_size or expected_wait > self.queue_timeout:
+                self.shed += 1
+                return False
+            waiter = waiter_class()
+            self.queue.append(waiter)
+            return waiter
+
+    def _abandon(self, waiter):
+        with self._lock:
+            if waiter.granted:
+                # Granted while timing out: keep the slot
+                return True
+            self.queue.remove(waiter)
+            self.shed += 1
+            return False
+
+    def acquire(self):
+        """
+        Take a slot, waiting on the calling thread if needed.
+
+        Returns:
+            bool: Whether a slot was taken; if not the request should be shed.
+        """
+        waiter = self._admit(_ThreadWaiter)
+        if waiter is True or waiter is False:
+            return waiter
+        if waiter.lock.acquire(timeout=self.queue_timeout):
+            return True
+        return self._abandon(waiter)
+
+    async def acquire_async(self):
+        """
+        Take a slot, waiting on the event loop if needed.
+
+        Returns:
+            bool: Whether a slot was taken; if not the request should be shed.
+        """
+        waiter = self._admit(_AsyncWaiter)
+        if waiter is True or waiter is False:
+            return waiter
+        timer = waiter.loop.call_later(self.queue_timeout, _resolve, waiter.future)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if not self._abandon(waiter):
+                raise
+            self.release()
+            raise
+        finally:
+            timer.cancel()
+        if waiter.granted:
+            return True
+        return self._abandon(waiter)
+
+    def release(self, latency=None, failed=False):
+        """
+        Free a slot and hand it to the next waiting request.
+
+        Args:
+            latency (float): How long the request held the slot, in seconds,
+                or None when the request never ran.
+            failed (bool): Whether it failed with a server error.
+        """
+        with self._lock:
+            if latency is not None:
+                self.latency = latency if not self.latency else self.latency + (latency - self.latency) * 0.1
+                if self.adaptive is not None:
+                    self.limit = self.adaptive.update(latency, failed, self.inflight)
+            self.inflight -= 1
+            queue = self.queue
+            while queue and self.inflight < self.limit:
+                waiter = queue.popleft()
+                waiter.granted = True
+                self.inflight += 1
+                waiter.wake()
+
+    def stats(self):
+        return {
+            'limit': self.limit,
+            'inflight': self.inflight,
+            'queued': len(self.queue),
+            'shed': self.shed,
+            'latency': self.latency,
+        }
+
+
+def _failed(response):
+    status = getattr(response, 'status', '')
+    return isinstance(status, str) and status.startswith('5')
+
+
+class ConcurrencyLimiter:
+    def __init__(self, limit=None, queue_size=100, queue_timeout=1.0, adaptive=None, retry_after=1):
+        """
+        Initialize concurrency limits for the dispatch path.
+
+        A global gate bounds all requests, and routes can add their own gate
+        with a ``concurrency`` option: an int limit, or a dict of
+        ``ConcurrencyGate`` arguments where ``adaptive`` may be True or a dict
+        of ``AIMD`` arguments. A request takes its route's slot before the
+        global one, so requests queued behind a slow route do not hold global
+        slots that healthy routes need. Shed requests get a 503 response.
+
+        Args:
+            limit (int): Global in-flight limit, or None for no global gate
+                unless ``adaptive`` is given.
+            queue_size (int): Maximum requests waiting for a global slot.
+            queue_timeout (float): Seconds a request may wait for a global slot.
+            adaptive (bool|dict|AIMD): Adjust the global limit with AIMD.
+            retry_after (int): Value of the ``Retry-After`` header on 503 responses.
+        """
+        adaptive = self._adaptive(adaptive, limit)
+        self.gate = None
+        if limit is not None or adaptive is not None:
+            self.gate = ConcurrencyGate('*', limit, queue_size, queue_timeout, adaptive)
+        self.retry_after = retry_after
+        self._route_gates = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _adaptive(value, limit):
+        if value is None or value is False:
+            return None
+        if isinstance(value, AIMD):
+            return value
+        options = dict(value) if isinstance(value, dict) else {}
+        if limit is not None:
+            options.setdefault('initial', limit)
+        return AIMD(**options)
+
+    def gate_for(self, route):
+        """
+        The gate of a route, created from its ``concurrency`` option on first use.
+
+        Returns:
+            ConcurrencyGate: The gate, or None if the route has no limit of its own.
+        """
+        if route is None:
+            return None
+        try:
+            return self._route_gates[route]
+        except KeyError:
+            pass
+        with self._lock:
+            if route not in self._route_gates:
+                option = route.options.get('concurrency')
+                gate = None
+                if option:
+                    options = {'limit': option} if isinstance(option, int) else dict(option)
+                    options['adaptive'] = self._adaptive(options.get('adaptive'), options.get('limit'))
+                    gate = ConcurrencyGate(route.path, **options)
+                self._route_gates[route] = gate
+            return self._route_gates[route]
+
+    def shed_response(self, gate):
+        logger.debug('Shedding request at the %s gate', gate.name)
+        return Response(
+            'Service Unavailable', status='503 SERVICE UNAVAILABLE',
+            headers=[('Content-Type', 'text/plain'), ('Retry-After', str(self.retry_after))],
+        )
+
+    def stats(self):
+        """
+        The state of every gate, keyed by route rule and ``'*'`` for the global gate.
+        """
+        gates = [gate for gate in self._route_gates.values() if gate is not None]
+        if self.gate is not None:
+            gates.append(self.gate)
+        return {gate.name: gate.stats() for gate in gates}
+
+    def wrap(self, pipeline):
+        """
+        Wrap a compiled pipeline so requests pass through the gates.
+        """
+        def limited(request):
+            gates = []
+            route_gate = self.gate_for(request.route)
+            for gate in (route_gate, self.gate):
+                if gate is None:
+                    continue
+                if not gate.acquire():
+                    for taken in gates:
+                        taken.release()
+                    return self.shed_response(gate)
+                gates.append(gate)
+            if not gates:
+                return pipeline(request)
+            start = time.perf_counter()
+            failed = True
+            try:
+                response = pipeline(request)
+                failed = _failed(response)
+                return response
+            except HTTPException as e:
+                # Turned into a response outside this wrapper; client errors are not failures
+                failed = e.code >= 500
+                raise
+            finally:
+                latency = time.perf_counter() - start
+                for gate in gates:
+                    gate.release(latency, failed)
+        return limited
+
+    def wrap_async(self, pipeline):
+        async def limited(request):
+            gates = []
+            route_gate = self.gate_for(request.route)
+            try:
+                for gate in (route_gate, self.gate):
+                    if gate is None:
+                        continue
+                    if not await gate.acquire_async():
+                        for taken in gates:
+                            taken.release()
+                        return self.shed_response(gate)
+                    gates.append(gate)
+            except asyncio.CancelledError:
+                for taken in gates:
+                    taken.release()
+                raise
+            if not gates:
+                return await pipeline(request)
+            start = time.perf_counter()
+            failed = True
+            try:
+                response = await pipeline(request)
+                failed = _failed(response)
+                return response
+            except HTTPException as e:
+                failed = e.code >= 500
+                raise
+            finally:
+                latency = time.perf_counter() - start
+                for gate in gates:
+                    gate.release(latency, failed)
+        return limited
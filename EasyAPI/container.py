@@ -0,0 +1,194 @@
+import os
+import asyncio
+import inspect
+import threading
+
+SINGLETON = 'singleton'
+WORKER = 'worker'
+
+
+def injection_plan(handler):
+    """
+    Work out which services a handler asks for.
+
+    Every positional parameter after the request is a service, looked up by
+    parameter name. This runs once when the route is added so dispatch does
+    no reflection.
+
+    Args:
+        handler (function): The route handler.
+
+    Returns:
+        tuple: ``(name, has_default)`` pairs in call order.
+    """
+    try:
+        parameters = list(inspect.signature(handler).parameters.values())
+    except (TypeError, ValueError):
+        return ()
+    plan = []
+    for parameter in parameters[1:]:
+        if parameter.kind not in (parameter.POSITIONAL_ONLY, parameter.POSITIONAL_OR_KEYWORD):
+            break
+        plan.append((parameter.name, parameter.default is not parameter.empty))
+    return tuple(plan)
+
+
+def _run(result):
+    if inspect.isawaitable(result):
+        return asyncio.run(result)
+    return result
+
+
+class _Provider:
+    __slots__ = ('name', 'factory', 'scope', 'on_startup', 'on_shutdown')
+
+    def __init__(self, name, factory, scope, on_startup, on_shutdown):
+        self.name = name
+        self.factory = factory
+        self.scope = scope
+        self.on_startup = on_startup
+        self.on_shutdown = on_shutdown
+
+
+class Container:
+    def __init__(self):
+        """
+        Initialize an empty service container.
+
+        Singleton services are created once per process that first needs them
+        and shared afterwards. Worker services are created separately in each
+        worker process, so connections and pools opened by their factory or
+        startup hook are never shared across ``fork``.
+        """
+        self.providers = {}
+        # Created instances keyed by name, as (pid, instance) so worker-scoped
+        # services are recreated after fork
+        self._instances = {}
+        self._started = []
+        self._lock = threading.RLock()
+        # Functions called as wrapper(name, instance) that may replace a service
+        # with a proxy, e.g. to instrument it
+        self.wrappers = []
+
+    def register(self, name, factory=None, instance=None, scope=SINGLETON, on_startup=None, on_shutdown=None):
+        """
+        Register a service.
+
+        Args:
+            name (str): The name handlers use as the parameter name.
+            factory (function): Called without arguments to create the service.
+            instance (object): An already created service, used instead of ``factory``.
+            scope (str): ``'singleton'`` or ``'worker'``.
+            on_startup (function): Called with the service after it is created,
+                e.g. to open connections. May be a coroutine function.
+            on_shutdown (function): Called with the service when the application
+                shuts down. May be a coroutine function.
+        """
+        if scope not in (SINGLETON, WORKER):
+            raise ValueError(f"Unknown service scope '{scope}'")
+        if factory is None:
+            if instance is None:
+                raise ValueError(f"Service '{name}' needs a factory or an instance")
+            factory = lambda: instance
+        with self._lock:
+            self.providers[name] = _Provider(name, factory, scope, on_startup, on_shutdown)
+            self._instances.pop(name, None)
+
+    def service(self, name=None, scope=SINGLETON, on_startup=None, on_shutdown=None):
+        """
+        Decorator registering a factory function as a service.
+
+        Args:
+            name (str): The service name. Defaults to the function's name.
+            scope (str): ``'singleton'`` or ``'worker'``.
+            on_startup (function): See ``register``.
+            on_shutdown (function): See ``register``.
+
+        Returns:
+            function: The decorator.
+        """
+        def wrapper(factory):
+            self.register(name or factory.__name__, factory, scope=scope,
+                          on_startup=on_startup, on_shutdown=on_shutdown)
+            return factory
+        return wrapper
+
+    def __contains__(self, name):
+        return name in self.providers
+
+    def resolve(self, name):
+        """
+        Get a service, creating it on first use in this process.
+
+        Args:
+            name (str): The service name.
+
+        Returns:
+            object: The service.
+        """
+        pid = os.getpid()
+        entry = self._instances.get(name)
+        if entry is not None and (entry[0] == pid or self.providers[name].scope == SINGLETON):
+            return entry[1]
+        with self._lock:
+            entry = self._instances.get(name)
+            if entry is not None and (entry[0] == pid or self.providers[name].scope == SINGLETON):
+                return entry[1]
+            try:
+                provider = self.providers[name]
+            except KeyError:
+                raise LookupError(f"No service registered as '{name}'") from None
+            instance = _run(provider.factory())
+            if provider.on_startup is not None:
+                _run(provider.on_startup(instance))
+            self._started.append((pid, provider, instance))
+            for wrapper in self.wrappers:
+                instance = wrapper(name, instance)
+            self._instances[name] = (pid, instance)
+            return instance
+
+    def bind(self, route):
+        """
+        Resolve the services a route's handler asks for.
+
+        Parameters with a default that name no registered service end the
+        injected arguments, leaving the rest to their defaults.
+
+        Args:
+            route (Route): The route whose ``injections`` to resolve.
+
+        Returns:
+            tuple: The services to pass after the request.
+        """
+        args = []
+        for name, has_default in route.injections:
+            if name in self.providers:
+                args.append(self.resolve(name))
+            elif has_default:
+                break
+            else:
+                raise LookupError(f"No service registered as '{name}' for route {route.path}")
+        return tuple(args)
+
+    def startup(self):
+        """
+        Create every registered service in this process and run its startup hook.
+        """
+        for name in list(self.providers):
+            self.resolve(name)
+
+    def shutdown(self):
+        """
+        Run the shutdown hooks of the services created in this process, newest first.
+        """
+        pid = os.getpid()
+        with self._lock:
+            started = [item for item in self._started if item[0] == pid]
+            self._started = [item for item in self._started if item[0] != pid]
+            for _, provider, _ in started:
+                entry = self._instances.get(provider.name)
+                if entry is not None and entry[0] == pid:
+                    del self._instances[provider.name]
+        for _, provider, instance in reversed(started):
+            if provider.on_shutdown is not None:
+                _run(provider.on_shutdown(instance))
@@ -0,0 +1,33 @@
+class HTTPException(Exception):
+    """
+    Base class for errors that map directly to an HTTP error response.
+
+    Raising one from a handler or middleware makes the application respond
+    with ``status``, using the error handler registered for ``code`` if any.
+    """
+    code = 500
+    status = '500 INTERNAL SERVER ERROR'
+    message = 'Internal Server Error'
+
+    def __init__(self, message=None):
+        super().__init__(message or self.message)
+        if message:
+            self.message = message
+
+
+class BadRequest(HTTPException):
+    code = 400
+    status = '400 BAD REQUEST'
+    message = 'Bad Request'
+
+
+class NotFound(HTTPException):
+    code = 404
+    status = '404 NOT FOUND'
+    message = '404 Not Found'
+
+
+class RequestEntityTooLarge(HTTPException):
+    code = 413
+    status = '413 REQUEST ENTITY TOO LARGE'
+    message = 'Request Entity Too Large'
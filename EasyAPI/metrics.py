@@ -0,0 +1,352 @@
+import time
+import bisect
+import inspect
+import threading
+
+from EasyAPI.response import Response
+
+# Latency buckets in seconds, from sub-millisecond cache hits to slow upstream calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Label used for requests that matched no route, so unknown paths cannot
+# create unbounded label sets
+UNMATCHED = '<unmatched>'
+
+# Key under which the handler duration is passed from the handler timer to the request timer
+_HANDLER_TIME = 'easyapi.metrics.handler_time'
+
+COUNTER = 'counter'
+GAUGE = 'gauge'
+HISTOGRAM = 'histogram'
+
+METRICS = {
+    'easyapi_requests_total': (COUNTER, 'Total HTTP requests.', ('route', 'method', 'status')),
+    'easyapi_requests_in_flight': (GAUGE, 'HTTP requests currently being handled.', ()),
+    'easyapi_request_duration_seconds': (HISTOGRAM, 'Time spent handling requests, middleware included.', ('route', 'method')),
+    'easyapi_handler_duration_seconds': (HISTOGRAM, 'Time spent in route handlers.', ('route', 'method')),
+    'easyapi_middleware_duration_seconds': (HISTOGRAM, 'Time spent in middleware around route handlers.', ('route', 'method')),
+    'easyapi_request_bytes_total': (COUNTER, 'Request body bytes received.', ('route', 'method')),
+    'easyapi_response_bytes_total': (COUNTER, 'Response body bytes sent, for bodies of known size.', ('route', 'method')),
+    'easyapi_service_call_duration_seconds': (HISTOGRAM, 'Time spent in service calls.', ('service', 'method')),
+    'easyapi_service_call_errors_total': (COUNTER, 'Service calls that raised an exception.', ('service', 'method')),
+}
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=''):
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        return repr(value) if value != int(value) else str(int(value))
+    return str(value)
+
+
+class _Shard:
+    """
+    The aggregates recorded by one thread. Only its own thread writes to it, so
+    recording takes no lock; ``collect`` sums all shards.
+    """
+    __slots__ = ('values', 'histograms')
+
+    def __init__(self):
+        # (name, labels) -> number
+        self.values = {}
+        # (name, labels) -> [bucket counts..., sum, count]
+        self.histograms = {}
+
+
+class Metrics:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """
+        Initialize the metrics registry.
+
+        Every thread records into its own shard without locking; shards are
+        merged when the metrics are collected. In a pre-fork deployment each
+        worker keeps its own registry.
+
+        Args:
+            buckets (list): Upper bounds of the latency histogram buckets, in seconds.
+        """
+        self.buckets = tuple(sorted(buckets))
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()
+
+    def _shard(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = _Shard()
+            with self._lock:
+                self._shards.append(shard)
+            return shard
+
+    def inc(self, name, labels=(), value=1):
+        """
+        Add to a counter or gauge.
+
+        Args:
+            name (str): The metric name.
+            labels (tuple): The label values, in the order declared in ``METRICS``.
+            value (float): The amount to add; negative for gauges going down.
+        """
+        values = self._shard().values
+        key = (name, labels)
+        values[key] = values.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        """
+        Record a value in a histogram.
+
+        Args:
+            name (str): The metric name.
+            labels (tuple): The label values.
+            value (float): The observed value, in seconds for durations.
+        """
+        histograms = self._shard().histograms
+        key = (name, labels)
+        data = histograms.get(key)
+        if data is None:
+            data = histograms[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+        data[bisect.bisect_left(self.buckets, value)] += 1
+        data[-2] += value
+        data[-1] += 1
+
+    def collect(self):
+        """
+        Merge the per-thread aggregates.
+
+        Returns:
+            tuple: ``(values, histograms)`` dictionaries keyed by ``(name, labels)``.
+        """
+        with self._lock:
+            shards = list(self._shards)
+        values, histograms = {}, {}
+        for shard in shards:
+            for key, value in list(shard.values.items()):
+                values[key] = values.get(key, 0) + value
+            for key, data in list(shard.histograms.items()):
+                merged = histograms.get(key)
+                if merged is None:
+                    histograms[key] = list(data)
+                else:
+                    for i, value in enumerate(data):
+                        merged[i] += value
+        return values, histograms
+
+    def render(self):
+        """
+        Render the metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: The metrics document.
+        """
+        values, histograms = self.collect()
+        lines = []
+        for name, (kind, help_text, label_names) in METRICS.items():
+            if kind == HISTOGRAM:
+                series = sorted(key for key in histograms if key[0] == name)
+            else:
+                series = sorted(key for key in values if key[0] == name)
+            if not series and label_names:
+                continue
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            if kind != HISTOGRAM:
+                for key in series or [(name, ())]:
+                    lines.append(f'{name}{_format_labels(label_names, key[1])} {_format_value(values.get(key, 0))}')
+                continue
+            for key in series:
+                data = histograms[key]
+                cumulative = 0
+                for bound, count in zip(self.buckets, data):
+                    cumulative += count
+                    le = _format_labels(label_names, key[1], f'le="{_format_value(bound)}"')
+                    lines.append(f'{name}_bucket{le} {cumulative}')
+                le = _format_labels(label_names, key[1], 'le="+Inf"')
+                lines.append(f'{name}_bucket{le} {data[-1]}')
+                labels = _format_labels(label_names, key[1])
+                lines.append(f'{name}_sum{labels} {_format_value(data[-2])}')
+                lines.append(f'{name}_count{labels} {data[-1]}')
+        return '\n'.join(lines) + '\n'
+
+    def endpoint(self, request):
+        """
+        Route handler serving the metrics to Prometheus.
+        """
+        return Response(self.render(), headers=[('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')])
+
+    def _finish(self, request, response, status, start):
+        elapsed = time.perf_counter() - start
+        route = request.route
+        labels = (route.path if route is not None else UNMATCHED, request.method)
+        self.inc('easyapi_requests_in_flight', (), -1)
+        self.inc('easyapi_requests_total', labels + (status,))
+        self.observe('easyapi_request_duration_seconds', labels, elapsed)
+        handler_time = request.environ.pop(_HANDLER_TIME, None)
+        if handler_time is not None:
+            self.observe('easyapi_handler_duration_seconds', labels, handler_time)
+            self.observe('easyapi_middleware_duration_seconds', labels, max(elapsed - handler_time, 0.0))
+        if request.content_length:
+            self.inc('easyapi_request_bytes_total', labels, request.content_length)
+        size = _body_size(response)
+        if size:
+            self.inc('easyapi_response_bytes_total', labels, size)
+
+    def track(self, pipeline):
+        """
+        Wrap a compiled pipeline to count and time every request.
+
+        Args:
+            pipeline (function): The compiled request pipeline.
+
+        Returns:
+            function: The instrumented pipeline.
+        """
+        def tracked(request):
+            self.inc('easyapi_requests_in_flight', (), 1)
+            start = time.perf_counter()
+            try:
+                response = pipeline(request)
+            except Exception as e:
+                self._finish(request, None, str(getattr(e, 'code', 500)), start)
+                raise
+            self._finish(request, response, _status_code(response), start)
+            return response
+        return tracked
+
+    def track_async(self, pipeline):
+        """
+        Wrap a compiled async pipeline to count and time every request.
+        """
+        async def tracked(request):
+            self.inc('easyapi_requests_in_flight', (), 1)
+            start = time.perf_counter()
+            try:
+                response = await pipeline(request)
+            except Exception as e:
+                self._finish(request, None, str(getattr(e, 'code', 500)), start)
+                raise
+            self._finish(request, response, _status_code(response), start)
+            return response
+        return tracked
+
+    def time_handler(self, endpoint):
+        """
+        Wrap the innermost dispatch step so handler time is measured apart from middleware.
+
+        Blueprint endpoints are wrapped as well; the innermost measurement is kept.
+        """
+        def timed(request):
+            start = time.perf_counter()
+            try:
+                return endpoint(request)
+            finally:
+                request.environ.setdefault(_HANDLER_TIME, time.perf_counter() - start)
+        return timed
+
+    def time_handler_async(self, endpoint):
+        async def timed(request):
+            start = time.perf_counter()
+            try:
+                return await endpoint(request)
+            finally:
+                request.environ.setdefault(_HANDLER_TIME, time.perf_counter() - start)
+        return timed
+
+    def instrument(self, name, service):
+        """
+        Wrap a service so each of its method calls is timed.
+
+        Args:
+            name (str): The service name used as the ``service`` label.
+            service (object): The service instance.
+
+        Returns:
+            ServiceProxy: The instrumented service.
+        """
+        return ServiceProxy(service, name, self)
+
+
+class ServiceProxy:
+    """
+    Transparent proxy timing the method calls of a service.
+
+    Public methods are wrapped once on first access and cached on the proxy,
+    so repeated calls cost one extra function call. Other attributes, such
+    as a cache service's ``client``, are passed through unchanged.
+    """
+    def __init__(self, service, name, metrics):
+        object.__setattr__(self, '_service', service)
+        object.__setattr__(self, '_name', name)
+        object.__setattr__(self, '_metrics', metrics)
+
+    def __getattr__(self, attr):
+        value = getattr(self._service, attr)
+        if attr.startswith('_') or not callable(value) or isinstance(value, type):
+            return value
+        wrapped = _timed_call(value, self._name, attr, self._metrics)
+        object.__setattr__(self, attr, wrapped)
+        return wrapped
+
+    def __setattr__(self, attr, value):
+        setattr(self._service, attr, value)
+
+    def __repr__(self):
+        return f'<ServiceProxy {self._name} {self._service!r}>'
+
+
+def _timed_call(method, service, name, metrics):
+    labels = (service, name)
+
+    if inspect.iscoroutinefunction(method):
+        async def call(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await method(*args, **kwargs)
+            except Exception:
+                metrics.inc('easyapi_service_call_errors_total', labels)
+                raise
+            finally:
+                metrics.observe('easyapi_service_call_duration_seconds', labels, time.perf_counter() - start)
+        return call
+
+    def call(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        except Exception:
+            metrics.inc('easyapi_service_call_errors_total', labels)
+            raise
+        finally:
+            metrics.observe('easyapi_service_call_duration_seconds', labels, time.perf_counter() - start)
+    call.__name__ = getattr(method, '__name__', name)
+    call.__doc__ = getattr(method, '__doc__', None)
+    return call
+
+
+def _status_code(response):
+    status = getattr(response, 'status', None)
+    return status[:3] if isinstance(status, str) else '200'
+
+
+def _body_size(response):
+    if not isinstance(response, Response):
+        return 0
+    if not response.is_streaming:
+        return len(response.content)
+    length = response.get_header('Content-Length')
+    if length is None:
+        length = getattr(response, 'length', 0)
+    try:
+        return int(length)
+    except (TypeError, ValueError):
+        return 0
@@ -1,8 +1,13 @@
+import logging
+
+logger = logging.getLogger('EasyAPI.access')
+
+
 def log_request(request):
     """
     Middleware to log the incoming request.
     """
-    print(f"Received {request.method} request for {request.path}")
+    logger.info("Received %s request for %s", request.method, request.path)
 
 def add_custom_header(request, response):
     """
@@ -0,0 +1,257 @@
+import tempfile
+
+from EasyAPI.exceptions import BadRequest
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+DEFAULT_SPOOL_THRESHOLD = 1024 * 1024
+
+
+def parse_options_header(value):
+    """
+    Parse a header value with parameters, such as ``Content-Type`` or
+    ``Content-Disposition``.
+
+    Args:
+        value (str): The header value, e.g. ``form-data; name="file"``.
+
+    Returns:
+        tuple: The main value (lower-cased) and a dictionary of parameters.
+    """
+    if not value:
+        return '', {}
+    parts = value.split(';')
+    main = parts[0].strip().lower()
+    params = {}
+    for part in parts[1:]:
+        key, sep, val = part.strip().partition('=')
+        if not sep:
+            continue
+        val = val.strip()
+        if len(val) >= 2 and val[0] == val[-1] == '"':
+            val = val[1:-1].replace('\\"', '"').replace('\\\\', '\\')
+        params[key.strip().lower()] = val
+    return main, params
+
+
+class UploadFile:
+    def __init__(self, name, filename, content_type, file, size):
+        """
+        Initialize an uploaded file that was spooled while parsing a form.
+
+        Args:
+            name (str): The form field name.
+            filename (str): The client supplied file name.
+            content_type (str): The Content-Type of the part.
+            file (file): The spooled file object, positioned at the start.
+            size (int): The size of the file in bytes.
+        """
+        self.name = name
+        self.filename = filename
+        self.content_type = content_type
+        self.file = file
+        self.size = size
+
+    def read(self, size=-1):
+        return self.file.read(size)
+
+    def save(self, path, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Copy the uploaded file to a path on disk.
+
+        Args:
+            path (str): The destination path.
+            chunk_size (int): The copy buffer size.
+        """
+        self.file.seek(0)
+        with open(path, 'wb') as out:
+            while True:
+                chunk = self.file.read(chunk_size)
+                if not chunk:
+                    break
+                out.write(chunk)
+        self.file.seek(0)
+
+    def close(self):
+        self.file.close()
+
+
+class MultipartPart:
+    def __init__(self, headers, chunks):
+        """
+        Initialize a part of a multipart body.
+
+        The part's data is read from the underlying request stream on demand,
+        so it must be consumed before advancing to the next part.
+
+        Args:
+            headers (dict): The part headers with lower-cased names.
+            chunks (generator): The generator producing the part's data.
+        """
+        self.headers = headers
+        self._chunks = chunks
+        self._buffer = b''
+        disposition, params = parse_options_header(headers.get('content-disposition', ''))
+        self.name = params.get('name')
+        self.filename = params.get('filename')
+        self.content_type = headers.get('content-type', 'text/plain' if self.filename is None else 'application/octet-stream')
+
+    @property
+    def is_file(self):
+        return self.filename is not None
+
+    def __iter__(self):
+        if self._buffer:
+            buffered, self._buffer = self._buffer, b''
+            yield buffered
+        yield from self._chunks
+
+    def read(self, size=-1):
+        """
+        Read data from the part.
+
+        Args:
+            size (int): Maximum number of bytes to read; all remaining data if negative.
+
+        Returns:
+            bytes: The data read.
+        """
+        if size is None or size < 0:
+            data = self._buffer + b''.join(self._chunks)
+            self._buffer = b''
+            return data
+        while len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def drain(self):
+        self._buffer = b''
+        for _ in self._chunks:
+            pass
+
+    def spool(self, spool_threshold=DEFAULT_SPOOL_THRESHOLD):
+        """
+        Copy the part into a temporary file that stays in memory below the threshold.
+
+        Args:
+            spool_threshold (int): Size above which data is written to disk.
+
+        Returns:
+            UploadFile: The spooled file.
+        """
+        file = tempfile.SpooledTemporaryFile(max_size=spool_threshold)
+        size = 0
+        for chunk in self:
+            file.write(chunk)
+            size += len(chunk)
+        file.seek(0)
+        return UploadFile(self.name, self.filename, self.content_type, file, size)
+
+
+class MultipartParser:
+    def __init__(self, stream, boundary, chunk_size=DEFAULT_CHUNK_SIZE, max_header_size=16 * 1024):
+        """
+        Initialize a streaming ``multipart/form-data`` parser.
+
+        The body is read in ``chunk_size`` pieces and parts are yielded as soon
+        as their headers have been parsed, so memory use does not depend on the
+        size of the uploaded files.
+
+        Args:
+            stream (file): A file-like object positioned at the start of the body.
+            boundary (str|bytes): The boundary from the Content-Type header.
+            chunk_size (int): How many bytes to read from the stream at a time.
+            max_header_size (int): Maximum size of the headers of a single part.
+        """
+        if isinstance(boundary, str):
+            boundary = boundary.encode('latin-1')
+        if not boundary:
+            raise BadRequest('Missing multipart boundary')
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.max_header_size = max_header_size
+        self._delimiter = b'\r\n--' + boundary
+        self._buffer = b'\r\n'
+        self._eof = False
+
+    def _fill(self):
+        if self._eof:
+            return False
+        data = self.stream.read(self.chunk_size)
+        if not data:
+            self._eof = True
+            return False
+        self._buffer += data
+        return True
+
+    def _read_until(self, marker, limit):
+        while True:
+            index = self._buffer.find(marker)
+            if index >= 0:
+                data = self._buffer[:index]
+                self._buffer = self._buffer[index + len(marker):]
+                return data
+            if len(self._buffer) > limit:
+                raise BadRequest('Multipart headers too large')
+            if not self._fill():
+                raise BadRequest('Unexpected end of multipart body')
+
+    def _after_delimiter(self):
+        """
+        Inspect the bytes after a delimiter.
+
+        Returns:
+            bool: True if another part follows, False at the closing delimiter.
+        """
+        while len(self._buffer) < 2:
+            if not self._fill():
+                raise BadRequest('Unexpected end of multipart body')
+        marker = self._buffer[:2]
+        if marker == b'--':
+            return False
+        # Skip transport padding and the line break after the delimiter
+        self._read_until(b'\r\n', self.max_header_size)
+        return True
+
+    def _part_data(self):
+        delimiter = self._delimiter
+        keep = len(delimiter) - 1
+        while True:
+            index = self._buffer.find(delimiter)
+            if index >= 0:
+                data = self._buffer[:index]
+                self._buffer = self._buffer[index + len(delimiter):]
+                if data:
+                    yield data
+                return
+            if len(self._buffer) > keep:
+                data = self._buffer[:-keep]
+                self._buffer = self._buffer[-keep:]
+                yield data
+            if not self._fill():
+                raise BadRequest('Unexpected end of multipart body')
+
+    def _parse_headers(self, raw):
+        headers = {}
+        for line in raw.split(b'\r\n'):
+            if not line:
+                continue
+            name, sep, value = line.decode('utf-8', 'replace').partition(':')
+            if not sep:
+                raise BadRequest('Malformed multipart header')
+            headers[name.strip().lower()] = value.strip()
+        return headers
+
+    def __iter__(self):
+        # Skip the preamble up to the first delimiter, discarding it as it is
+        # scanned so a body without one is never held in memory
+        for _ in self._part_data():
+            pass
+        while self._after_delimiter():
+            headers = self._parse_headers(self._read_until(b'\r\n\r\n', self.max_header_size))
+            part = MultipartPart(headers, self._part_data())
+            yield part
+            part.drain()
@@ -0,0 +1,211 @@
+import asyncio
+import inspect
+
+BEFORE = 'before'
+AFTER = 'after'
+AROUND = 'around'
+
+
+def classify_middleware(middleware):
+    """
+    Work out which phases a middleware participates in.
+
+    Objects may define any of ``before(request)``, ``after(request, response)``
+    and ``around(request, call_next)``, and next to any of them a coroutine
+    method such as ``before_async`` used by the async pipeline instead, e.g.
+    to await I/O the synchronous hook would block the event loop on. Plain
+    functions taking one required argument are ``before`` hooks and functions
+    taking two are ``after`` hooks.
+
+    Args:
+        middleware (object): The middleware function or object.
+
+    Returns:
+        list: ``(phase, hook)`` pairs.
+    """
+    hooks = []
+    for phase in (BEFORE, AROUND, AFTER):
+        hook = getattr(middleware, phase, None)
+        if not callable(hook):
+            continue
+        async_hook = getattr(middleware, f'{phase}_async', None)
+        if callable(async_hook):
+            hook = SplitHook(hook, async_hook)
+        hooks.append((phase, hook))
+    if hooks:
+        return hooks
+
+    required = [
+        p for p in inspect.signature(middleware).parameters.values()
+        if p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD) and p.default is p.empty
+    ]
+    if len(required) == 1:
+        return [(BEFORE, middleware)]
+    if len(required) == 2:
+        return [(AFTER, middleware)]
+    raise TypeError(
+        f'Cannot tell the phase of middleware {middleware!r}; '
+        'register it with before_request, after_request or around_request'
+    )
+
+
+class SplitHook:
+    """
+    A hook with separate implementations for the sync and async pipelines.
+    """
+    __slots__ = ('sync_hook', 'async_hook')
+
+    def __init__(self, sync_hook, async_hook):
+        self.sync_hook = sync_hook
+        self.async_hook = async_hook
+
+
+def _sync_variant(hook):
+    return hook.sync_hook if isinstance(hook, SplitHook) else hook
+
+
+def _async_variant(hook):
+    return hook.async_hook if isinstance(hook, SplitHook) else hook
+
+
+def _as_sync(hook):
+    hook = _sync_variant(hook)
+    if not inspect.iscoroutinefunction(hook):
+        return hook
+
+    def run(*args):
+        return asyncio.run(hook(*args))
+    return run
+
+
+def compile_pipeline(endpoint, befores=(), afters=(), arounds=()):
+    """
+    Compile hooks and an endpoint into a single nested callable.
+
+    ``before`` hooks run first and may return a response to short-circuit the
+    request. ``around`` hooks wrap the rest of the chain, the first registered
+    being the outermost. ``after`` hooks see the endpoint's response and may
+    replace it. Phases without hooks add no wrapper at all.
+
+    Args:
+        endpoint (function): The innermost callable taking a request.
+        befores (list): Hooks called as ``hook(request)``.
+        afters (list): Hooks called as ``hook(request, response)``.
+        arounds (list): Hooks called as ``hook(request, call_next)``.
+
+    Returns:
+        function: A callable taking a request and returning a response.
+    """
+    handler = endpoint
+
+    if afters:
+        afters = tuple(_as_sync(hook) for hook in afters)
+        inner_after = handler
+
+        def handler(request):
+            response = inner_after(request)
+            for hook in afters:
+                result = hook(request, response)
+                if result is not None:
+                    response = result
+            return response
+
+    for hook in reversed(list(arounds)):
+        handler = _wrap_around(_sync_variant(hook), handler)
+
+    if befores:
+        befores = tuple(_as_sync(hook) for hook in befores)
+        inner_before = handler
+
+        def handler(request):
+            for hook in befores:
+                result = hook(request)
+                if result is not None:
+                    return result
+            return inner_before(request)
+
+    return handler
+
+
+def _wrap_around(hook, call_next):
+    if inspect.iscoroutinefunction(hook):
+        # The rest of the chain runs off the hook's loop, where async handlers
+        # and hooks are free to start their own with asyncio.run
+        async def call_next_async(request):
+            return await asyncio.get_running_loop().run_in_executor(None, call_next, request)
+
+        def handler(request):
+            return asyncio.run(hook(request, call_next_async))
+    else:
+        def handler(request):
+            return hook(request, call_next)
+    return handler
+
+
+def compile_async_pipeline(endpoint, befores=(), afters=(), arounds=()):
+    """
+    Compile hooks and a coroutine endpoint into a single nested coroutine function.
+
+    Same ordering as ``compile_pipeline``. Coroutine hooks are awaited;
+    synchronous ``around`` hooks run on the loop's default executor (not the
+    handler pool, which they may be waiting on) and reach the rest of the
+    chain through the event loop.
+
+    Args:
+        endpoint (function): The innermost coroutine function taking a request.
+        befores (list): Hooks called as ``hook(request)``.
+        afters (list): Hooks called as ``hook(request, response)``.
+        arounds (list): Hooks called as ``hook(request, call_next)``.
+
+    Returns:
+        function: A coroutine function taking a request and returning a response.
+    """
+    handler = endpoint
+
+    if afters:
+        afters = tuple((hook, inspect.iscoroutinefunction(hook)) for hook in map(_async_variant, afters))
+        inner_after = handler
+
+        async def handler(request):
+            response = await inner_after(request)
+            for hook, is_async in afters:
+                result = hook(request, response)
+                if is_async:
+                    result = await result
+                if result is not None:
+                    response = result
+            return response
+
+    for hook in reversed(list(arounds)):
+        handler = _wrap_around_async(_async_variant(hook), handler)
+
+    if befores:
+        befores = tuple((hook, inspect.iscoroutinefunction(hook)) for hook in map(_async_variant, befores))
+        inner_before = handler
+
+        async def handler(request):
+            for hook, is_async in befores:
+                result = hook(request)
+                if is_async:
+                    result = await result
+                if result is not None:
+                    return result
+            return await inner_before(request)
+
+    return handler
+
+
+def _wrap_around_async(hook, call_next):
+    if inspect.iscoroutinefunction(hook):
+        async def handler(request):
+            return await hook(request, call_next)
+        return handler
+
+    async def handler(request):
+        loop = asyncio.get_running_loop()
+
+        def call_next_sync(req):
+            return asyncio.run_coroutine_threadsafe(call_next(req), loop).result()
+
+        return await loop.run_in_executor(None, hook, request, call_next_sync)
+    return handler
@@ -0,0 +1,288 @@
+import os
+import re
+import sys
+import hmac
+import time
+import random
+import pstats
+import cProfile
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger('EasyAPI.profiler')
+
+CPROFILE = 'cprofile'
+SAMPLE = 'sample'
+
+
+def _slug(key):
+    return re.sub(r'[^A-Za-z0-9]+', '_', key).strip('_') or 'root'
+
+
+def _collapse(frame, stop):
+    """
+    Render a stack as a collapsed-stack line, outermost frame first, up to
+    but excluding ``stop``.
+
+    Returns None when ``stop`` is not on the stack, e.g. while the profiled
+    coroutine is suspended and the loop runs other tasks.
+    """
+    names = []
+    while frame is not stop:
+        if frame is None:
+            return None
+        code = frame.f_code
+        names.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+        frame = frame.f_back
+    names.reverse()
+    return ';'.join(names)
+
+
+class _Sampler(threading.Thread):
+    """
+    Background thread sampling the stacks of the threads handling profiled requests.
+
+    Entries are kept per request rather than per thread, since concurrent
+    requests on an event loop share its thread.
+    """
+    def __init__(self, interval):
+        super().__init__(name='EasyAPI-profiler', daemon=True)
+        self.interval = interval
+        # id(counts) -> (thread ident, counts, stop frame)
+        self.active = {}
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.stopped = False
+
+    def add(self, ident, counts, stop):
+        with self.lock:
+            self.active[id(counts)] = (ident, counts, stop)
+        self.wake.set()
+
+    def remove(self, counts):
+        with self.lock:
+            self.active.pop(id(counts), None)
+
+    def run(self):
+        while not self.stopped:
+            if not self.active:
+                self.wake.wait()
+                self.wake.clear()
+                continue
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self.lock:
+                for ident, counts, stop in self.active.values():
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        stack = _collapse(frame, stop)
+                        if stack is not None:
+                            counts[stack] = counts.get(stack, 0) + 1
+
+    def stop(self):
+        self.stopped = True
+        self.wake.set()
+
+
+class Profiler:
+    def __init__(self, directory, rate=0.0, secret=None, header='X-Profile', mode=CPROFILE, interval=0.005):
+        """
+        Initialize the request profiler.
+
+        A request is profiled when a random draw falls under ``rate``, or when
+        it carries ``header`` with a token signed by ``secret`` (see ``sign``).
+        Results are aggregated per route and written to ``directory`` as
+        ``<route>.<pid>.pstats`` files for cProfile, readable with ``pstats`` or
+        snakeviz, or as ``<route>.<pid>.collapsed`` files for the stack sampler,
+        readable with flamegraph.pl or speedscope; each worker process writes
+        its own files. Requests that are not profiled only pay for the header
+        lookup and the random draw.
+
+        Args:
+            directory (str): Where profiles are written. Created if missing.
+            rate (float): Fraction of requests to profile, between 0 and 1.
+            secret (str|bytes): Key for signed profiling tokens, or None to
+                disable header-triggered profiling.
+            header (str): The request header carrying the token.
+            mode (str): ``'cprofile'`` for deterministic profiles, or ``'sample'``
+                for a low-overhead stack sampler.
+            interval (float): Seconds between stack samples in ``'sample'`` mode.
+        """
+        if mode not in (CPROFILE, SAMPLE):
+            raise ValueError(f"Unknown profiler mode '{mode}'")
+        self.directory = directory
+        self.rate = rate
+        self.secret = secret.encode() if isinstance(secret, str) else secret
+        self.environ_key = 'HTTP_' + header.upper().replace('-', '_')
+        self.mode = mode
+        self.interval = interval
+        self.profiled = {}
+        self._stats = {}
+        self._stacks = {}
+        self._lock = threading.Lock()
+        # Only one deterministic profiler can be active per interpreter
+        self._cprofile_lock = threading.Lock()
+        self._sampler = None
+        os.makedirs(directory, exist_ok=True)
+
+    def sign(self, expires_in=300):
+        """
+        Create a token that enables profiling for requests sending it in the header.
+
+        Args:
+            expires_in (int): Seconds the token stays valid.
+
+        Returns:
+            str: The token, ``<expiry>.<signature>``.
+        """
+        expires = str(int(time.time() + expires_in))
+        return f'{expires}.{self._signature(expires)}'
+
+    def _signature(self, expires):
+        return hmac.new(self.secret, expires.encode(), hashlib.sha256).hexdigest()
+
+    def verify(self, token):
+        """
+        Check a profiling token.
+
+        Args:
+            token (str): The header value.
+
+        Returns:
+            bool: Whether the token is correctly signed and not expired.
+        """
+        if not self.secret:
+            return False
+        expires, _, signature = token.partition('.')
+        if not expires.isdigit() or int(expires) < time.time():
+            return False
+        return hmac.compare_digest(signature, self._signature(expires))
+
+    def should_profile(self, request):
+        token = request.environ.get(self.environ_key)
+        if token is not None and self.verify(token):
+            return True
+        return self.rate > 0 and random.random() < self.rate
+
+    def _key(self, request):
+        route = request.route
+        return f'{request.method} {route.path}' if route is not None else f'{request.method} <unmatched>'
+
+    def wrap(self, pipeline):
+        """
+        Wrap a compiled pipeline so selected requests are profiled.
+
+        Args:
+            pipeline (function): The compiled request pipeline.
+
+        Returns:
+            function: The profiling pipeline.
+        """
+        def profiled(request):
+            if not self.should_profile(request):
+                return pipeline(request)
+            if self.mode == SAMPLE:
+                counts = self._start_sampling(sys._getframe())
+                try:
+                    return pipeline(request)
+                finally:
+                    self._finish_sampling(request, counts)
+            if not self._cprofile_lock.acquire(blocking=False):
+                return pipeline(request)
+            try:
+                profile = cProfile.Profile()
+                profile.enable()
+                try:
+                    return pipeline(request)
+                finally:
+                    profile.disable()
+                    self._record_stats(request, profile)
+            finally:
+                self._cprofile_lock.release()
+        return profiled
+
+    def wrap_async(self, pipeline):
+        """
+        Wrap a compiled async pipeline so selected requests are profiled.
+
+        cProfile profiles are taken on the event loop thread, so they also
+        include any other tasks that run while the profiled request awaits.
+        The stack sampler only counts samples taken while the request's own
+        task is running on the loop; plain handlers run on the thread pool are
+        not sampled.
+        """
+        async def profiled(request):
+            if not self.should_profile(request):
+                return await pipeline(request)
+            if self.mode == SAMPLE:
+                counts = self._start_sampling(sys._getframe())
+                try:
+                    return await pipeline(request)
+                finally:
+                    self._finish_sampling(request, counts)
+            if not self._cprofile_lock.acquire(blocking=False):
+                return await pipeline(request)
+            try:
+                profile = cProfile.Profile()
+                profile.enable()
+                try:
+                    return await pipeline(request)
+                finally:
+                    profile.disable()
+                    self._record_stats(request, profile)
+            finally:
+                self._cprofile_lock.release()
+        return profiled
+
+    def _start_sampling(self, stop):
+        if self._sampler is None:
+            with self._lock:
+                if self._sampler is None:
+                    self._sampler = _Sampler(self.interval)
+                    self._sampler.start()
+        counts = {}
+        self._sampler.add(threading.get_ident(), counts, stop)
+        return counts
+
+    def _finish_sampling(self, request, counts):
+        self._sampler.remove(counts)
+        key = self._key(request)
+        with self._lock:
+            self.profiled[key] = self.profiled.get(key, 0) + 1
+            stacks = self._stacks.setdefault(key, {})
+            for stack, count in counts.items():
+                stacks[stack] = stacks.get(stack, 0) + count
+            lines = [f'{stack} {count}\n' for stack, count in sorted(stacks.items()) if stack]
+            self._write(f'{_slug(key)}.{os.getpid()}.collapsed', ''.join(lines))
+
+    def _record_stats(self, request, profile):
+        key = self._key(request)
+        with self._lock:
+            self.profiled[key] = self.profiled.get(key, 0) + 1
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = pstats.Stats(profile)
+            else:
+                stats.add(profile)
+            try:
+                stats.dump_stats(os.path.join(self.directory, f'{_slug(key)}.{os.getpid()}.pstats'))
+            except OSError:
+                logger.warning('Could not write profile for %s', key, exc_info=True)
+
+    def _write(self, name, data):
+        path = os.path.join(self.directory, name)
+        try:
+            with open(path + '.tmp', 'w') as f:
+                f.write(data)
+            os.replace(path + '.tmp', path)
+        except OSError:
+            logger.warning('Could not write profile %s', path, exc_info=True)
+
+    def close(self):
+        """
+        Stop the stack sampler thread, if it was started.
+        """
+        if self._sampler is not None:
+            self._sampler.stop()
+            self._sampler = None
@@ -0,0 +1,370 @@
+import math
+import time
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+
+from EasyAPI.response import Response
+
+logger = logging.getLogger('EasyAPI.ratelimit')
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+_HEADER_NAMES = frozenset(('ratelimit-limit', 'ratelimit-remaining', 'ratelimit-reset', 'ratelimit-policy'))
+
+
+def client_ip(request):
+    return request.environ.get('REMOTE_ADDR') or None
+
+
+def api_key(request):
+    return request.headers.get('x-api-key')
+
+
+def current_user(request):
+    """
+    The user set by authentication middleware as ``request.state.user``.
+    """
+    user = getattr(request.state, 'user', None)
+    if user is None:
+        return None
+    return str(getattr(user, 'id', user))
+
+
+KEY_FUNCTIONS = {'ip': client_ip, 'api_key': api_key, 'user': current_user}
+
+
+class RateLimit:
+    def __init__(self, limit, period=60, key='ip', burst=None, scope=None, cost=1):
+        """
+        Initialize a rate limit policy.
+
+        Args:
+            limit (int): Requests allowed per ``period``.
+            period (float): The window in seconds.
+            key (str|function): What requests are counted by: ``'ip'``,
+                ``'api_key'`` (the X-API-Key header), ``'user'``
+                (``request.state.user``), or a function of the request. Requests
+                for which the key is None are not limited.
+            burst (int): Requests a client may make at once with the token
+                bucket. Defaults to ``limit``.
+            scope (str): Name of the quota. Routes sharing a scope share their
+                counters; by default each route has its own.
+            cost (int): Tokens taken by each request.
+        """
+        self.limit = int(limit)
+        self.period = float(period)
+        self.key = key
+        self.key_func = KEY_FUNCTIONS[key] if isinstance(key, str) else key
+        self.burst = int(burst) if burst is not None else self.limit
+        self.scope = scope
+        self.cost = cost
+        self.header = f'{self.limit};w={int(self.period)}'
+
+    @classmethod
+    def parse(cls, value, **options):
+        """
+        Build a policy from a string such as ``'100/minute'`` or ``'5/second'``.
+
+        Args:
+            value (str): The limit, a slash and a period name.
+            **options: Other ``RateLimit`` arguments.
+
+        Returns:
+            RateLimit: The policy.
+        """
+        limit, _, period = value.partition('/')
+        period = period.strip().rstrip('s') or 'second'
+        if period not in PERIODS:
+            raise ValueError(f'Unknown rate limit period: {value}')
+        return cls(int(limit), PERIODS[period], **options)
+
+    @classmethod
+    def coerce(cls, value):
+        """
+        Build a policy from a route's ``rate_limit`` option.
+
+        Args:
+            value (RateLimit|dict|str): A policy, keyword arguments for one, or a
+                string for ``parse``.
+
+        Returns:
+            RateLimit: The policy, or None if the route is not limited.
+        """
+        if value is None or value is False:
+            return None
+        if isinstance(value, cls):
+            return value
+        if isinstance(value, str):
+            return cls.parse(value)
+        if isinstance(value, dict):
+            value = dict(value)
+            rate = value.pop('rate', None)
+            if rate is not None:
+                return cls.parse(rate, **value)
+            return cls(**value)
+        raise TypeError(f'Invalid rate_limit option: {value!r}')
+
+
+class Decision:
+    __slots__ = ('allowed', 'limit', 'remaining', 'reset', 'retry_after')
+
+    def __init__(self, allowed, limit, remaining, reset, retry_after=0):
+        self.allowed = allowed
+        self.limit = limit
+        self.remaining = remaining
+        # Seconds until the quota is fully available again
+        self.reset = reset
+        self.retry_after = retry_after
+
+
+class TokenBucketLimiter:
+    def __init__(self, max_keys=100000):
+        """
+        Initialize an in-process token bucket limiter.
+
+        Each key has a bucket of ``burst`` tokens refilled at ``limit`` per
+        ``period``; a request takes ``cost`` tokens or is denied. Buckets are
+        kept in LRU order and the least recently used are forgotten beyond
+        ``max_keys``, which only ever lets a long idle client start full again.
+
+        Args:
+            max_keys (int): Maximum number of buckets kept.
+        """
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key, policy):
+        """
+        Take tokens for a request.
+
+        Args:
+            key (str): The bucket key.
+            policy (RateLimit): The policy for the bucket.
+
+        Returns:
+            Decision: Whether the request is allowed, and the quota left.
+        """
+        now = time.monotonic()
+        rate = policy.limit / policy.period
+        capacity = policy.burst
+        cost = policy.cost
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                tokens = capacity
+                if len(self._buckets) >= self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                tokens = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = [tokens, now]
+        reset = (capacity - tokens) / rate
+        if allowed:
+            return Decision(True, policy.limit, int(tokens), reset)
+        return Decision(False, policy.limit, 0, reset, (cost - tokens) / rate)
+
+    def reset(self, key=None):
+        """
+        Forget one bucket, or all of them.
+        """
+        with self._lock:
+            if key is None:
+                self._buckets.clear()
+            else:
+                self._buckets.pop(key, None)
+
+
+# Sliding window approximated from the current and previous fixed windows:
+# the previous count is weighted by how much of it still overlaps the window.
+# Redis' own clock is used so every application server agrees on the windows.
+SLIDING_WINDOW_SCRIPT = """
+local period = tonumber(ARGV[1])
+local limit = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local now = redis.call('TIME')
+local now_ms = tonumber(now[1]) * 1000 + math.floor(tonumber(now[2]) / 1000)
+local window = math.floor(now_ms / period)
+local elapsed = now_ms - window * period
+local current_key = KEYS[1] .. ':' .. window
+local current = tonumber(redis.call('GET', current_key) or '0')
+local previous = tonumber(redis.call('GET', KEYS[1] .. ':' .. (window - 1)) or '0')
+local used = previous * (period - elapsed) / period + current
+if used + cost > limit then
+    local retry = period - elapsed
+    if previous > 0 and current + cost <= limit then
+        retry = math.ceil((used + cost - limit) * period / previous)
+    end
+    return {0, 0, period - elapsed, retry}
+end
+redis.call('INCRBY', current_key, cost)
+redis.call('PEXPIRE', current_key, period * 2)
+return {1, math.floor(limit - used - cost), period - elapsed, 0}
+"""
+
+
+class RedisSlidingWindowLimiter:
+    def __init__(self, cache_service, prefix='easyapi:ratelimit:', fallback=None, retry_interval=5):
+        """
+        Initialize a limiter shared by every process through Redis.
+
+        Each decision is one round trip running an atomic Lua script on the
+        Redis client of a ``CacheService``; ``hit_async`` makes it on the
+        loop's default executor so the event loop keeps running. When Redis cannot be reached the
+        limiter falls back to ``fallback`` (by default an in-process token
+        bucket) and only tries Redis again after ``retry_interval`` seconds, so
+        an outage does not add a connection timeout to every request.
+
+        Args:
+            cache_service (CacheService): A cache service with the ``redis`` provider.
+            prefix (str): Prefix for the counter keys.
+            fallback (object): Limiter used while Redis is unavailable.
+            retry_interval (float): Seconds to wait before using Redis again after an error.
+        """
+        if cache_service.provider != 'redis':
+            raise ValueError('The sliding window limiter requires the redis cache provider')
+        self.cache_service = cache_service
+        self.prefix = prefix
+        self.fallback = fallback if fallback is not None else TokenBucketLimiter()
+        self.retry_interval = retry_interval
+        self._script = cache_service.client.register_script(SLIDING_WINDOW_SCRIPT)
+        self._down_until = 0
+
+    def hit(self, key, policy):
+        """
+        Count a request in the shared window.
+
+        Args:
+            key (str): The counter key.
+            policy (RateLimit): The policy for the counter.
+
+        Returns:
+            Decision: Whether the request is allowed, and the quota left.
+        """
+        if self._down_until and time.monotonic() < self._down_until:
+            return self.fallback.hit(key, policy)
+        period = max(int(policy.period * 1000), 1)
+        try:
+            allowed, remaining, reset, retry = self._script(
+                keys=['{' + self.prefix + key + '}'], args=[period, policy.limit, policy.cost]
+            )
+        except Exception:
+            logger.warning('Rate limiting locally, Redis is unavailable', exc_info=True)
+            self._down_until = time.monotonic() + self.retry_interval
+            return self.fallback.hit(key, policy)
+        self._down_until = 0
+        return Decision(bool(allowed), policy.limit, int(remaining), reset / 1000, retry / 1000)
+
+    async def hit_async(self, key, policy):
+        """
+        Count a request in the shared window without blocking the event loop.
+        """
+        if self._down_until and time.monotonic() < self._down_until:
+            return self.fallback.hit(key, policy)
+        return await asyncio.get_running_loop().run_in_executor(None, self.hit, key, policy)
+
+
+class RateLimiter:
+    def __init__(self, limiter=None, cache_service=None, default=None, headers=True):
+        """
+        Initialize the rate limiting middleware.
+
+        Routes opt in with a ``rate_limit`` option, e.g.
+        ``app.add_route('/charge', charge, rate_limit='10/minute')`` or
+        ``rate_limit={'rate': '1000/hour', 'key': 'api_key'}``. Requests over
+        the limit get a 429 response with a ``Retry-After`` header, and every
+        limited response carries the ``RateLimit-*`` headers. Decisions are
+        made in a ``before`` hook. Over ASGI, in-process limiters decide inline
+        on the event loop, while limiters with a ``hit_async`` method, like the
+        Redis one, are awaited so the round trip does not block the loop.
+
+        Args:
+            limiter (object): The limiter making decisions. Defaults to a
+                ``RedisSlidingWindowLimiter`` over ``cache_service`` when given,
+                and an in-process ``TokenBucketLimiter`` otherwise.
+            cache_service (CacheService): A Redis cache service to share limits
+                between processes and servers.
+            default (RateLimit|dict|str): Policy for routes without a
+                ``rate_limit`` option, or None to only limit routes that opt in.
+            headers (bool): Whether to add ``RateLimit-*`` headers to allowed responses.
+        """
+        if limiter is None:
+            limiter = RedisSlidingWindowLimiter(cache_service) if cache_service is not None else TokenBucketLimiter()
+        self.limiter = limiter
+        self.default = RateLimit.coerce(default)
+        self.headers = headers
+        self._policies = {}
+
+    def policy_for(self, route):
+        if route is None:
+            return self.default
+        # Route options are parsed once per route
+        try:
+            return self._policies[route]
+        except KeyError:
+            pass
+        if 'rate_limit' in route.options:
+            policy = RateLimit.coerce(route.options['rate_limit'])
+        else:
+            policy = self.default
+        self._policies[route] = policy
+        return policy
+
+    def before(self, request):
+        policy, key = self._policy_and_key(request)
+        if key is None:
+            return None
+        return self._apply(request, policy, self.limiter.hit(key, policy))
+
+    async def before_async(self, request):
+        policy, key = self._policy_and_key(request)
+        if key is None:
+            return None
+        hit_async = getattr(self.limiter, 'hit_async', None)
+        if hit_async is None:
+            decision = self.limiter.hit(key, policy)
+        else:
+            decision = await hit_async(key, policy)
+        return self._apply(request, policy, decision)
+
+    def _policy_and_key(self, request):
+        route = request.route
+        policy = self.policy_for(route)
+        if policy is None:
+            return None, None
+        key = policy.key_func(request)
+        if key is None:
+            return None, None
+        scope = policy.scope or (route.path if route is not None else '*')
+        return policy, f'{scope}:{key}'
+
+    def _apply(self, request, policy, decision):
+        if not decision.allowed:
+            headers = self._headers(policy, decision)
+            headers.append(('Retry-After', str(max(1, math.ceil(decision.retry_after)))))
+            headers.append(('Content-Type', 'text/plain'))
+            return Response('Too Many Requests', status='429 TOO MANY REQUESTS', headers=headers)
+        if self.headers:
+            request.state.rate_limit = (policy, decision)
+        return None
+
+    def after(self, request, response):
+        limited = getattr(request.state, 'rate_limit', None) if self.headers else None
+        if limited is not None and hasattr(response, 'set_header'):
+            # One pass over the headers instead of a set_header call per header
+            headers = [header for header in response.headers if header[0].lower() not in _HEADER_NAMES]
+            response.headers = headers + self._headers(*limited)
+        return response
+
+    def _headers(self, policy, decision):
+        return [
+            ('RateLimit-Limit', str(decision.limit)),
+            ('RateLimit-Remaining', str(decision.remaining)),
+            ('RateLimit-Reset', str(math.ceil(decision.reset))),
+            ('RateLimit-Policy', policy.header),
+        ]
@@ -1,33 +1,365 @@
-from urllib.parse import parse_qs
+import io
+import tempfile
+from types import SimpleNamespace
+from urllib.parse import parse_qs, parse_qsl
+from wsgiref.util import request_uri
+
+from EasyAPI.exceptions import BadRequest, RequestEntityTooLarge
+from EasyAPI.multipart import (
+    DEFAULT_CHUNK_SIZE, DEFAULT_SPOOL_THRESHOLD, MultipartParser, parse_options_header,
+)
+from EasyAPI.serializers import get_serializer
+
+# Marks a lazily computed attribute that has not been computed yet
+_UNSET = object()
+
+
+class Headers(dict):
+    """
+    Dictionary of request headers with case-insensitive lookups.
+
+    Keys are stored lower-cased with dashes, e.g. ``content-type``.
+    """
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        return super().__getitem__(key.lower())
+
+    def __contains__(self, key):
+        return super().__contains__(key.lower())
+
+    def get(self, key, default=None):
+        return super().get(key.lower(), default)
+
+
+class BodyStream:
+    """
+    Single-pass, file-like reader over the request body.
+
+    Reads never go past the declared body length, and ``max_size`` is enforced
+    as data arrives so bodies without a declared length are bounded too.
+    """
+    def __init__(self, input, length, max_size=None):
+        self._input = input
+        # None means "read until the server signals the end of the input"
+        self._remaining = length
+        self._max_size = max_size
+        self._read = 0
+
+    def read(self, size=-1):
+        if self._input is None or self._remaining == 0:
+            return b""
+        if size is None or size < 0:
+            if self._remaining is None:
+                # In chunks, so max_size is enforced before the body is all in memory
+                return b"".join(iter(lambda: self.read(DEFAULT_CHUNK_SIZE), b""))
+            size = self._remaining
+        elif self._remaining is not None:
+            size = min(size, self._remaining)
+        data = self._input.read(size)
+        if not data:
+            self._remaining = 0
+            return b""
+        self._read += len(data)
+        if self._remaining is not None:
+            self._remaining -= len(data)
+        if self._max_size is not None and self._read > self._max_size:
+            raise RequestEntityTooLarge()
+        return data
+
+    def __iter__(self):
+        while True:
+            chunk = self.read(DEFAULT_CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
 
 
 class Request:
-    def __init__(self, environ):
+    __slots__ = (
+        'environ', 'path', 'method', 'query_string', 'route', 'path_params', 'mount',
+        'max_body_size', 'spool_threshold',
+        '_query_params', '_headers', '_raw_body', '_body', '_json', '_form_data', '_files',
+        '_body_file', '_stream_consumed', '_state',
+    )
+
+    def __init__(self, environ, max_body_size=None, spool_threshold=DEFAULT_SPOOL_THRESHOLD):
         """
         Initialize the Request object with WSGI environment data.
 
+        Only the request line is read here. Query parameters, headers and the
+        body are parsed the first time they are accessed and cached afterwards,
+        so handlers only pay for what they use.
+
         Args:
             environ (dict): The WSGI environment dictionary.
+            max_body_size (int): Maximum accepted body size in bytes, or None for no limit.
+            spool_threshold (int): Body size above which buffered bodies and
+                uploaded files are written to a temporary file.
         """
         self.environ = environ
         self.path = environ["PATH_INFO"]
         self.method = environ["REQUEST_METHOD"]
-        self.query_string = environ["QUERY_STRING"]
-        self.query_params = parse_qs(self.query_string)
-        self.headers = self._get_headers()
-        self.body = self._get_body()
+        self.query_string = environ.get("QUERY_STRING", "")
+        self.route = None
+        self.path_params = {}
+        self.mount = None
+        self.max_body_size = max_body_size
+        self.spool_threshold = spool_threshold
+        self._query_params = _UNSET
+        self._headers = _UNSET
+        self._raw_body = _UNSET
+        self._body = _UNSET
+        self._json = _UNSET
+        self._form_data = _UNSET
+        self._files = _UNSET
+        self._body_file = None
+        self._stream_consumed = False
+        self._state = None
+
+    @property
+    def query_params(self):
+        """
+        dict: The query string parsed into lists of values.
+        """
+        if self._query_params is _UNSET:
+            self._query_params = parse_qs(self.query_string)
+        return self._query_params
+
+    @property
+    def headers(self):
+        """
+        Headers: The HTTP headers of the request.
+        """
+        if self._headers is _UNSET:
+            self._headers = self._get_headers()
+        return self._headers
+
+    @property
+    def content_type(self):
+        """
+        str: The Content-Type of the request body, or an empty string.
+        """
+        return self.environ.get("CONTENT_TYPE", "")
+
+    @property
+    def content_length(self):
+        """
+        int: The declared length of the request body, or 0.
+        """
+        try:
+            return int(self.environ.get("CONTENT_LENGTH") or 0)
+        except (ValueError, TypeError):
+            return 0
+
+    @property
+    def content_too_large(self):
+        """
+        bool: Whether the declared body length exceeds ``max_body_size``.
+        """
+        return self.max_body_size is not None and self.content_length > self.max_body_size
+
+    @property
+    def raw_body(self):
+        """
+        bytes: The undecoded request body.
+        """
+        if self._raw_body is _UNSET:
+            self._raw_body = self._get_body()
+        return self._raw_body
+
+    def stream(self):
+        """
+        Get a file-like object for reading the request body.
+
+        The body is read straight from the server as the handler consumes it,
+        without being buffered. If the body has already been buffered (through
+        ``raw_body``, ``body_file`` or form parsing) the buffered copy is returned.
+
+        Returns:
+            file: A readable file-like object.
+
+        Raises:
+            RequestEntityTooLarge: If the body exceeds ``max_body_size``.
+        """
+        if self._raw_body is not _UNSET:
+            return io.BytesIO(self._raw_body)
+        if self._body_file is not None:
+            self._body_file.seek(0)
+            return self._body_file
+        if self._stream_consumed:
+            raise RuntimeError("The request body stream has already been consumed")
+        if self.content_too_large:
+            raise RequestEntityTooLarge()
+        self._stream_consumed = True
+
+        environ = self.environ
+        if "CONTENT_LENGTH" in environ and environ["CONTENT_LENGTH"] not in ("", None):
+            length = self.content_length
+        elif environ.get("wsgi.input_terminated"):
+            length = None
+        else:
+            length = 0
+        return BodyStream(environ.get("wsgi.input"), length, self.max_body_size)
+
+    def iter_body(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Iterate over the request body in chunks.
+
+        Args:
+            chunk_size (int): Maximum size of each chunk.
+
+        Yields:
+            bytes: The next chunk of the body.
+        """
+        stream = self.stream()
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    @property
+    def body_file(self):
+        """
+        file: The whole body in a temporary file, kept in memory below
+        ``spool_threshold`` and written to disk above it.
+        """
+        if self._body_file is None:
+            spool = tempfile.SpooledTemporaryFile(max_size=self.spool_threshold)
+            if self._raw_body is not _UNSET:
+                spool.write(self._raw_body)
+            else:
+                for chunk in self.iter_body():
+                    spool.write(chunk)
+            self._body_file = spool
+        self._body_file.seek(0)
+        return self._body_file
+
+    @property
+    def body(self):
+        """
+        str: The request body decoded as UTF-8.
+        """
+        if self._body is _UNSET:
+            self._body = self.raw_body.decode("utf-8")
+        return self._body
+
+    @property
+    def json(self):
+        """
+        object: The request body parsed as JSON, or None if the body is empty.
+        The raw bytes are parsed directly with the configured serializer.
+        """
+        if self._json is _UNSET:
+            raw = self.raw_body
+            try:
+                self._json = get_serializer().loads(raw) if raw else None
+            except ValueError:
+                raise BadRequest("Invalid JSON body") from None
+        return self._json
+
+    def json_as(self, type):
+        """
+        Decode the JSON body into a typed object.
+
+        With msgspec installed, ``msgspec.Struct`` types and dataclasses are
+        validated while parsing; otherwise the body is parsed and converted
+        to dataclasses or pydantic-style models.
+
+        Args:
+            type (type): The target type.
+
+        Returns:
+            object: The decoded object.
+
+        Raises:
+            BadRequest: If the body is not valid JSON or does not match the type.
+        """
+        try:
+            return get_serializer().decode(self.raw_body, type)
+        except ValueError as e:
+            raise BadRequest(f"Invalid JSON body: {e}") from None
+
+    @property
+    def form_data(self):
+        """
+        dict: Form fields from URL-encoded or multipart bodies. The first value
+        wins for repeated fields. Uploaded files are available in ``files``.
+        """
+        if self._form_data is _UNSET:
+            self._parse_form()
+        return self._form_data
+
+    @property
+    def files(self):
+        """
+        dict: Files uploaded in a multipart body, as ``UploadFile`` objects keyed by field name.
+        """
+        if self._files is _UNSET:
+            self._parse_form()
+        return self._files
+
+    def iter_multipart(self):
+        """
+        Stream the parts of a ``multipart/form-data`` body.
+
+        Parts are yielded as soon as their headers arrive and their data is
+        read from the request stream on demand, so large files can be handled
+        without materializing them. Each part must be consumed before the next
+        one is requested; unread data is skipped.
+
+        Returns:
+            MultipartParser: An iterable of ``MultipartPart`` objects.
+        """
+        mimetype, params = parse_options_header(self.content_type)
+        return MultipartParser(self.stream(), params.get("boundary", ""))
+
+    def _parse_form(self):
+        form = {}
+        files = {}
+        mimetype, _ = parse_options_header(self.content_type)
+        if mimetype == "application/x-www-form-urlencoded":
+            for key, value in parse_qsl(self.body, keep_blank_values=True):
+                form.setdefault(key, value)
+        elif mimetype == "multipart/form-data":
+            for part in self.iter_multipart():
+                if part.is_file:
+                    files.setdefault(part.name, part.spool(self.spool_threshold))
+                else:
+                    form.setdefault(part.name, part.read().decode("utf-8", "replace"))
+        self._form_data = form
+        self._files = files
+
+    @property
+    def url(self):
+        """
+        str: The full URL of the request, including the query string.
+        """
+        return request_uri(self.environ)
+
+    @property
+    def state(self):
+        """
+        SimpleNamespace: Free-form per-request storage for middleware and handlers.
+        """
+        if self._state is None:
+            self._state = SimpleNamespace()
+        return self._state
 
     def _get_headers(self):
         """
         Extract headers from the WSGI environment.
 
         Returns:
-            dict: A dictionary of HTTP headers.
+            Headers: A dictionary of HTTP headers.
         """
-        headers = {}
+        headers = Headers()
         for key, value in self.environ.items():
             if key.startswith("HTTP_"):
                 headers[key[5:].replace("_", "-").lower()] = value
+            elif key in ("CONTENT_TYPE", "CONTENT_LENGTH") and value:
+                headers[key.replace("_", "-").lower()] = value
         return headers
 
     def _get_body(self):
@@ -35,12 +367,8 @@ class Request:
         Extract the body from the WSGI environment.
 
         Returns:
-            str: The body of the request as a string.
+            bytes: The body of the request.
         """
-        try:
-            length = int(self.environ.get("CONTENT_LENGTH", 0))
-        except (ValueError, TypeError):
-            length = 0
-        if length > 0:
-            return self.environ["wsgi.input"].read(length).decode("utf-8")
-        return ""
+        if self._body_file is not None:
+            return self.body_file.read()
+        return self.stream().read()
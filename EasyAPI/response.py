@@ -1,17 +1,72 @@
+import os
+import asyncio
+import mimetypes
+
+from EasyAPI.serializers import get_serializer
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
 class Response:
-    def __init__(self, content, status='200 OK', headers=None):
+    # Whether the body is produced incrementally rather than held in memory
+    is_streaming = False
+
+    def __init__(self, content='', status='200 OK', headers=None):
         """
         Initialize the Response object.
 
         Args:
-            content (str): The response body.
+            content (str|bytes|bytearray|memoryview): The response body. Strings are
+                encoded as UTF-8; bytes-like objects are sent as-is without copying.
             status (str): The HTTP status code.
             headers (list): A list of tuples representing the headers.
         """
-        self.content = content.encode('utf-8')
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        elif isinstance(content, memoryview) and content.format != 'B':
+            content = content.cast('B')
+        self.content = content
         self.status = status
         self.headers = headers if headers else [('Content-Type', 'text/html')]
 
+    def get_header(self, name, default=None):
+        """
+        Get the value of a response header.
+
+        Args:
+            name (str): The header name, matched case-insensitively.
+            default (str): The value returned if the header is not set.
+
+        Returns:
+            str: The header value.
+        """
+        name = name.lower()
+        for key, value in self.headers:
+            if key.lower() == name:
+                return value
+        return default
+
+    def set_header(self, name, value):
+        """
+        Set a response header, replacing any existing values.
+
+        Args:
+            name (str): The header name.
+            value (str): The header value.
+        """
+        self.remove_header(name)
+        self.headers.append((name, value))
+
+    def remove_header(self, name):
+        """
+        Remove all values of a response header.
+
+        Args:
+            name (str): The header name, matched case-insensitively.
+        """
+        lowered = name.lower()
+        self.headers = [(key, value) for key, value in self.headers if key.lower() != lowered]
+
     def __call__(self, environ, start_response):
         """
         The callable that starts the HTTP response.
@@ -23,5 +78,209 @@ class Response:
         Returns:
             list: The response body as a list of bytes.
         """
-        start_response(self.status, self.headers)
+        headers = self.headers
+        if self.get_header('Content-Length') is None and not self.status.startswith(('1', '204', '304')):
+            headers = headers + [('Content-Length', str(len(self.content)))]
+        start_response(self.status, headers)
         return [self.content]
+
+
+class JSONResponse(Response):
+    def __init__(self, content, status='200 OK', headers=None, serializer=None):
+        """
+        Initialize a response whose body is ``content`` encoded as JSON.
+
+        The body is serialized straight to UTF-8 bytes by the configured
+        serializer (orjson or msgspec when installed), skipping the
+        intermediate ``str`` of ``json.dumps``.
+
+        Args:
+            content (object): The value to serialize.
+            status (str): The HTTP status code.
+            headers (list): A list of tuples representing the headers.
+            serializer (object): The serializer to use instead of the configured one.
+        """
+        self.content = (serializer or get_serializer()).dumps(content)
+        self.status = status
+        if headers:
+            self.headers = headers
+            if self.get_header('Content-Type') is None:
+                self.headers.append(('Content-Type', 'application/json'))
+        else:
+            self.headers = [('Content-Type', 'application/json')]
+
+
+class _ClosingIterator:
+    """
+    Iterator that encodes text chunks and closes the wrapped iterable.
+
+    Generators only run their ``finally`` blocks once started, so closing is
+    forwarded explicitly to release resources even for unstarted bodies.
+    """
+    def __init__(self, iterable):
+        self._iterable = iterable
+        self._iterator = iter(iterable)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        chunk = next(self._iterator)
+        if isinstance(chunk, str):
+            return chunk.encode('utf-8')
+        return chunk
+
+    def close(self):
+        close = getattr(self._iterable, 'close', None)
+        if close is not None:
+            close()
+
+
+def _iterate_async(iterable):
+    """
+    Drive an async iterable from synchronous code on a private event loop.
+    """
+    loop = asyncio.new_event_loop()
+    iterator = iterable.__aiter__()
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(iterator.__anext__())
+            except StopAsyncIteration:
+                return
+    finally:
+        aclose = getattr(iterator, 'aclose', None)
+        if aclose is not None:
+            loop.run_until_complete(aclose())
+        loop.close()
+
+
+class StreamingResponse(Response):
+    is_streaming = True
+
+    def __init__(self, content, status='200 OK', headers=None, content_type='text/plain'):
+        """
+        Initialize a response whose body is produced by an iterable.
+
+        The body is sent chunk by chunk as the iterable yields, so memory use
+        does not depend on the size of the response.
+
+        Args:
+            content (iterable): An iterator, generator or async iterator yielding
+                str or bytes chunks.
+            status (str): The HTTP status code.
+            headers (list): A list of tuples representing the headers.
+            content_type (str): The Content-Type used when ``headers`` is not given.
+        """
+        self.content = content
+        self.status = status
+        self.headers = headers if headers else [('Content-Type', content_type)]
+
+    @property
+    def is_async(self):
+        return hasattr(self.content, '__aiter__')
+
+    def __call__(self, environ, start_response):
+        start_response(self.status, self.headers)
+        content = self.content
+        if self.is_async:
+            content = _iterate_async(content)
+        return _ClosingIterator(content)
+
+
+class FileResponse(Response):
+    is_streaming = True
+
+    def __init__(self, file, status='200 OK', headers=None, content_type=None,
+                 offset=0, length=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Initialize a response that sends a file.
+
+        When the server provides ``wsgi.file_wrapper`` the file is handed to it,
+        which lets servers such as the built-in one use ``os.sendfile`` instead
+        of copying the file through Python.
+
+        Args:
+            file (str|file): A path or a binary file object opened for reading.
+            status (str): The HTTP status code.
+            headers (list): A list of tuples representing the headers.
+            content_type (str): The Content-Type. Guessed from the path if omitted.
+            offset (int): Position in the file where the body starts.
+            length (int): Number of bytes to send; the rest of the file if omitted.
+            chunk_size (int): Size of the chunks read when no file wrapper is used.
+        """
+        self.file = file
+        self.status = status
+        self.offset = offset
+        self.chunk_size = chunk_size
+        self.path = file if isinstance(file, (str, os.PathLike)) else getattr(file, 'name', None)
+        if content_type is None:
+            content_type = mimetypes.guess_type(str(self.path or ''))[0] or 'application/octet-stream'
+        self.headers = headers if headers else [('Content-Type', content_type)]
+        if length is None:
+            length = self._file_size() - offset
+        self.length = max(length, 0)
+
+    def _file_size(self):
+        if isinstance(self.file, (str, os.PathLike)):
+            return os.stat(self.file).st_size
+        return os.fstat(self.file.fileno()).st_size
+
+    def _open(self):
+        if isinstance(self.file, (str, os.PathLike)):
+            return open(self.file, 'rb')
+        return self.file
+
+    def __call__(self, environ, start_response):
+        headers = self.headers
+        if self.get_header('Content-Length') is None:
+            headers = headers + [('Content-Length', str(self.length))]
+        start_response(self.status, headers)
+
+        f = self._open()
+        if self.offset:
+            f.seek(self.offset)
+        file_wrapper = environ.get('wsgi.file_wrapper')
+        # Generic file wrappers send up to EOF, so only use them for tails of the file
+        if file_wrapper is not None and self.offset + self.length >= self._file_size():
+            return file_wrapper(f, self.chunk_size)
+        return _FileIterator(f, self.length, self.chunk_size)
+
+
+class _FileIterator:
+    """
+    Iterator reading a bounded slice of a file, closing it when done.
+    """
+    def __init__(self, file, length, chunk_size):
+        self.file = file
+        self._remaining = length
+        self._chunk_size = chunk_size
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._remaining <= 0:
+            raise StopIteration
+        chunk = self.file.read(min(self._chunk_size, self._remaining))
+        if not chunk:
+            raise StopIteration
+        self._remaining -= len(chunk)
+        return chunk
+
+    def close(self):
+        self.file.close()
+
+
+def redirect(location, status='302 FOUND'):
+    """
+    Create a redirect response.
+
+    Args:
+        location (str): The URL to redirect to.
+        status (str): The HTTP status code.
+
+    Returns:
+        Response: The redirect response.
+    """
+    return Response('', status=status, headers=[('Location', location), ('Content-Type', 'text/html')])
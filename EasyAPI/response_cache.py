@@ -0,0 +1,365 @@
+import time
+import pickle
+import logging
+import threading
+from urllib.parse import parse_qsl, urlencode
+
+from EasyAPI.response import Response
+from EasyAPI.utils.lru import LRUCache
+
+logger = logging.getLogger('EasyAPI.response_cache')
+
+
+class CachePolicy:
+    def __init__(self, ttl=60, vary=(), stale_while_revalidate=0, methods=('GET', 'HEAD'),
+                 statuses=('200',)):
+        """
+        Initialize a per-route response cache policy.
+
+        Args:
+            ttl (int): Seconds a cached response is fresh. A ``max-age`` or
+                ``s-maxage`` in the response's Cache-Control takes precedence.
+            vary (list): Request header names that are part of the cache key.
+            stale_while_revalidate (int): Seconds after expiry during which the
+                stale response is served while one request refreshes it.
+            methods (list): HTTP methods that are cached.
+            statuses (list): Status code prefixes that are cached.
+        """
+        self.ttl = ttl
+        self.vary = tuple(name.lower() for name in vary)
+        self.stale_while_revalidate = stale_while_revalidate
+        self.methods = tuple(methods)
+        self.statuses = tuple(statuses)
+
+    @classmethod
+    def coerce(cls, value):
+        """
+        Build a policy from a route's ``cache`` option.
+
+        Args:
+            value (CachePolicy|dict|int): A policy, keyword arguments for one, or a TTL.
+
+        Returns:
+            CachePolicy: The policy, or None if caching is disabled.
+        """
+        if value is None or value is False:
+            return None
+        if isinstance(value, cls):
+            return value
+        if isinstance(value, dict):
+            return cls(**value)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return cls(ttl=value)
+        return cls()
+
+
+class CachedResponse:
+    __slots__ = ('status', 'headers', 'body', 'created', 'expires', 'stale_until', 'vary')
+
+    def __init__(self, status, headers, body, created, expires, stale_until, vary=()):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.created = created
+        self.expires = expires
+        self.stale_until = stale_until
+        # Set on the entry stored under the base key of a response with a Vary
+        # header: the request headers selecting the variant, which is stored
+        # under its own key
+        self.vary = vary
+
+    def __getstate__(self):
+        return (self.status, self.headers, self.body, self.created, self.expires, self.stale_until, self.vary)
+
+    def __setstate__(self, state):
+        (self.status, self.headers, self.body, self.created, self.expires, self.stale_until) = state[:6]
+        self.vary = state[6] if len(state) > 6 else ()
+
+
+class MemoryBackend:
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 * 1024):
+        """
+        Initialize an in-process LRU backend.
+
+        Args:
+            max_entries (int): Maximum number of cached responses.
+            max_bytes (int): Maximum total size of cached bodies.
+        """
+        self.cache = LRUCache(max_entries, max_bytes, sizeof=lambda entry: len(entry.body))
+
+    def get(self, key):
+        entry = self.cache.get(key)
+        if entry is not None and entry.stale_until <= time.time():
+            self.cache.pop(key)
+            return None
+        return entry
+
+    def set(self, key, entry, ttl):
+        self.cache.set(key, entry)
+
+    def lock(self, key, timeout):
+        # Single-flight within the process is handled by the middleware itself
+        return True
+
+    def unlock(self, key):
+        pass
+
+
+class CacheServiceBackend:
+    def __init__(self, cache_service, prefix='easyapi:response:'):
+        """
+        Initialize a backend storing responses through a ``CacheService``.
+
+        Recomputation is also coordinated across processes with a short-lived
+        lock key, taken with ``SET NX`` on Redis or ``add`` on memcached.
+
+        Args:
+            cache_service (CacheService): The cache service to store responses in.
+            prefix (str): Prefix for the keys written to the cache.
+        """
+        self.cache_service = cache_service
+        self.prefix = prefix
+
+    def get(self, key):
+        data = self.cache_service.get(self.prefix + key)
+        if not data:
+            return None
+        try:
+            return pickle.loads(data)
+        except Exception:
+            logger.warning('Discarding unreadable cached response for %s', key)
+            return None
+
+    def set(self, key, entry, ttl):
+        self.cache_service.set(self.prefix + key, pickle.dumps(entry), expiration=max(int(ttl), 1))
+
+    def lock(self, key, timeout):
+        client = self.cache_service.client
+        lock_key = self.prefix + 'lock:' + key
+        timeout = max(int(timeout), 1)
+        try:
+            if self.cache_service.provider == 'redis':
+                return bool(client.set(lock_key, b'1', nx=True, ex=timeout))
+            return bool(client.add(lock_key, b'1', time=timeout))
+        except Exception:
+            logger.warning('Could not take response cache lock for %s', key, exc_info=True)
+            return True
+
+    def unlock(self, key):
+        try:
+            self.cache_service.client.delete(self.prefix + 'lock:' + key)
+        except Exception:
+            logger.warning('Could not release response cache lock for %s', key, exc_info=True)
+
+
+def _cache_control(header):
+    directives = {}
+    for item in (header or '').split(','):
+        name, _, value = item.strip().partition('=')
+        if name:
+            directives[name.lower()] = value.strip('"')
+    return directives
+
+
+class ResponseCache:
+    def __init__(self, backend=None, cache_service=None, lock_timeout=10, default_policy=None):
+        """
+        Initialize the response cache middleware.
+
+        Routes opt in with a ``cache`` option, e.g.
+        ``app.add_route('/report', report, cache={'ttl': 300, 'vary': ['Accept-Language']})``.
+        Responses are keyed on method, path, normalized query string and the
+        policy's ``vary`` headers. When an entry expires only one request per
+        key recomputes it: concurrent requests either get the stale response
+        (within ``stale_while_revalidate``) or wait for the recomputation.
+
+        Args:
+            backend (object): Storage backend. Defaults to an in-process ``MemoryBackend``.
+            cache_service (CacheService): Use a ``CacheServiceBackend`` over this service.
+            lock_timeout (float): Seconds a request waits for another one to recompute
+                an entry before computing it itself.
+            default_policy (CachePolicy): Policy for routes without a ``cache`` option,
+                or None to only cache routes that opt in.
+        """
+        if backend is None:
+            backend = CacheServiceBackend(cache_service) if cache_service is not None else MemoryBackend()
+        self.backend = backend
+        self.lock_timeout = lock_timeout
+        self.default_policy = default_policy
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def policy_for(self, request):
+        route = request.route
+        if route is None:
+            return None
+        if 'cache' in route.options:
+            return CachePolicy.coerce(route.options['cache'])
+        return self.default_policy
+
+    def cache_key(self, request, policy):
+        """
+        Build the cache key for a request.
+
+        Args:
+            request (Request): The request object.
+            policy (CachePolicy): The route's policy.
+
+        Returns:
+            str: The cache key.
+        """
+        method = 'GET' if request.method == 'HEAD' else request.method
+        query = urlencode(sorted(parse_qsl(request.query_string, keep_blank_values=True)))
+        parts = [method, request.path, query]
+        for name in policy.vary:
+            parts.append(f'{name}={request.headers.get(name, "")}')
+        return '|'.join(parts)
+
+    def around(self, request, call_next):
+        policy = self.policy_for(request)
+        if policy is None or request.method not in policy.methods:
+            return call_next(request)
+
+        request_directives = _cache_control(request.headers.get('cache-control'))
+        if 'no-store' in request_directives:
+            return call_next(request)
+
+        key = self.cache_key(request, policy)
+        if 'no-cache' not in request_directives:
+            entry = self._lookup(key, request)
+            now = time.time()
+            if entry is not None and now < entry.expires:
+                return self._respond(entry, 'HIT', now)
+            if entry is not None and now < entry.stale_until:
+                if self._claim(key):
+                    threading.Thread(
+                        target=self._refresh, args=(key, request, call_next, policy), daemon=True
+                    ).start()
+                return self._respond(entry, 'STALE', now)
+
+        if request.method == 'HEAD':
+            # HEAD responses may lack a body, so they are served from the cache but never stored
+            return call_next(request)
+        return self._compute_once(key, request, call_next, policy)
+
+    def _lookup(self, key, request):
+        entry = self.backend.get(key)
+        if entry is not None and entry.vary:
+            entry = self.backend.get(self._variant_key(key, entry.vary, request))
+        return entry
+
+    def _variant_key(self, key, vary, request):
+        return '|'.join([key] + [f'{name}={request.headers.get(name, "")}' for name in vary])
+
+    def _claim(self, key):
+        """
+        Become the one request recomputing ``key`` in this process and, when the
+        backend supports it, across processes.
+
+        Returns:
+            bool: True if the caller must recompute the entry.
+        """
+        with self._lock:
+            if key in self._inflight:
+                return False
+            self._inflight[key] = threading.Event()
+        if not self.backend.lock(key, self.lock_timeout):
+            self._release(key, unlock=False)
+            return False
+        return True
+
+    def _release(self, key, unlock=True):
+        if unlock:
+            self.backend.unlock(key)
+        with self._lock:
+            event = self._inflight.pop(key, None)
+        if event is not None:
+            event.set()
+
+    def _compute_once(self, key, request, call_next, policy):
+        if self._claim(key):
+            try:
+                return self._compute(key, request, call_next, policy, 'MISS')
+            finally:
+                self._release(key)
+
+        # Someone else is recomputing: wait for their result
+        with self._lock:
+            event = self._inflight.get(key)
+        if event is not None:
+            event.wait(self.lock_timeout)
+            entry = self._lookup(key, request)
+        else:
+            # The recomputation runs in another process; poll the shared backend
+            deadline = time.monotonic() + self.lock_timeout
+            entry = self._lookup(key, request)
+            while (entry is None or entry.expires <= time.time()) and time.monotonic() < deadline:
+                time.sleep(0.05)
+                entry = self._lookup(key, request)
+        now = time.time()
+        if entry is not None and now < entry.stale_until:
+            return self._respond(entry, 'HIT' if now < entry.expires else 'STALE', now)
+        return self._compute(key, request, call_next, policy, 'MISS')
+
+    def _refresh(self, key, request, call_next, policy):
+        try:
+            self._compute(key, request, call_next, policy, 'MISS')
+        except Exception:
+            logger.exception('Background refresh of %s failed', key)
+        finally:
+            self._release(key)
+
+    def _compute(self, key, request, call_next, policy, state):
+        response = call_next(request)
+        entry = self._store(key, request, response, policy)
+        if entry is not None:
+            response.set_header('X-Cache', state)
+        return response
+
+    def _store(self, key, request, response, policy):
+        if not isinstance(response, Response) or getattr(response, 'is_streaming', False):
+            return None
+        if not response.status.startswith(policy.statuses):
+            return None
+        directives = _cache_control(response.get_header('Cache-Control'))
+        if 'no-store' in directives or 'private' in directives:
+            return None
+        ttl = policy.ttl
+        for name in ('s-maxage', 'max-age'):
+            if name in directives:
+                try:
+                    ttl = int(directives[name])
+                except ValueError:
+                    pass
+                break
+        if ttl <= 0:
+            return None
+        # Headers the response varies on beyond the policy's, e.g. the
+        # Accept-Encoding added by CompressionMiddleware
+        vary = set()
+        for name, value in response.headers:
+            if name.lower() == 'vary':
+                vary.update(item.strip().lower() for item in value.split(',') if item.strip())
+        if '*' in vary:
+            return None
+        vary = tuple(sorted(vary.difference(policy.vary)))
+
+        now = time.time()
+        lifetime = ttl + policy.stale_while_revalidate
+        headers = [(name, value) for name, value in response.headers if name.lower() != 'set-cookie']
+        entry = CachedResponse(
+            response.status, headers, bytes(response.content),
+            now, now + ttl, now + lifetime,
+        )
+        if vary:
+            marker = CachedResponse(None, [], b'', now, now + ttl, now + lifetime, vary)
+            self.backend.set(key, marker, lifetime)
+            key = self._variant_key(key, vary, request)
+        self.backend.set(key, entry, lifetime)
+        return entry
+
+    def _respond(self, entry, state, now):
+        headers = list(entry.headers)
+        headers.append(('Age', str(int(now - entry.created))))
+        headers.append(('X-Cache', state))
+        return Response(entry.body, status=entry.status, headers=headers)
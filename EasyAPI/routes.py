@@ -85,18 +85,19 @@ def get_cached_data(request, cache_service):
     """
     Retrieve data from cache or generate and store it.
     """
-    data = cache_service.get("my_data")
+    cache = cache_service.namespace("pages")
+    data = cache.get("my_data")
     if not data:
         data = "This is some cached data"
-        cache_service.set("my_data", data, expiration=600)  # Cache for 10 minutes
+        cache.set("my_data", data, expiration=600)  # Cache for 10 minutes
     return Response(data)
 
 
 def post_clear_cache(request, cache_service):
     """
-    Clear the cache.
+    Clear the cached pages, leaving the rest of Redis (such as the task queue) alone.
     """
-    cache_service.flush()
+    cache_service.namespace("pages").invalidate()
     return Response("Cache cleared")
 
 
@@ -134,6 +135,6 @@ def get_static_file(request, app):
     """
     Serve static files from the designated static folder.
     """
-    file_path = request.path.lstrip("/")
+    file_path = request.path_params["path"]
     static_response = app.serve_static(request, file_path)
     return static_response
@@ -0,0 +1,260 @@
+import inspect
+import re
+
+from EasyAPI.container import injection_plan
+
+
+class Converter:
+    """
+    Base class for path parameter converters.
+
+    A converter validates a single path segment and turns it into the value
+    that is exposed on ``Request.path_params``.
+    """
+    # Converters that consume the remainder of the path instead of one segment
+    greedy = False
+    # Lower values are tried first when several parameters share a trie node
+    priority = 50
+
+    def to_python(self, value):
+        """
+        Convert a raw segment into a Python value.
+
+        Args:
+            value (str): The raw path segment.
+
+        Returns:
+            object: The converted value.
+
+        Raises:
+            ValueError: If the segment does not match this converter.
+        """
+        if not value:
+            raise ValueError('Empty path segment')
+        return value
+
+
+class StringConverter(Converter):
+    priority = 50
+
+
+class IntegerConverter(Converter):
+    priority = 10
+
+    def to_python(self, value):
+        if not value.isdigit():
+            raise ValueError(f'{value!r} is not an integer')
+        return int(value)
+
+
+class PathConverter(Converter):
+    greedy = True
+    priority = 90
+
+
+CONVERTERS = {
+    'str': StringConverter,
+    'int': IntegerConverter,
+    'path': PathConverter,
+}
+
+_PARAM_RE = re.compile(r'^<(?:(?P<converter>[a-zA-Z_][a-zA-Z0-9_]*):)?(?P<name>[a-zA-Z_][a-zA-Z0-9_]*)>$')
+
+
+class Route:
+    def __init__(self, path, handler, methods, options=None):
+        """
+        Initialize a Route.
+
+        Args:
+            path (str): The URL rule, e.g. ``/users/<int:id>``.
+            handler (function): The function that handles requests to this path.
+            methods (list): The list of HTTP methods this route responds to.
+            options (dict): Per-route settings read by middleware, e.g. ``cache``.
+        """
+        self.path = path
+        self.handler = handler
+        self.methods = list(methods)
+        self.options = options or {}
+        self.is_async = inspect.iscoroutinefunction(handler)
+        # Services the handler takes after the request, and their resolved
+        # instances once the application is finalized
+        self.injections = injection_plan(handler)
+        self.args = ()
+
+    def __repr__(self):
+        return f'<Route {self.path} [{", ".join(self.methods)}]>'
+
+
+class _Node:
+    __slots__ = ('static', 'params', 'greedy', 'routes')
+
+    def __init__(self):
+        self.static = {}
+        # List of (name, converter, node) tried in converter priority order
+        self.params = []
+        # (name, converter, node) for a converter consuming the rest of the path
+        self.greedy = None
+        # Mapping of HTTP method to Route for rules ending at this node
+        self.routes = {}
+
+
+def split_path(path):
+    """
+    Split a URL path into its segments.
+
+    Args:
+        path (str): The URL path.
+
+    Returns:
+        list: The path segments, without the leading empty segment.
+    """
+    return path.split('/')[1:] if path.startswith('/') else path.split('/')
+
+
+class Router:
+    def __init__(self, converters=None):
+        """
+        Initialize the Router.
+
+        Routes are collected with ``add`` and compiled into a segment trie the
+        first time ``match`` is called (or explicitly through ``compile``).
+        Matching walks one trie level per path segment, so lookup cost depends
+        on the depth of the path rather than on the number of routes.
+
+        Args:
+            converters (dict): Extra converters keyed by name, merged with the defaults.
+        """
+        self.converters = dict(CONVERTERS)
+        if converters:
+            self.converters.update(converters)
+        self.routes = []
+        self._root = None
+
+    @property
+    def dirty(self):
+        """
+        bool: Whether routes were added since the trie was last compiled.
+        """
+        return self._root is None
+
+    def add(self, path, handler, methods=('GET',), **options):
+        """
+        Add a route rule to the router.
+
+        Args:
+            path (str): The URL rule.
+            handler (function): The function that handles requests to this rule.
+            methods (list): The list of HTTP methods this rule responds to.
+            **options: Per-route settings stored on the Route.
+
+        Returns:
+            Route: The registered route.
+        """
+        # Parse eagerly so malformed rules fail at registration time
+        self._parse(path)
+        route = Route(path, handler, methods, options)
+        self.routes.append(route)
+        self._root = None
+        return route
+
+    def _parse(self, path):
+        parts = []
+        segments = split_path(path)
+        for index, segment in enumerate(segments):
+            if segment.startswith('<'):
+                match = _PARAM_RE.match(segment)
+                if match is None:
+                    raise ValueError(f'Malformed path parameter {segment!r} in route {path!r}')
+                converter_name = match.group('converter') or 'str'
+                if converter_name not in self.converters:
+                    raise ValueError(f'Unknown converter {converter_name!r} in route {path!r}')
+                converter = self.converters[converter_name]()
+                if converter.greedy and index != len(segments) - 1:
+                    raise ValueError(f'Converter {converter_name!r} must be the last segment of route {path!r}')
+                parts.append((match.group('name'), converter))
+            else:
+                parts.append(segment)
+        return parts
+
+    def compile(self):
+        """
+        Build the segment trie from the registered routes.
+        """
+        root = _Node()
+        for route in self.routes:
+            node = root
+            for part in self._parse(route.path):
+                if isinstance(part, str):
+                    node = node.static.setdefault(part, _Node())
+                    continue
+                name, converter = part
+                if converter.greedy:
+                    if node.greedy is None:
+                        node.greedy = (name, converter, _Node())
+                    node = node.greedy[2]
+                    continue
+                for param_name, param_converter, child in node.params:
+                    if param_name == name and type(param_converter) is type(converter):
+                        node = child
+                        break
+                else:
+                    child = _Node()
+                    node.params.append((name, converter, child))
+                    node.params.sort(key=lambda entry: entry[1].priority)
+                    node = child
+            for method in route.methods:
+                node.routes[method] = route
+        self._root = root
+
+    def match(self, path, method):
+        """
+        Find the route for a path and method.
+
+        Args:
+            path (str): The request path.
+            method (str): The HTTP method.
+
+        Returns:
+            tuple: ``(route, params)`` or ``(None, None)`` when nothing matches.
+        """
+        if self._root is None:
+            self.compile()
+        params = {}
+        route = self._match(self._root, split_path(path), 0, method, params)
+        if route is None:
+            return None, None
+        return route, params
+
+    def _match(self, node, segments, index, method, params):
+        if index == len(segments):
+            return node.routes.get(method)
+
+        segment = segments[index]
+        child = node.static.get(segment)
+        if child is not None:
+            found = self._match(child, segments, index + 1, method, params)
+            if found is not None:
+                return found
+
+        for name, converter, child in node.params:
+            try:
+                value = converter.to_python(segment)
+            except ValueError:
+                continue
+            params[name] = value
+            found = self._match(child, segments, index + 1, method, params)
+            if found is not None:
+                return found
+            del params[name]
+
+        if node.greedy is not None:
+            name, converter, child = node.greedy
+            route = child.routes.get(method)
+            if route is not None:
+                try:
+                    params[name] = converter.to_python('/'.join(segments[index:]))
+                except ValueError:
+                    return None
+                return route
+        return None
@@ -0,0 +1,195 @@
+import json
+import uuid
+import decimal
+import datetime
+import dataclasses
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+def _default(obj):
+    """
+    Encode values the JSON libraries do not handle natively.
+    """
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, (uuid.UUID, decimal.Decimal)):
+        return str(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    if isinstance(obj, (bytes, bytearray, memoryview)):
+        return bytes(obj).decode('utf-8')
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+def convert(data, type):
+    """
+    Build an instance of ``type`` from decoded JSON.
+
+    Supports dataclasses, classes with a pydantic-style ``model_validate``
+    classmethod and plain types that the data must already be an instance of.
+
+    Args:
+        data (object): The decoded JSON value.
+        type (type): The target type.
+
+    Returns:
+        object: The converted value.
+
+    Raises:
+        ValueError: If the data does not match the type.
+    """
+    model_validate = getattr(type, 'model_validate', None)
+    if model_validate is not None:
+        return model_validate(data)
+    if dataclasses.is_dataclass(type):
+        if not isinstance(data, dict):
+            raise ValueError(f'Expected an object for {type.__name__}')
+        try:
+            return type(**data)
+        except TypeError as e:
+            raise ValueError(str(e)) from None
+    if isinstance(data, type):
+        return data
+    raise ValueError(f'Expected {type.__name__}, got {data.__class__.__name__}')
+
+
+class StdlibSerializer:
+    name = 'json'
+
+    def dumps(self, obj):
+        return json.dumps(obj, separators=(',', ':'), ensure_ascii=False, default=_default).encode('utf-8')
+
+    def loads(self, data):
+        if isinstance(data, (bytearray, memoryview)):
+            data = bytes(data)
+        return json.loads(data)
+
+    def decode(self, data, type):
+        return convert(self.loads(data), type)
+
+
+class OrjsonSerializer:
+    name = 'orjson'
+
+    def __init__(self, option=None):
+        """
+        Initialize the orjson serializer.
+
+        Non-string dict keys are always allowed, as they are by the other
+        serializers.
+
+        Args:
+            option (int): ``orjson.OPT_*`` flags passed to ``orjson.dumps``.
+        """
+        if orjson is None:
+            raise ImportError('orjson is not installed')
+        self.option = orjson.OPT_NON_STR_KEYS | (option or 0)
+
+    def dumps(self, obj):
+        return orjson.dumps(obj, default=_default, option=self.option)
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+    def decode(self, data, type):
+        return convert(orjson.loads(data), type)
+
+
+class MsgspecSerializer:
+    name = 'msgspec'
+
+    def __init__(self):
+        """
+        Initialize the msgspec serializer.
+
+        ``decode`` validates straight into ``msgspec.Struct`` types, dataclasses
+        and typing annotations while parsing, without an intermediate dict.
+        Decoders are cached per target type.
+        """
+        if msgspec is None:
+            raise ImportError('msgspec is not installed')
+        self._encoder = msgspec.json.Encoder(enc_hook=_default)
+        self._decoder = msgspec.json.Decoder()
+        self._typed_decoders = {}
+
+    def dumps(self, obj):
+        return self._encoder.encode(obj)
+
+    def loads(self, data):
+        # Callers catch ValueError, so do not rely on msgspec's exception hierarchy
+        try:
+            return self._decoder.decode(data)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+
+    def decode(self, data, type):
+        if hasattr(type, 'model_validate'):
+            return convert(self.loads(data), type)
+        decoder = self._typed_decoders.get(type)
+        if decoder is None:
+            decoder = self._typed_decoders[type] = msgspec.json.Decoder(type)
+        try:
+            return decoder.decode(data)
+        except msgspec.DecodeError as e:
+            # Also covers ValidationError, a subclass
+            raise ValueError(str(e)) from e
+
+
+def default_serializer():
+    """
+    Pick the fastest JSON serializer installed: orjson, then msgspec, then the stdlib.
+
+    Returns:
+        object: The serializer.
+    """
+    if orjson is not None:
+        return OrjsonSerializer()
+    if msgspec is not None:
+        return MsgspecSerializer()
+    return StdlibSerializer()
+
+
+_serializer = default_serializer()
+
+
+def get_serializer():
+    """
+    Get the process-wide JSON serializer used by ``JSONResponse`` and ``Request.json``.
+
+    Returns:
+        object: The serializer.
+    """
+    return _serializer
+
+
+def set_serializer(serializer):
+    """
+    Replace the process-wide JSON serializer.
+
+    Args:
+        serializer (object): An object with ``dumps(obj) -> bytes``, ``loads(data)``
+            and ``decode(data, type)`` methods, or one of ``'orjson'``,
+            ``'msgspec'`` and ``'json'``.
+    """
+    global _serializer
+    if isinstance(serializer, str):
+        serializer = SERIALIZERS[serializer]()
+    _serializer = serializer
+
+
+SERIALIZERS = {
+    'orjson': OrjsonSerializer,
+    'msgspec': MsgspecSerializer,
+    'json': StdlibSerializer,
+}
@@ -0,0 +1,772 @@
+import os
+import sys
+import time
+import errno
+import random
+import signal
+import socket
+import logging
+import threading
+import socketserver
+from email.utils import formatdate
+from urllib.parse import unquote
+from http.server import BaseHTTPRequestHandler
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger('EasyAPI.server')
+
+_HEX_DIGITS = b'0123456789abcdefABCDEF'
+
+
+def create_listener(host, port, backlog=2048, reuse_port=True):
+    """
+    Create the listening socket shared by all worker processes.
+
+    Args:
+        host (str): The hostname to listen on.
+        port (int): The port to listen on.
+        backlog (int): The listen backlog.
+        reuse_port (bool): Set SO_REUSEPORT where the platform supports it, so
+            a restarted master can bind while old workers are still draining.
+
+    Returns:
+        socket.socket: The bound, listening socket.
+    """
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port and hasattr(socket, 'SO_REUSEPORT'):
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        except OSError:
+            pass
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class _DateCache:
+    """
+    Cache the formatted ``Date`` header for the current second.
+    """
+    def __init__(self):
+        self._second = None
+        self._value = None
+
+    def get(self):
+        now = int(time.time())
+        if now != self._second:
+            self._value = formatdate(now, usegmt=True)
+            self._second = now
+        return self._value
+
+
+_date_cache = _DateCache()
+
+
+class _InputStream:
+    """
+    File-like wrapper that limits reads to the declared request body length.
+
+    Keeping reads inside the body is what makes keep-alive safe: whatever the
+    application leaves unread is drained before the next request is parsed.
+    """
+    def __init__(self, rfile, length):
+        self._rfile = rfile
+        self._remaining = length
+
+    def read(self, size=-1):
+        if self._remaining <= 0:
+            return b''
+        if size is None or size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._rfile.read(size)
+        self._remaining -= len(data)
+        if not data:
+            self._remaining = 0
+        return data
+
+    def readline(self, size=-1):
+        if self._remaining <= 0:
+            return b''
+        if size is None or size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._rfile.readline(size)
+        self._remaining -= len(data)
+        if not data:
+            self._remaining = 0
+        return data
+
+    def __iter__(self):
+        while True:
+            line = self.readline()
+            if not line:
+                return
+            yield line
+
+    def drain(self, limit=256 * 1024, chunk_size=65536):
+        """
+        Discard the unread part of the body.
+
+        Args:
+            limit (int): Give up when more than this many bytes are left.
+
+        Returns:
+            bool: True if the body was fully consumed and the connection can be reused.
+        """
+        if self._remaining > limit:
+            return False
+        while self._remaining > 0:
+            if not self.read(chunk_size):
+                break
+        return True
+
+
+class _ChunkedInputStream:
+    """
+    File-like reader decoding a ``Transfer-Encoding: chunked`` request body.
+
+    Chunks are decoded as they are read, so nothing is buffered here; the
+    environ marks the body with ``wsgi.input_terminated`` instead of a
+    ``CONTENT_LENGTH``. Malformed framing raises ValueError.
+    """
+    def __init__(self, rfile):
+        self._rfile = rfile
+        # Bytes left in the current chunk
+        self._remaining = 0
+        self._in_chunk = False
+        self._done = False
+
+    def _next_chunk(self):
+        """
+        Read the next chunk header.
+
+        Returns:
+            bool: False once the last chunk and the trailers have been read.
+        """
+        if self._done:
+            return False
+        if self._in_chunk and self._rfile.read(2) != b'\r\n':
+            raise ValueError('Malformed chunked request body')
+        line = self._rfile.readline(1026)
+        size_line = line.split(b';', 1)[0].strip()
+        if not line.endswith(b'\n') or not size_line or size_line.strip(_HEX_DIGITS):
+            raise ValueError('Malformed chunked request body')
+        size = int(size_line, 16)
+        if size == 0:
+            # Skip trailers up to the empty line
+            while True:
+                line = self._rfile.readline(65537)
+                if not line.endswith(b'\n'):
+                    raise ValueError('Malformed chunked request body')
+                if line in (b'\r\n', b'\n'):
+                    break
+            self._done = True
+            return False
+        self._remaining = size
+        self._in_chunk = True
+        return True
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            return b''.join(iter(lambda: self.read(65536), b''))
+        while not self._remaining:
+            if not self._next_chunk():
+                return b''
+        data = self._rfile.read(min(size, self._remaining))
+        if not data:
+            raise ValueError('Truncated chunked request body')
+        self._remaining -= len(data)
+        return data
+
+    def readline(self, size=-1):
+        parts = []
+        while size is None or size < 0 or size > 0:
+            while not self._remaining:
+                if not self._next_chunk():
+                    return b''.join(parts)
+            limit = self._remaining if size is None or size < 0 else min(size, self._remaining)
+            data = self._rfile.readline(limit)
+            if not data:
+                raise ValueError('Truncated chunked request body')
+            self._remaining -= len(data)
+            parts.append(data)
+            if size is not None and size >= 0:
+                size -= len(data)
+            if data.endswith(b'\n'):
+                break
+        return b''.join(parts)
+
+    def __iter__(self):
+        while True:
+            line = self.readline()
+            if not line:
+                return
+            yield line
+
+    def drain(self, limit=256 * 1024, chunk_size=65536):
+        """
+        Discard the unread part of the body.
+
+        Args:
+            limit (int): Give up when more than this many bytes are left.
+
+        Returns:
+            bool: True if the body was fully consumed and the connection can be reused.
+        """
+        drained = 0
+        try:
+            while drained <= limit:
+                data = self.read(chunk_size)
+                if not data:
+                    return True
+                drained += len(data)
+        except ValueError:
+            pass
+        return False
+
+
+class FileWrapper:
+    """
+    ``wsgi.file_wrapper`` implementation.
+
+    Iterating reads the file in blocks, but the request handler recognises it
+    and sends the file with ``socket.sendfile`` (``os.sendfile`` on Linux), so
+    the data never passes through Python.
+    """
+    def __init__(self, file, block_size=65536):
+        self.file = file
+        self.block_size = block_size
+
+    def __iter__(self):
+        while True:
+            data = self.file.read(self.block_size)
+            if not data:
+                return
+            yield data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        close = getattr(self.file, 'close', None)
+        if close is not None:
+            close()
+
+
+class WSGIRequestHandler(BaseHTTPRequestHandler):
+    """
+    HTTP/1.1 request handler that runs a WSGI application.
+
+    Connections are kept alive between requests unless the client asks to
+    close them, the response length is unknown on HTTP/1.0, or the worker is
+    draining.
+    """
+    protocol_version = 'HTTP/1.1'
+    server_version = 'EasyAPI'
+    sys_version = ''
+
+    def setup(self):
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def handle_one_request(self):
+        try:
+            self.raw_requestline = self.rfile.readline(65537)
+        except (socket.timeout, ConnectionError):
+            self.close_connection = True
+            return
+        if len(self.raw_requestline) > 65536:
+            self.requestline = ''
+            self.request_version = ''
+            self.command = ''
+            self.send_error(414)
+            return
+        if not self.raw_requestline:
+            self.close_connection = True
+            return
+        if not self.parse_request():
+            return
+        try:
+            self.run_wsgi()
+        except (socket.timeout, ConnectionError):
+            self.close_connection = True
+        self.server.count_request()
+        if self.server.draining:
+            self.close_connection = True
+
+    def log_request(self, code='-', size='-'):
+        # Access logging is left to application middleware
+        pass
+
+    def log_error(self, format, *args):
+        logger.error('%s - %s', self.address_string(), format % args)
+
+    def make_environ(self):
+        """
+        Build the WSGI environ for the current request.
+
+        Returns:
+            dict: The environ dictionary.
+        """
+        path, _, query = self.path.partition('?')
+        environ = {
+            'REQUEST_METHOD': self.command,
+            'SCRIPT_NAME': '',
+            'PATH_INFO': unquote(path, 'latin-1'),
+            'QUERY_STRING': query,
+            'SERVER_NAME': self.server.server_name,
+            'SERVER_PORT': str(self.server.server_port),
+            'SERVER_PROTOCOL': self.request_version,
+            'REMOTE_ADDR': self.client_address[0] if self.client_address else '',
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': self.server.multiprocess,
+            'wsgi.run_once': False,
+            'wsgi.file_wrapper': FileWrapper,
+        }
+        for name, value in self.headers.items():
+            key = name.upper().replace('-', '_')
+            if key == 'CONTENT_TYPE':
+                environ['CONTENT_TYPE'] = value
+                continue
+            if key == 'CONTENT_LENGTH':
+                environ['CONTENT_LENGTH'] = value
+                continue
+            key = 'HTTP_' + key
+            if key in environ:
+                environ[key] += ',' + value
+            else:
+                environ[key] = value
+
+        if self.headers.get('Transfer-Encoding'):
+            environ['wsgi.input'] = _ChunkedInputStream(self.rfile)
+            environ['wsgi.input_terminated'] = True
+            return environ
+        try:
+            length = int(environ.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            length = 0
+        environ['wsgi.input'] = _InputStream(self.rfile, max(length, 0))
+        return environ
+
+    def run_wsgi(self):
+        transfer_encoding = self.headers.get('Transfer-Encoding', '').lower()
+        if transfer_encoding and ('Content-Length' in self.headers or transfer_encoding != 'chunked'):
+            self.close_connection = True
+            if 'Content-Length' in self.headers:
+                # Ambiguous framing is how requests are smuggled; refuse it
+                self._send_simple('400 Bad Request', b'Bad Request')
+            else:
+                self._send_simple('501 Not Implemented', b'Not Implemented')
+            return
+        environ = self.make_environ()
+        state = {'status': None, 'headers': None, 'sent': False}
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info:
+                try:
+                    if state['sent']:
+                        raise exc_info[1].with_traceback(exc_info[2])
+                finally:
+                    exc_info = None
+            elif state['status'] is not None:
+                raise AssertionError('start_response called twice')
+            state['status'] = status
+            state['headers'] = list(headers)
+            return write
+
+        def write(data):
+            if not state['sent'] and not any(name.lower() == 'content-length' for name, _ in state['headers']):
+                self.close_connection = True
+            self._write_body(state, [data], chunked=False)
+
+        try:
+            result = self.server.app(environ, start_response)
+        except Exception:
+            logger.exception('Error handling %s %s', self.command, self.path)
+            self._send_simple('500 Internal Server Error', b'Internal Server Error')
+            self.close_connection = True
+            return
+
+        try:
+            self._send_result(state, result)
+        finally:
+            close = getattr(result, 'close', None)
+            if close is not None:
+                close()
+            if not environ['wsgi.input'].drain():
+                self.close_connection = True
+
+    def _send_result(self, state, result):
+        headers = state['headers']
+        names = {name.lower() for name, _ in headers}
+
+        if state['status'].startswith(('1', '204', '304')):
+            # These responses never carry a body, so need no framing
+            self._write_body(state, result, False)
+            if not state['sent']:
+                self._write_head(state)
+            return
+
+        # Common case: the whole body is already in memory
+        if 'content-length' not in names and isinstance(result, (list, tuple)):
+            headers.append(('Content-Length', str(sum(len(chunk) for chunk in result))))
+            names.add('content-length')
+
+        chunked = False
+        if 'content-length' not in names:
+            if self.request_version == 'HTTP/1.1':
+                headers.append(('Transfer-Encoding', 'chunked'))
+                chunked = True
+            else:
+                self.close_connection = True
+
+        if isinstance(result, FileWrapper) and not chunked and self._sendfile(state, result):
+            return
+        self._write_body(state, result, chunked)
+        if chunked and not self.command == 'HEAD':
+            self.wfile.write(b'0\r\n\r\n')
+        elif not state['sent']:
+            self._write_head(state)
+
+    def _sendfile(self, state, wrapper):
+        try:
+            wrapper.fileno()
+        except (AttributeError, OSError, ValueError):
+            return False
+        self._write_head(state)
+        if self.command != 'HEAD':
+            self.connection.sendfile(wrapper.file, offset=wrapper.file.tell())
+        return True
+
+    def _write_head(self, state, first_chunk=b''):
+        headers = state['headers']
+        lines = [f"{self.request_version} {state['status']}\r\n"]
+        lines.append(f'Server: {self.server_version}\r\n')
+        lines.append(f'Date: {_date_cache.get()}\r\n')
+        if self.close_connection:
+            lines.append('Connection: close\r\n')
+        elif self.request_version == 'HTTP/1.0':
+            lines.append('Connection: keep-alive\r\n')
+        for name, value in headers:
+            lines.append(f'{name}: {value}\r\n')
+        lines.append('\r\n')
+        # One write for the head and the first chunk avoids an extra packet
+        self.wfile.write(''.join(lines).encode('latin-1') + first_chunk)
+        state['sent'] = True
+
+    def _write_body(self, state, chunks, chunked):
+        head_only = self.command == 'HEAD'
+        for chunk in chunks:
+            if not chunk:
+                continue
+            if head_only:
+                continue
+            if chunked:
+                chunk = b'%x\r\n%s\r\n' % (len(chunk), chunk)
+            if not state['sent']:
+                self._write_head(state, bytes(chunk))
+            else:
+                self.wfile.write(chunk)
+
+    def _send_simple(self, status, body):
+        state = {
+            'status': status,
+            'headers': [('Content-Type', 'text/plain'), ('Content-Length', str(len(body)))],
+            'sent': False,
+        }
+        self._write_head(state, body)
+
+
+class WSGIServer(socketserver.TCPServer):
+    """
+    HTTP/1.1 WSGI server that handles connections on a bounded thread pool.
+    """
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, app, sock, threads=8, max_requests=0, keepalive_timeout=5,
+                 multiprocess=False):
+        """
+        Initialize the server on an already listening socket.
+
+        Args:
+            app (function): The WSGI application.
+            sock (socket.socket): The listening socket.
+            threads (int): Number of threads handling connections.
+            max_requests (int): Stop serving after this many requests (0 disables).
+            keepalive_timeout (float): Seconds an idle keep-alive connection is kept open.
+            multiprocess (bool): Whether other processes share the socket.
+        """
+        super().__init__(sock.getsockname(), WSGIRequestHandler, bind_and_activate=False)
+        self.socket.close()
+        self.socket = sock
+        host, port = sock.getsockname()[:2]
+        self.server_name = host
+        self.server_port = port
+        self.app = app
+        self.multiprocess = multiprocess
+        self.max_requests = max_requests
+        self.keepalive_timeout = keepalive_timeout
+        self.draining = False
+        self.requests_handled = 0
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='EasyAPI-worker')
+        self._lock = threading.Lock()
+
+    def process_request(self, request, client_address):
+        request.settimeout(self.keepalive_timeout)
+        self._executor.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def count_request(self):
+        """
+        Count a handled request and start draining once ``max_requests`` is reached.
+        """
+        with self._lock:
+            self.requests_handled += 1
+            if self.max_requests and self.requests_handled >= self.max_requests and not self.draining:
+                logger.info('Worker %s reached max_requests, recycling', os.getpid())
+                self.drain()
+
+    def handle_error(self, request, client_address):
+        logger.exception('Error handling connection from %s', client_address)
+
+    def drain(self):
+        """
+        Stop accepting connections and let in-flight requests finish.
+        """
+        self.draining = True
+        threading.Thread(target=self.shutdown, daemon=True).start()
+
+    def server_close(self):
+        self._executor.shutdown(wait=True)
+
+
+class PreforkServer:
+    def __init__(self, app, host='127.0.0.1', port=5000, workers=None, threads=8,
+                 max_requests=0, max_requests_jitter=0, graceful_timeout=30,
+                 keepalive_timeout=5, worker_class='asyncio', **server_options):
+        """
+        Initialize the pre-fork server.
+
+        The master process binds the listening socket, forks ``workers`` child
+        processes that accept on it, respawns children that exit, and forwards
+        SIGTERM/SIGINT so children drain in-flight requests before exiting.
+
+        Args:
+            app (EasyAPI): The application to serve.
+            host (str): The hostname to listen on.
+            port (int): The port to listen on.
+            workers (int): Number of worker processes. Defaults to the CPU count.
+            threads (int): Number of threads per worker.
+            max_requests (int): Recycle a worker after this many requests (0 disables).
+            max_requests_jitter (int): Random extra requests added per worker so they
+                do not all recycle at once.
+            graceful_timeout (float): Seconds workers get to drain before being killed.
+            keepalive_timeout (float): Seconds an idle keep-alive connection is kept open.
+            worker_class (str): ``'asyncio'`` to serve each worker from an event
+                loop with ``AsyncHTTPServer``, or ``'threaded'`` for ``WSGIServer``.
+            **server_options: Extra ``AsyncHTTPServer`` options such as
+                ``header_timeout`` and ``body_timeout``.
+        """
+        if worker_class not in ('asyncio', 'threaded'):
+            raise ValueError(f'Unknown worker class: {worker_class}')
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = workers or os.cpu_count() or 1
+        self.threads = threads
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.graceful_timeout = graceful_timeout
+        self.keepalive_timeout = keepalive_timeout
+        self.worker_class = worker_class
+        self.server_options = server_options
+        self.children = {}
+        self.socket = None
+        self._stopping = False
+
+    def serve_forever(self):
+        """
+        Bind the socket, fork the workers and supervise them until stopped.
+        """
+        self.socket = create_listener(self.host, self.port)
+        # Compile routes once in the master so workers inherit them copy-on-write;
+        # services are bound in each worker's startup
+        self.app.finalize(bind_services=False)
+        logger.info('Serving on http://%s:%s with %d workers', self.host, self.port, self.workers)
+
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        try:
+            for _ in range(self.workers):
+                self._spawn()
+            while not self._stopping:
+                self._reap()
+                while len(self.children) < self.workers and not self._stopping:
+                    self._spawn()
+                time.sleep(0.2)
+        finally:
+            self._stop_children()
+            self.socket.close()
+
+    def _handle_stop(self, signum, frame):
+        self._stopping = True
+
+    def _spawn(self):
+        pid = os.fork()
+        if pid:
+            self.children[pid] = time.monotonic()
+            return
+        # Child process
+        code = 0
+        try:
+            self._run_worker()
+        except Exception:
+            logger.exception('Worker %s crashed', os.getpid())
+            code = 1
+        finally:
+            os._exit(code)
+
+    def _run_worker(self):
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        max_requests = self.max_requests
+        if max_requests and self.max_requests_jitter:
+            max_requests += random.randint(0, self.max_requests_jitter)
+        if self.worker_class == 'asyncio':
+            from EasyAPI.aioserver import serve_async
+            serve_async(
+                self.app, self.socket, threads=self.threads, max_requests=max_requests,
+                keepalive_timeout=self.keepalive_timeout, graceful_timeout=self.graceful_timeout,
+                multiprocess=True, **self.server_options,
+            )
+            return
+        server = WSGIServer(
+            self.app, self.socket, threads=self.threads, max_requests=max_requests,
+            keepalive_timeout=self.keepalive_timeout, multiprocess=True,
+        )
+        signal.signal(signal.SIGTERM, lambda signum, frame: server.drain())
+        self.app.startup()
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+            self.app.shutdown()
+
+    def _reap(self):
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self.children.clear()
+                return
+            if pid == 0:
+                return
+            started = self.children.pop(pid, None)
+            if started is None or self._stopping:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            if code != 0:
+                logger.warning('Worker %s exited with status %s, respawning', pid, code)
+                # Avoid a tight fork loop when workers crash during startup
+                if time.monotonic() - started < 1:
+                    time.sleep(1)
+
+    def _stop_children(self):
+        for pid in list(self.children):
+            self._signal(pid, signal.SIGTERM)
+        deadline = time.monotonic() + self.graceful_timeout
+        while self.children and time.monotonic() < deadline:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid:
+                self.children.pop(pid, None)
+            else:
+                time.sleep(0.1)
+        for pid in list(self.children):
+            logger.warning('Worker %s did not drain in time, killing', pid)
+            self._signal(pid, signal.SIGKILL)
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+        self.children.clear()
+
+    def _signal(self, pid, signum):
+        try:
+            os.kill(pid, signum)
+        except OSError as e:
+            if e.errno != errno.ESRCH:
+                raise
+
+
+def serve(app, host='127.0.0.1', port=5000, workers=1, threads=8, **options):
+    """
+    Serve an application with the built-in HTTP/1.1 server.
+
+    With a single worker the server runs in the current process; with more it
+    pre-forks (on platforms that support ``fork``). Each process serves its
+    connections from an asyncio event loop unless ``worker_class='threaded'``
+    is passed, which uses the thread-per-connection ``WSGIServer``. Recycling
+    with ``max_requests`` needs a master to start replacement workers, so it is
+    ignored with a single worker.
+
+    Args:
+        app (EasyAPI): The application to serve.
+        host (str): The hostname to listen on.
+        port (int): The port to listen on.
+        workers (int): Number of worker processes.
+        threads (int): Number of threads per worker.
+        **options: Extra options passed to ``PreforkServer``.
+    """
+    if workers > 1 and hasattr(os, 'fork'):
+        PreforkServer(app, host, port, workers=workers, threads=threads, **options).serve_forever()
+        return
+
+    # Nothing would restart a single process that exits after max_requests
+    if options.pop('max_requests', 0):
+        logger.warning('max_requests is ignored without pre-forked workers to replace this process')
+    options.pop('max_requests_jitter', None)
+    sock = create_listener(host, port)
+    worker_class = options.pop('worker_class', 'asyncio')
+    if worker_class == 'asyncio':
+        from EasyAPI.aioserver import serve_async
+        options.setdefault('graceful_timeout', 30)
+        logger.info('Serving on http://%s:%s', host, port)
+        try:
+            serve_async(app, sock, threads=threads, **options)
+        except KeyboardInterrupt:
+            pass
+        return
+
+    server = WSGIServer(
+        app, sock, threads=threads,
+        keepalive_timeout=options.get('keepalive_timeout', 5),
+    )
+    app.startup()
+    logger.info('Serving on http://%s:%s', host, port)
+    try:
+        signal.signal(signal.SIGTERM, lambda signum, frame: server.drain())
+    except ValueError:
+        # Not running in the main thread
+        pass
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        app.shutdown()
@@ -1,43 +1,835 @@
-import redis
-import memcache
+import re
+import json
+import time
+import uuid
+import threading
+
+from EasyAPI.services.codecs import ValueCodec
+from EasyAPI.utils.logs import logger
+from EasyAPI.utils.lru import LRUCache
+from EasyAPI.utils.providers import ProviderRegistry
+
+# Client libraries are imported when a cache service first uses their provider
+backends = ProviderRegistry('caching provider')
+
+
+@backends.register('redis')
+def _redis():
+    import redis
+    return redis.Redis
+
+
+@backends.register('memcached', package='python-memcached')
+def _memcached():
+    import memcache
+    return lambda servers, **credentials: memcache.Client(servers, debug=0)
+
+
+_MISSING = object()
+
+# Where EasyAPI.handle_request_async leaves the application's thread pool
+# (EasyAPI.app.EXECUTOR_ENVIRON_KEY, not imported to keep this module light)
+_EXECUTOR_ENVIRON_KEY = 'easyapi.executor'
+
+# Keys of the namespace and tag version counters
+VERSION_PREFIX = 'easyapi:version:'
+
+# Tagged values start with this marker, then the length of a JSON object
+# holding the versions of their tags. It is several bytes long so plain values
+# (a JPEG starts with 0xFF 0xD8, codec headers with one byte >= 0x81) are never
+# mistaken for tagged ones.
+_TAGGED = b'\xff\x00EasyAPI-tags\x00'
+
+
+def _tag(versions, data):
+    header = json.dumps(versions, separators=(',', ':')).encode('utf-8')
+    return _TAGGED + len(header).to_bytes(2, 'big') + header + data
+
+
+def _untag(data):
+    start = len(_TAGGED) + 2
+    length = int.from_bytes(data[len(_TAGGED):start], 'big')
+    return json.loads(data[start:start + length]), data[start + length:]
+
+
+def _is_tagged(value):
+    return isinstance(value, (bytes, bytearray)) and value[:len(_TAGGED)] == _TAGGED
+
+
+def _escape_pattern(text):
+    return re.sub(r'([*?\[\]\\])', r'\\\1', text)
+
+
+class TierStats:
+    __slots__ = ('hits', 'misses')
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def as_dict(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+        }
+
+
+class NearCache:
+    def __init__(self, max_entries=10000, ttl=5, channel='easyapi:cache:invalidate', poll_interval=1,
+                 retry_interval=1):
+        """
+        Initialize an in-process cache in front of a ``CacheService``.
+
+        Entries live for at most ``ttl`` seconds, and no longer than their
+        expiration when written through this process. Writes and deletes made
+        through any ``CacheService`` sharing the same invalidation channel drop
+        the key from every near cache: on Redis they are broadcast over pub/sub, and
+        while the subscription is down the near cache is bypassed. Memcached
+        has no pub/sub, so writers bump a shared generation counter instead,
+        which each process checks at most every ``poll_interval`` seconds and
+        which clears its whole near cache when it changes.
+
+        Args:
+            max_entries (int): Maximum number of keys held in the process.
+            ttl (float): Seconds an entry may be served without reading the
+                shared cache, which bounds staleness if an invalidation is lost.
+            channel (str): Redis channel, or memcached key of the generation
+                counter, shared by the processes invalidating each other.
+            poll_interval (float): Seconds between generation checks on memcached.
+            retry_interval (float): Seconds to wait before resubscribing after
+                the Redis subscription fails.
+        """
+        self.ttl = ttl
+        self.channel = channel
+        self.poll_interval = poll_interval
+        self.retry_interval = retry_interval
+        self.entries = LRUCache(max_entries)
+        self.stats = TierStats()
+        # Entries are only served while invalidations are being received
+        self.active = False
+        # Bumped by every invalidation, so a value read from the shared cache
+        # before an invalidation arrived is not stored afterwards
+        self.epoch = 0
+
+    @classmethod
+    def coerce(cls, value):
+        """
+        Build a near cache from the ``near_cache`` argument of ``CacheService``.
+
+        Args:
+            value (NearCache|dict|bool): A near cache, keyword arguments for one,
+                True for the defaults, or None/False for none.
+        """
+        if value is None or value is False:
+            return None
+        if isinstance(value, cls):
+            return value
+        if value is True:
+            return cls()
+        return cls(**value)
+
+    def get(self, key):
+        entry = self.entries.get(key) if self.active else None
+        if entry is not None and entry[1] > time.monotonic():
+            self.stats.hits += 1
+            return entry[0]
+        self.stats.misses += 1
+        return _MISSING
+
+    def set(self, key, value, expiration=None, epoch=None):
+        if not self.active or value is None or (epoch is not None and epoch != self.epoch):
+            return
+        ttl = min(self.ttl, expiration) if expiration else self.ttl
+        self.entries.set(key, (value, time.monotonic() + ttl))
+
+    def invalidate(self, key):
+        self.epoch += 1
+        self.entries.pop(key)
+
+    def clear(self):
+        self.epoch += 1
+        self.entries.clear()
+
+
+class _PubSubInvalidation:
+    def __init__(self, near, client):
+        """
+        Broadcast and receive near cache invalidations over Redis pub/sub.
+
+        Each message is the id of the sending service, a space and the key, or
+        the id alone to clear everything; a service ignores its own messages.
+        """
+        self.near = near
+        self.client = client
+        self.node_id = uuid.uuid4().hex
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._listen, name='EasyAPI-near-cache', daemon=True)
+        self._thread.start()
+
+    def publish(self, key=None):
+        message = self.node_id if key is None else f'{self.node_id} {key}'
+        self.client.publish(self.near.channel, message)
+
+    def publish_many(self, keys):
+        # One round trip for the whole batch
+        pipeline = self.client.pipeline(transaction=False)
+        for key in keys:
+            pipeline.publish(self.near.channel, f'{self.node_id} {key}')
+        pipeline.execute()
+
+    def check(self):
+        pass
+
+    def _listen(self):
+        near = self.near
+        while not self._closed.is_set():
+            pubsub = None
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(near.channel)
+                # Invalidations may have been missed while not subscribed
+                near.clear()
+                near.active = True
+                while not self._closed.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is not None:
+                        self._receive(message['data'])
+            except Exception:
+                near.active = False
+                near.clear()
+                if self._closed.is_set():
+                    break
+                logger.warning('Near cache invalidations interrupted, bypassing it until resubscribed',
+                               exc_info=True)
+                self._closed.wait(near.retry_interval)
+            finally:
+                if pubsub is not None:
+                    pubsub.close()
+        near.active = False
+
+    def _receive(self, data):
+        if isinstance(data, bytes):
+            data = data.decode('utf-8', 'replace')
+        node_id, _, key = data.partition(' ')
+        if node_id == self.node_id:
+            return
+        if key:
+            self.near.invalidate(key)
+        else:
+            self.near.clear()
+
+    def close(self):
+        # The listener notices within a second; shutdown does not wait for it
+        self._closed.set()
+
+
+class _GenerationInvalidation:
+    def __init__(self, near, client):
+        """
+        Invalidate near caches through a generation counter in memcached.
+
+        Every write increments the counter, and a process seeing a new
+        generation clears its near cache, so staleness is bounded by the poll
+        interval rather than tracked per key.
+        """
+        self.near = near
+        self.client = client
+        self.generation = None
+        self._next_check = 0
+        self._lock = threading.Lock()
+        self.check()
+
+    def publish(self, key=None):
+        try:
+            generation = self.client.incr(self.near.channel)
+            if generation is None:
+                self.client.add(self.near.channel, '0', time=0)
+                generation = self.client.incr(self.near.channel)
+        except Exception:
+            logger.warning('Could not publish a near cache invalidation', exc_info=True)
+            return
+        with self._lock:
+            # Our own write does not need to clear our near cache
+            if self.generation is not None and generation == self.generation + 1:
+                self.generation = generation
+
+    def publish_many(self, keys):
+        self.publish()
+
+    def check(self):
+        now = time.monotonic()
+        if now < self._next_check or not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._next_check = now + self.near.poll_interval
+            try:
+                generation = self.client.get(self.near.channel)
+            except Exception:
+                logger.warning('Could not check the near cache generation', exc_info=True)
+                self.near.active = False
+                return
+            generation = int(generation) if generation is not None else 0
+            if generation != self.generation:
+                self.near.clear()
+                self.generation = generation
+            self.near.active = True
+        finally:
+            self._lock.release()
+
+    def close(self):
+        pass
 
 
 class CacheService:
-    def __init__(self, provider, **credentials):
+    def __init__(self, provider, near_cache=None, client=None, chunk_size=500, codec=None, **credentials):
+        """
+        Initialize a cache service.
+
+        Args:
+            provider (str): ``'redis'`` or ``'memcached'``.
+            near_cache (NearCache|dict|bool): Keep hot keys in an in-process
+                cache in front of the shared one, see ``NearCache``.
+            client (object): An existing client for the provider, instead of
+                creating one from the credentials.
+            chunk_size (int): Maximum keys sent in one command by the batch
+                operations, so a huge batch does not block Redis or exceed
+                memcached's request size.
+            codec (ValueCodec|dict|str): Encode values, and compress large
+                ones, see ``ValueCodec``. Without one values are passed to the
+                client as they are.
+            **credentials: Arguments for the provider's client.
+        """
         self.provider = provider
-        if provider == "redis":
-            self.client = redis.Redis(**credentials)
-        elif provider == "memcached":
-            self.client = memcache.Client(credentials["servers"], debug=0)
-        else:
+        if provider not in backends:
             raise ValueError("Unsupported caching provider")
+        self.client = client if client is not None else backends.load(provider)(**credentials)
+        self.chunk_size = chunk_size
+        self.codec = ValueCodec.coerce(codec)
+        self.stats = TierStats()
+        self.near = NearCache.coerce(near_cache)
+        self._invalidation = None
+        if self.near is not None:
+            invalidation = _PubSubInvalidation if provider == "redis" else _GenerationInvalidation
+            self._invalidation = invalidation(self.near, self.client)
 
-    def set(self, key, value, expiration=3600):
+    def set(self, key, value, expiration=3600, tags=None):
         """
         Set a value in the cache with an optional expiration time.
+
+        Args:
+            key (str): The key.
+            value (object): The value; bytes unless the service has a codec.
+            expiration (int): Expiration time in seconds.
+            tags (iterable): Tags for ``invalidate_tags``.
         """
+        value = self._dump(value, tags)
         if self.provider == "redis":
             self.client.set(key, value, ex=expiration)
         elif self.provider == "memcached":
             self.client.set(key, value, time=expiration)
+        if self.near is not None:
+            self.near.invalidate(key)
+            self._invalidation.publish(key)
+            self.near.set(key, value, expiration)
+
+    def set_many(self, mapping, expiration=3600, tags=None):
+        """
+        Set several values with one round trip per chunk of keys.
+
+        Args:
+            mapping (dict): Values by key.
+            expiration (int): Expiration time in seconds.
+            tags (iterable): Tags for ``invalidate_tags``, applied to every value.
+        """
+        items = list(mapping.items())
+        if self.codec is not None or tags:
+            versions = self._versions(['tag:' + tag for tag in tags]) if tags else None
+            items = [(key, self._dump(value, versions=versions)) for key, value in items]
+        for chunk in self._chunks(items):
+            if self.provider == "redis":
+                pipeline = self.client.pipeline(transaction=False)
+                for key, value in chunk:
+                    pipeline.set(key, value, ex=expiration)
+                pipeline.execute()
+            elif self.provider == "memcached":
+                self.client.set_multi(dict(chunk), time=expiration)
+        if self.near is not None and items:
+            self._invalidate([key for key, _ in items])
+            for key, value in items:
+                self.near.set(key, value, expiration)
 
     def get(self, key):
         """
         Get a value from the cache by its key.
         """
-        return self.client.get(key)
+        near = self.near
+        value = _MISSING
+        if near is not None:
+            self._invalidation.check()
+            value = near.get(key)
+            epoch = near.epoch
+        if value is _MISSING:
+            value = self.client.get(key)
+            if value is None:
+                self.stats.misses += 1
+            else:
+                self.stats.hits += 1
+                if near is not None:
+                    near.set(key, value, epoch=epoch)
+        if _is_tagged(value):
+            versions, value = _untag(value)
+            if self._versions(list(versions)) != versions:
+                return None
+        return value if self.codec is None else self.codec.decode(value)
+
+    def get_many(self, keys):
+        """
+        Get several values with one round trip per chunk of keys.
+
+        Keys found in the near cache are not requested again.
+
+        Args:
+            keys (iterable): The keys to get.
+
+        Returns:
+            dict: The values found, by key; missing keys are left out.
+        """
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        near = self.near
+        if near is not None:
+            self._invalidation.check()
+            missing = []
+            for key in keys:
+                value = near.get(key)
+                if value is _MISSING:
+                    missing.append(key)
+                else:
+                    found[key] = value
+            keys = missing
+            epoch = near.epoch
+        for chunk in self._chunks(keys):
+            if self.provider == "redis":
+                values = self.client.mget(chunk)
+            else:
+                result = self.client.get_multi(chunk)
+                values = [result.get(key) for key in chunk]
+            for key, value in zip(chunk, values):
+                if value is None:
+                    self.stats.misses += 1
+                    continue
+                self.stats.hits += 1
+                found[key] = value
+                if near is not None:
+                    near.set(key, value, epoch=epoch)
+        tagged = {key: _untag(value) for key, value in found.items() if _is_tagged(value)}
+        if tagged:
+            # One lookup for the current versions of every tag in the batch
+            names = {name for versions, _ in tagged.values() for name in versions}
+            current = self._versions(list(names))
+            for key, (versions, value) in tagged.items():
+                if all(current[name] == version for name, version in versions.items()):
+                    found[key] = value
+                else:
+                    del found[key]
+        if self.codec is not None:
+            decode = self.codec.decode
+            return {key: decode(value) for key, value in found.items()}
+        return found
 
     def delete(self, key):
         """
         Delete a value from the cache by its key.
         """
         self.client.delete(key)
+        if self.near is not None:
+            self.near.invalidate(key)
+            self._invalidation.publish(key)
+
+    def delete_many(self, keys):
+        """
+        Delete several values with one round trip per chunk of keys.
+        """
+        keys = list(keys)
+        for chunk in self._chunks(keys):
+            if self.provider == "redis":
+                self.client.delete(*chunk)
+            elif self.provider == "memcached":
+                self.client.delete_multi(chunk)
+        if self.near is not None and keys:
+            self._invalidate(keys)
+
+    def incr(self, key, delta=1):
+        """
+        Atomically add to an integer value, starting from 0 if the key is missing.
+
+        Args:
+            key (str): The counter key.
+            delta (int): The amount to add.
+
+        Returns:
+            int: The new value.
+        """
+        value = self.client.incr(key, delta)
+        if value is None:
+            # memcached only increments existing keys; add() fails if another
+            # client created the counter in the meantime
+            if self.client.add(key, str(delta), time=0):
+                value = delta
+            else:
+                value = self.client.incr(key, delta)
+        if self.near is not None:
+            self.near.invalidate(key)
+            self._invalidation.publish(key)
+        return int(value)
+
+    def invalidate_tags(self, *tags):
+        """
+        Invalidate every value set with any of these tags.
+
+        Each tag has a version counter recorded with the values carrying it;
+        invalidating bumps the counter, so it costs one command per tag
+        whatever the number of values, which then read as missing.
+        """
+        for tag in tags:
+            self.incr(f'{VERSION_PREFIX}tag:{tag}')
+
+    def namespace(self, name):
+        """
+        A view of this cache storing keys under a versioned namespace prefix.
+
+        Returns:
+            CacheNamespace: The namespace.
+        """
+        return CacheNamespace(self, name)
+
+    def delete_matching(self, pattern, count=500):
+        """
+        Delete the keys matching a glob pattern without blocking Redis.
+
+        Keys are listed incrementally with ``SCAN`` and removed with
+        ``UNLINK``, which frees memory in the background, ``count`` at a
+        time. Memcached cannot list its keys; use namespaces or tags there.
+
+        Args:
+            pattern (str): A Redis glob pattern, e.g. ``'session:*'``.
+            count (int): Keys per ``SCAN`` and ``UNLINK`` command.
+
+        Returns:
+            int: The number of keys deleted.
+        """
+        if self.provider != "redis":
+            raise ValueError('Deleting keys by pattern requires the redis cache provider')
+        deleted = 0
+        batch = []
+        for key in self.client.scan_iter(match=pattern, count=count):
+            batch.append(key)
+            if len(batch) >= count:
+                deleted += self.client.unlink(*batch)
+                batch = []
+        if batch:
+            deleted += self.client.unlink(*batch)
+        if self.near is not None:
+            self.near.clear()
+            self._invalidation.publish()
+        return deleted
 
     def flush(self):
         """
         Flush all data from the cache.
+
+        On Redis only the database selected by the client is flushed, in the
+        background; other databases on the server, such as a task queue
+        broker's, are left alone. Prefer namespaces, tags or
+        ``delete_matching`` when the database holds anything besides this cache.
         """
         if self.provider == "redis":
-            self.client.flushall()
+            self.client.flushdb(asynchronous=True)
         elif self.provider == "memcached":
             self.client.flush_all()
+        if self.near is not None:
+            self.near.clear()
+            self._invalidation.publish()
+
+    def batcher(self, request=None, executor=None):
+        """
+        A ``CacheBatcher`` over this service.
+
+        Args:
+            request (Request): Share one batcher for the whole request, kept
+                on ``request.state``.
+            executor (concurrent.futures.Executor): Where ``get_async`` fetches
+                its batches. Defaults to the thread pool of the application
+                handling ``request``.
+
+        Returns:
+            CacheBatcher: The batcher.
+        """
+        if request is None:
+            return CacheBatcher(self, executor)
+        batchers = getattr(request.state, 'cache_batchers', None)
+        if batchers is None:
+            batchers = request.state.cache_batchers = {}
+        batcher = batchers.get(id(self))
+        if batcher is None:
+            if executor is None:
+                executor = request.environ.get(_EXECUTOR_ENVIRON_KEY)
+            batcher = batchers[id(self)] = CacheBatcher(self, executor)
+        return batcher
+
+    def _dump(self, value, tags=None, versions=None):
+        if self.codec is not None:
+            value = self.codec.encode(value)
+        if tags:
+            versions = self._versions(['tag:' + tag for tag in tags])
+        if versions:
+            if not isinstance(value, (bytes, bytearray)):
+                raise TypeError('Tagged values must be bytes unless the cache service has a codec')
+            value = _tag(versions, value)
+        return value
+
+    def _versions(self, names):
+        """
+        The current version of namespaces and tags, 0 for those never invalidated.
+
+        The counters are read like any other key, so with a near cache they
+        are usually served from memory and invalidated across processes.
+        """
+        keys = [VERSION_PREFIX + name for name in names]
+        near = self.near
+        epoch = near.epoch if near is not None else None
+        found = self.get_many(keys)
+        if near is not None:
+            # Counters never bumped are missing; remember them as 0 so they
+            # do not cost a round trip on every read
+            for key in keys:
+                if key not in found:
+                    near.set(key, b'0', epoch=epoch)
+        return {name: int(found.get(key) or 0) for name, key in zip(names, keys)}
+
+    def _chunks(self, items):
+        size = self.chunk_size
+        for start in range(0, len(items), size):
+            yield items[start:start + size]
+
+    def _invalidate(self, keys):
+        for key in keys:
+            self.near.invalidate(key)
+        self._invalidation.publish_many(keys)
+
+    def tier_stats(self):
+        """
+        Hits, misses and hit ratio of each tier.
+
+        Returns:
+            dict: ``l1`` for the near cache (only with one) and ``l2`` for the
+            shared cache, which only counts the lookups the near cache missed.
+        """
+        stats = {'l2': self.stats.as_dict()}
+        if self.near is not None:
+            stats['l1'] = self.near.stats.as_dict()
+        return stats
+
+    def close(self):
+        """
+        Stop receiving near cache invalidations and close the client.
+        """
+        if self._invalidation is not None:
+            self._invalidation.close()
+        close = getattr(self.client, 'close', None) or getattr(self.client, 'disconnect_all', None)
+        if close is not None:
+            close()
+
+
+class CacheNamespace:
+    def __init__(self, cache_service, name):
+        """
+        Initialize a namespace of a cache service.
+
+        Keys are stored as ``name:version:key``. ``invalidate`` bumps the
+        version, so every key of the namespace reads as missing at the cost
+        of one command; the old keys expire on their own, or can be reclaimed
+        at once with ``purge`` on Redis.
+
+        Args:
+            cache_service (CacheService): The cache service to store keys in.
+            name (str): The namespace name.
+        """
+        self.cache_service = cache_service
+        self.name = name
+        self._version_name = f'ns:{name}'
+
+    def prefix(self):
+        """
+        The prefix of the keys of the current version.
+        """
+        version = self.cache_service._versions([self._version_name])[self._version_name]
+        return f'{self.name}:{version}:'
+
+    def get(self, key):
+        return self.cache_service.get(self.prefix() + key)
+
+    def get_many(self, keys):
+        prefix = self.prefix()
+        found = self.cache_service.get_many([prefix + key for key in keys])
+        return {key[len(prefix):]: value for key, value in found.items()}
+
+    def set(self, key, value, expiration=3600, tags=None):
+        self.cache_service.set(self.prefix() + key, value, expiration, tags)
+
+    def set_many(self, mapping, expiration=3600, tags=None):
+        prefix = self.prefix()
+        self.cache_service.set_many({prefix + key: value for key, value in mapping.items()}, expiration, tags)
+
+    def delete(self, key):
+        self.cache_service.delete(self.prefix() + key)
+
+    def delete_many(self, keys):
+        prefix = self.prefix()
+        self.cache_service.delete_many([prefix + key for key in keys])
+
+    def incr(self, key, delta=1):
+        return self.cache_service.incr(self.prefix() + key, delta)
+
+    def invalidate(self):
+        """
+        Invalidate every key of the namespace.
+
+        Returns:
+            int: The new version.
+        """
+        return self.cache_service.incr(VERSION_PREFIX + self._version_name)
+
+    def purge(self, count=500):
+        """
+        Invalidate the namespace and delete its keys with ``SCAN`` and ``UNLINK``.
+
+        Returns:
+            int: The number of keys deleted.
+        """
+        self.invalidate()
+        # The version digit keeps namespaces such as 'users:admin' out of a purge of 'users'
+        return self.cache_service.delete_matching(_escape_pattern(self.name) + ':[0-9]*', count)
+
+
+class CacheRef:
+    __slots__ = ('batcher', 'key')
+
+    def __init__(self, batcher, key):
+        self.batcher = batcher
+        self.key = key
+
+    @property
+    def value(self):
+        return self.batcher.get(self.key)
+
+
+class CacheBatcher:
+    def __init__(self, cache_service, executor=None):
+        """
+        Initialize a batcher coalescing the reads of one request.
+
+        Keys passed to ``load`` are fetched together by the first ``get`` or
+        ``CacheRef.value`` that needs one of them, so code can ask for keys one
+        at a time and still make a single round trip. ``get_async`` calls made
+        by tasks running concurrently on the event loop are likewise fetched
+        with one ``get_many``. Values read or written through the batcher are
+        kept for its lifetime, so a key is read at most once per request.
+
+        Args:
+            cache_service (CacheService): The cache service to read from.
+            executor (concurrent.futures.Executor): Where ``get_async`` fetches
+                its batches, or None for the event loop's default executor.
+        """
+        self.cache_service = cache_service
+        self.executor = executor
+        # Keys waiting for the next batch, in order
+        self._pending = {}
+        self._values = {}
+        self._batch = None
+
+    def load(self, key):
+        """
+        Queue a key for the next batch.
+
+        Returns:
+            CacheRef: A reference whose ``value`` fetches the batch if needed.
+        """
+        if key not in self._values:
+            self._pending[key] = None
+        return CacheRef(self, key)
+
+    def get(self, key):
+        """
+        Get a value, fetching it along with every queued key.
+        """
+        try:
+            return self._values[key]
+        except KeyError:
+            pass
+        self._pending[key] = None
+        self.flush()
+        return self._values.get(key)
+
+    async def get_async(self, key):
+        """
+        Get a value, batched with the ``get_async`` calls of concurrent tasks.
+
+        The batch is fetched on the batcher's executor once the tasks ready
+        to run have queued their keys.
+        """
+        # Imported here so importing the cache service stays cheap
+        import asyncio
+        try:
+            return self._values[key]
+        except KeyError:
+            pass
+        self._pending[key] = None
+        batch = self._batch
+        if batch is None:
+            loop = asyncio.get_running_loop()
+            batch = self._batch = loop.create_future()
+            loop.call_soon(self._flush_async, loop, batch)
+        await asyncio.shield(batch)
+        return self._values.get(key)
+
+    def flush(self):
+        """
+        Fetch every queued key in one batch.
+        """
+        keys = list(self._pending)
+        self._pending.clear()
+        if keys:
+            self._store(keys, self.cache_service.get_many(keys))
+
+    def _flush_async(self, loop, batch):
+        self._batch = None
+        keys = list(self._pending)
+        self._pending.clear()
+        if not keys:
+            # A synchronous flush already fetched them
+            batch.set_result(None)
+            return
+        future = loop.run_in_executor(self.executor, self.cache_service.get_many, keys)
+        future.add_done_callback(lambda done: self._resolve(keys, batch, done))
+
+    def _resolve(self, keys, batch, done):
+        if done.exception() is not None:
+            batch.set_exception(done.exception())
+            return
+        self._store(keys, done.result())
+        batch.set_result(None)
+
+    def _store(self, keys, found):
+        for key in keys:
+            self._values[key] = found.get(key)
+
+    def set(self, key, value, expiration=3600):
+        self.cache_service.set(key, value, expiration)
+        self._values[key] = value
+
+    def delete(self, key):
+        self.cache_service.delete(key)
+        self._values[key] = None
@@ -1,19 +1,33 @@
-import boto3
-from google.cloud import storage
-from azure.storage.blob import BlobServiceClient
+from EasyAPI.utils.providers import ProviderRegistry
+
+# Each loader returns a function creating the provider's client from the credentials
+clients = ProviderRegistry('cloud storage provider')
+
+
+@clients.register('aws', package='boto3')
+def _aws():
+    import boto3
+    return lambda **credentials: boto3.client("s3", **credentials)
+
+
+@clients.register('gcp', package='google-cloud-storage')
+def _gcp():
+    from google.cloud import storage
+    return storage.Client
+
+
+@clients.register('azure', package='azure-storage-blob')
+def _azure():
+    from azure.storage.blob import BlobServiceClient
+    return BlobServiceClient
 
 
 class CloudStorageService:
     def __init__(self, provider, **credentials):
         self.provider = provider
-        if provider == "aws":
-            self.client = boto3.client("s3", **credentials)
-        elif provider == "gcp":
-            self.client = storage.Client(**credentials)
-        elif provider == "azure":
-            self.client = BlobServiceClient(**credentials)
-        else:
+        if provider not in clients:
             raise ValueError("Unsupported cloud storage provider")
+        self.client = clients.load(provider)(**credentials)
 
     def upload_file(self, bucket_name, file_path, object_name=None):
         if self.provider == "aws":
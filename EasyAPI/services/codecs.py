@@ -0,0 +1,288 @@
+import zlib
+import pickle
+import struct
+
+from EasyAPI.serializers import get_serializer
+from EasyAPI.utils.providers import ProviderRegistry
+
+# Optional libraries are imported the first time a value needs them
+libraries = ProviderRegistry('cache codec')
+
+
+@libraries.register('msgpack')
+def _msgpack():
+    import msgpack
+    return msgpack
+
+
+@libraries.register('numpy')
+def _numpy():
+    import numpy
+    return numpy
+
+
+@libraries.register('lz4')
+def _lz4():
+    import lz4.frame
+    return lz4.frame
+
+
+@libraries.register('zstd', package='zstandard')
+def _zstd():
+    import zstandard
+    return zstandard
+
+
+# Every encoded value starts with one header byte: the high bit marks it as
+# encoded, bits 4-6 hold the compressor id and bits 0-3 the codec id. Codec ids
+# start at 1, so 0x80, the first byte of any pickle, is never a header. Plain
+# values such as counters written by INCR start with an ASCII byte, and UTF-8
+# lead bytes (0xC2 and up) name no compressor, so both are returned as they are.
+_ENCODED = 0x80
+
+
+class RawCodec:
+    id = 1
+    name = 'raw'
+
+    def encode(self, value):
+        return bytes(value)
+
+    def decode(self, data):
+        return bytes(data)
+
+
+class PickleCodec:
+    id = 2
+    name = 'pickle'
+
+    def encode(self, value):
+        return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def decode(self, data):
+        return pickle.loads(data)
+
+
+class JSONCodec:
+    id = 3
+    name = 'json'
+
+    def encode(self, value):
+        return get_serializer().dumps(value)
+
+    def decode(self, data):
+        return get_serializer().loads(data)
+
+
+class MsgpackCodec:
+    id = 4
+    name = 'msgpack'
+
+    def __init__(self):
+        self.msgpack = libraries.load('msgpack')
+
+    def encode(self, value):
+        return self.msgpack.packb(value, use_bin_type=True)
+
+    def decode(self, data):
+        return self.msgpack.unpackb(data, raw=False)
+
+
+class NumpyCodec:
+    id = 5
+    name = 'numpy'
+
+    def __init__(self):
+        """
+        Initialize the codec for NumPy arrays.
+
+        Arrays are stored as their dtype, shape and raw buffer, without going
+        through pickle. Decoded arrays share the fetched buffer and are read-only.
+        """
+        self.numpy = libraries.load('numpy')
+
+    def encode(self, value):
+        value = self.numpy.ascontiguousarray(value)
+        dtype = value.dtype.str.encode('ascii')
+        head = struct.pack(f'<B{len(dtype)}sB{value.ndim}q', len(dtype), dtype, value.ndim, *value.shape)
+        return head + value.tobytes()
+
+    def decode(self, data):
+        data = memoryview(data)
+        length = data[0]
+        dtype = bytes(data[1:1 + length]).decode('ascii')
+        offset = 1 + length
+        ndim = data[offset]
+        shape = struct.unpack_from(f'<{ndim}q', data, offset + 1)
+        offset += 1 + 8 * ndim
+        return self.numpy.frombuffer(data[offset:], dtype=dtype).reshape(shape)
+
+
+class ZlibCompressor:
+    id = 1
+    name = 'zlib'
+
+    def __init__(self, level=None):
+        self.level = 6 if level is None else level
+
+    def compress(self, data):
+        return zlib.compress(data, self.level)
+
+    def decompress(self, data):
+        return zlib.decompress(data)
+
+
+class Lz4Compressor:
+    id = 2
+    name = 'lz4'
+
+    def __init__(self, level=None):
+        self.frame = libraries.load('lz4')
+        self.level = 0 if level is None else level
+
+    def compress(self, data):
+        return self.frame.compress(data, compression_level=self.level)
+
+    def decompress(self, data):
+        return self.frame.decompress(data)
+
+
+class ZstdCompressor:
+    id = 3
+    name = 'zstd'
+
+    def __init__(self, level=None):
+        zstandard = libraries.load('zstd')
+        self._compressor = zstandard.ZstdCompressor(level=3 if level is None else level)
+        self._decompressor = zstandard.ZstdDecompressor()
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def decompress(self, data):
+        return self._decompressor.decompress(data)
+
+
+CODECS = {codec.name: codec for codec in (RawCodec, PickleCodec, JSONCodec, MsgpackCodec, NumpyCodec)}
+COMPRESSORS = {compressor.name: compressor for compressor in (ZlibCompressor, Lz4Compressor, ZstdCompressor)}
+_CODEC_IDS = {codec.id: codec for codec in CODECS.values()}
+_COMPRESSOR_IDS = {compressor.id: compressor for compressor in COMPRESSORS.values()}
+
+
+def _is_ndarray(value):
+    # Checked by name so numpy is never imported for other values
+    cls = type(value)
+    return cls.__name__ == 'ndarray' and cls.__module__ == 'numpy'
+
+
+class ValueCodec:
+    def __init__(self, codec='pickle', compression='zlib', threshold=1024, level=None, accept=()):
+        """
+        Initialize the encoding of cached values.
+
+        Bytes are stored as they are and NumPy arrays with ``NumpyCodec``;
+        other values go through ``codec``. Encoded values of at least
+        ``threshold`` bytes are compressed, unless that does not make them
+        smaller. The header byte records both choices, so values written with
+        any compressor, or by code not using a codec at all, decode the same
+        way. Values written with another codec are only decoded when it is
+        listed in ``accept``, since anyone able to write to the cache could
+        otherwise have a JSON-configured service unpickle their values.
+
+        Args:
+            codec (str): ``'pickle'``, ``'json'`` or ``'msgpack'``.
+            compression (str): ``'zlib'``, ``'lz4'``, ``'zstd'`` or None.
+            threshold (int): Minimum encoded size in bytes worth compressing.
+            level (int): Compression level, or None for the compressor's default.
+            accept (tuple): Other codecs whose values are decoded, e.g.
+                ``('pickle',)`` while migrating from pickle to msgpack.
+        """
+        for name in (codec, *accept):
+            if name not in CODECS:
+                raise ValueError(f'Unknown cache codec: {name}')
+        if compression is not None and compression not in COMPRESSORS:
+            raise ValueError(f'Unknown cache compression: {compression}')
+        self.codec = CODECS[codec]()
+        self.compressor = COMPRESSORS[compression](level) if compression is not None else None
+        self.threshold = threshold
+        self._raw = RawCodec()
+        self._codecs = {self.codec.id: self.codec, self._raw.id: self._raw}
+        self._accepted = {CODECS[name].id for name in (*accept, 'numpy')} | set(self._codecs)
+        self._compressors = {self.compressor.id: self.compressor} if self.compressor is not None else {}
+
+    @classmethod
+    def coerce(cls, value):
+        """
+        Build a value codec from the ``codec`` argument of ``CacheService``.
+
+        Args:
+            value (ValueCodec|dict|str): A value codec, keyword arguments for
+                one, or a codec name.
+        """
+        if value is None or isinstance(value, cls):
+            return value
+        if isinstance(value, str):
+            return cls(value)
+        return cls(**value)
+
+    def encode(self, value):
+        """
+        Encode a value for the cache.
+
+        Returns:
+            bytes: The header byte followed by the payload.
+        """
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            codec = self._raw
+        elif _is_ndarray(value) and not value.dtype.hasobject:
+            codec = self._codec(NumpyCodec.id)
+        else:
+            codec = self.codec
+        payload = codec.encode(value)
+        compressor_id = 0
+        if self.compressor is not None and len(payload) >= self.threshold:
+            compressed = self.compressor.compress(payload)
+            if len(compressed) < len(payload):
+                payload = compressed
+                compressor_id = self.compressor.id
+        return bytes((_ENCODED | compressor_id << 4 | codec.id,)) + payload
+
+    def decode(self, data):
+        """
+        Decode a value read from the cache.
+
+        Values without a header, and None for missing keys, are returned as
+        they are. So are values whose first byte names no known codec or
+        compressor, such as UTF-8 text starting with a non-ASCII character.
+        """
+        if not data or not isinstance(data, (bytes, bytearray)) or data[0] <= _ENCODED:
+            return data
+        header = data[0]
+        compressor_id = (header >> 4) & 0x07
+        if header & 0x0F not in _CODEC_IDS or (compressor_id and compressor_id not in _COMPRESSOR_IDS):
+            return data
+        payload = memoryview(data)[1:]
+        if compressor_id:
+            payload = self._compressor(compressor_id).decompress(payload)
+        return self._codec(header & 0x0F).decode(payload)
+
+    def _codec(self, codec_id):
+        codec = self._codecs.get(codec_id)
+        if codec is None:
+            try:
+                cls = _CODEC_IDS[codec_id]
+            except KeyError:
+                raise ValueError(f'Unknown cache codec id: {codec_id}') from None
+            if codec_id not in self._accepted:
+                raise ValueError(f'Cache value encoded with {cls.name!r}, which this codec does not accept')
+            codec = self._codecs[codec_id] = cls()
+        return codec
+
+    def _compressor(self, compressor_id):
+        compressor = self._compressors.get(compressor_id)
+        if compressor is None:
+            try:
+                compressor = self._compressors[compressor_id] = _COMPRESSOR_IDS[compressor_id]()
+            except KeyError:
+                raise ValueError(f'Unknown cache compression id: {compressor_id}') from None
+        return compressor
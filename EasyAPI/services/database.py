@@ -1,10 +1,31 @@
-import sqlite3
-import pymongo
-import psycopg2
-import mysql.connector
-from pymongo import MongoClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from EasyAPI.utils.providers import ProviderRegistry
+
+# Database drivers are imported when a connector of their type first connects
+drivers = ProviderRegistry('database type')
+
+
+@drivers.register('sqlite')
+def _sqlite():
+    import sqlite3
+    return sqlite3.connect
+
+
+@drivers.register('postgresql', package='psycopg2')
+def _postgresql():
+    import psycopg2
+    return psycopg2.connect
+
+
+@drivers.register('mysql', package='mysql-connector-python')
+def _mysql():
+    import mysql.connector
+    return mysql.connector.connect
+
+
+@drivers.register('mongodb', package='pymongo')
+def _mongodb():
+    from pymongo import MongoClient
+    return MongoClient
 
 
 class DatabaseConnector:
@@ -13,18 +34,11 @@ class DatabaseConnector:
         self.connection_string = connection_string
 
     def connect(self):
-        if self.db_type == "sqlite":
-            return sqlite3.connect(self.connection_string)
-        elif self.db_type == "postgresql":
-            return psycopg2.connect(self.connection_string)
-        elif self.db_type == "mysql":
-            return mysql.connector.connect(self.connection_string)
-        elif self.db_type == "mongodb":
-            return MongoClient(self.connection_string)
-        elif self.db_type == "vector_db":
+        if self.db_type == "vector_db":
             return self._connect_vector_db()
-        else:
+        if self.db_type not in drivers:
             raise ValueError("Unsupported database type")
+        return drivers.load(self.db_type)(self.connection_string)
 
     def _connect_vector_db(self):
         # Placeholder for connecting to vector databases like Pinecone or Milvus
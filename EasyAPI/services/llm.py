@@ -1,15 +1,49 @@
 # This llm code came from databonsai and @alvin-r on github which was shown to me by a friend.
 
-from tenacity import retry, wait_exponential, stop_after_attempt
+from EasyAPI.utils.providers import ProviderRegistry
 from EasyAPI.utils.logs import logger
 from abc import ABC, abstractmethod
 from functools import wraps
 from typing import Optional
-from openai import OpenAI
-from groq import Groq
-import anthropic
 import os
 
+# Each SDK is imported when the first provider using it is created
+sdks = ProviderRegistry("LLM provider")
+
+
+@sdks.register("openai")
+def _openai():
+    from openai import OpenAI
+
+    return OpenAI
+
+
+@sdks.register("anthropic")
+def _anthropic():
+    import anthropic
+
+    return anthropic.Anthropic
+
+
+@sdks.register("groq")
+def _groq():
+    from groq import Groq
+
+    return Groq
+
+
+def _retry(method, self, *args, **kwargs):
+    # tenacity is only needed once a provider makes a request
+    from tenacity import retry, wait_exponential, stop_after_attempt
+
+    retry_decorator = retry(
+        wait=wait_exponential(
+            multiplier=self.multiplier, min=self.min_wait, max=self.max_wait
+        ),
+        stop=stop_after_attempt(self.max_tries),
+    )
+    return retry_decorator(method)(self, *args, **kwargs)
+
 
 class LLMProvider(ABC):
     @abstractmethod
@@ -82,7 +116,7 @@ class OpenAIProvider(LLMProvider):
             if not self.api_key:
                 raise ValueError("OpenAI API key not provided.")
         self.model = model
-        self.client = OpenAI(api_key=self.api_key)
+        self.client = sdks.load("openai")(api_key=self.api_key)
         try:
             self.client.models.retrieve(model)
         except Exception as e:
@@ -106,13 +140,7 @@ class OpenAIProvider(LLMProvider):
 
         @wraps(method)
         def wrapper(self, *args, **kwargs):
-            retry_decorator = retry(
-                wait=wait_exponential(
-                    multiplier=self.multiplier, min=self.min_wait, max=self.max_wait
-                ),
-                stop=stop_after_attempt(self.max_tries),
-            )
-            return retry_decorator(method)(self, *args, **kwargs)
+            return _retry(method, self, *args, **kwargs)
 
         return wrapper
 
@@ -195,7 +223,7 @@ class AnthropicProvider(LLMProvider):
             if not self.api_key:
                 raise ValueError("Anthropic API key not provided.")
         self.model = model
-        self.client = anthropic.Anthropic(api_key=self.api_key)
+        self.client = sdks.load("anthropic")(api_key=self.api_key)
         self.temperature = temperature
         self.input_tokens = 0
         self.output_tokens = 0
@@ -214,13 +242,7 @@ class AnthropicProvider(LLMProvider):
 
         @wraps(method)
         def wrapper(self, *args, **kwargs):
-            retry_decorator = retry(
-                wait=wait_exponential(
-                    multiplier=self.multiplier, min=self.min_wait, max=self.max_wait
-                ),
-                stop=stop_after_attempt(self.max_tries),
-            )
-            return retry_decorator(method)(self, *args, **kwargs)
+            return _retry(method, self, *args, **kwargs)
 
         return wrapper
 
@@ -307,7 +329,7 @@ class GroqProvider(LLMProvider):
             if not self.api_key:
                 raise ValueError("Groq API key not provided.")
         self.model = model
-        self.client = Groq(api_key=self.api_key)
+        self.client = sdks.load("groq")(api_key=self.api_key)
         self.temperature = temperature
         self.input_tokens = 0
         self.output_tokens = 0
@@ -326,13 +348,7 @@ class GroqProvider(LLMProvider):
 
         @wraps(method)
         def wrapper(self, *args, **kwargs):
-            retry_decorator = retry(
-                wait=wait_exponential(
-                    multiplier=self.multiplier, min=self.min_wait, max=self.max_wait
-                ),
-                stop=stop_after_attempt(self.max_tries),
-            )
-            return retry_decorator(method)(self, *args, **kwargs)
+            return _retry(method, self, *args, **kwargs)
 
         return wrapper
 
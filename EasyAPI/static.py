@@ -0,0 +1,212 @@
+import os
+import stat
+import posixpath
+import mimetypes
+from email.utils import formatdate, parsedate_to_datetime
+
+from EasyAPI.compression import parse_accept_encoding
+from EasyAPI.response import FileResponse, Response
+from EasyAPI.utils.lru import LRUCache
+
+# Precompressed siblings in order of preference, as (encoding, file suffix)
+PRECOMPRESSED = (('br', '.br'), ('gzip', '.gz'))
+
+
+def _parse_range(header, size):
+    """
+    Parse a single-range ``Range`` header.
+
+    Args:
+        header (str): The header value, e.g. ``bytes=0-499``.
+        size (int): The size of the file.
+
+    Returns:
+        tuple: ``(start, end)`` inclusive, ``None`` if the header should be
+        ignored, or ``False`` if the range cannot be satisfied.
+    """
+    unit, _, spec = header.partition('=')
+    if unit.strip().lower() != 'bytes' or ',' in spec:
+        # Multiple ranges are allowed to be answered with the full body
+        return None
+    start, sep, end = spec.strip().partition('-')
+    if not sep:
+        return None
+    try:
+        if start:
+            start = int(start)
+            end = int(end) if end else size - 1
+        else:
+            # Suffix range: the last N bytes
+            suffix = int(end)
+            if suffix <= 0:
+                return False
+            start = max(size - suffix, 0)
+            end = size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        return False
+    return start, min(end, size - 1)
+
+
+class StaticFiles:
+    def __init__(self, directory, max_age=3600, precompressed=True,
+                 cache_max_entries=512, cache_max_bytes=32 * 1024 * 1024,
+                 cache_max_file_size=256 * 1024):
+        """
+        Initialize the static file server.
+
+        Responses carry strong ETag and Last-Modified validators and answer
+        conditional requests with 304, single byte ranges with 206, and prefer
+        prebuilt ``.br``/``.gz`` siblings when the client accepts them. Small
+        files are kept in an in-memory LRU that is invalidated when the file's
+        modification time or size changes; larger files are sent with
+        ``FileResponse`` so the server can use ``sendfile``.
+
+        Args:
+            directory (str): The folder to serve files from.
+            max_age (int): ``Cache-Control`` max-age in seconds, or None to omit it.
+            precompressed (bool): Whether to look for ``.br``/``.gz`` siblings.
+            cache_max_entries (int): Maximum number of files kept in memory.
+            cache_max_bytes (int): Maximum total size of files kept in memory.
+            cache_max_file_size (int): Files larger than this are never kept in memory.
+        """
+        self.directory = os.path.abspath(directory)
+        self.max_age = max_age
+        self.precompressed = precompressed
+        self.cache_max_file_size = cache_max_file_size
+        # Entries are (version, content) where version is (mtime_ns, size)
+        self.cache = LRUCache(cache_max_entries, cache_max_bytes, sizeof=lambda entry: len(entry[1]))
+
+    def resolve(self, path):
+        """
+        Map a URL path to a file inside the static directory.
+
+        Args:
+            path (str): The path relative to the static folder.
+
+        Returns:
+            str: The absolute file path, or None if the path escapes the folder.
+        """
+        if '\x00' in path or '\\' in path:
+            return None
+        normalized = posixpath.normpath('/' + path).lstrip('/')
+        if not normalized or normalized == '.' or normalized.startswith('..'):
+            return None
+        return os.path.join(self.directory, *normalized.split('/'))
+
+    def _stat(self, path):
+        try:
+            st = os.stat(path)
+        except (OSError, ValueError):
+            return None
+        return st if stat.S_ISREG(st.st_mode) else None
+
+    def _select_variant(self, request, file_path, st):
+        if not self.precompressed:
+            return file_path, st, None
+        accept = request.headers.get('accept-encoding')
+        if not accept:
+            return file_path, st, None
+        accepted = parse_accept_encoding(accept)
+        for encoding, suffix in PRECOMPRESSED:
+            if encoding not in accepted:
+                continue
+            variant_st = self._stat(file_path + suffix)
+            # Ignore stale siblings left behind by an older build
+            if variant_st is not None and variant_st.st_mtime_ns >= st.st_mtime_ns:
+                return file_path + suffix, variant_st, encoding
+        return file_path, st, None
+
+    def _not_modified(self, request, etag, mtime):
+        if_none_match = request.headers.get('if-none-match')
+        if if_none_match is not None:
+            candidates = [tag.strip() for tag in if_none_match.split(',')]
+            return '*' in candidates or etag in candidates or ('W/' + etag) in candidates
+        if_modified_since = request.headers.get('if-modified-since')
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError, IndexError, OverflowError):
+                return False
+            return int(mtime) <= since
+        return False
+
+    def serve(self, request, path):
+        """
+        Serve a static file.
+
+        Args:
+            request (Request): The request object.
+            path (str): The path relative to the static folder.
+
+        Returns:
+            Response: The response, or None if there is no such file.
+        """
+        if request.method not in ('GET', 'HEAD'):
+            return None
+        file_path = self.resolve(path)
+        if file_path is None:
+            return None
+        st = self._stat(file_path)
+        if st is None:
+            return None
+
+        served_path, served_st, encoding = self._select_variant(request, file_path, st)
+        etag = f'"{st.st_mtime_ns:x}-{served_st.st_size:x}{"-" + encoding if encoding else ""}"'
+        last_modified = formatdate(st.st_mtime, usegmt=True)
+
+        content_type, _ = mimetypes.guess_type(file_path)
+        content_type = content_type or 'application/octet-stream'
+        if content_type.startswith('text/') or content_type in ('application/javascript', 'application/json'):
+            content_type += '; charset=utf-8'
+
+        headers = [
+            ('ETag', etag),
+            ('Last-Modified', last_modified),
+        ]
+        if self.max_age is not None:
+            headers.append(('Cache-Control', f'public, max-age={self.max_age}'))
+        if self.precompressed:
+            headers.append(('Vary', 'Accept-Encoding'))
+
+        if self._not_modified(request, etag, st.st_mtime):
+            return Response(b'', status='304 NOT MODIFIED', headers=headers)
+
+        headers.append(('Content-Type', content_type))
+        if encoding:
+            headers.append(('Content-Encoding', encoding))
+        else:
+            headers.append(('Accept-Ranges', 'bytes'))
+
+        size = served_st.st_size
+        status = '200 OK'
+        offset, length = 0, size
+        range_header = request.headers.get('range')
+        if range_header and not encoding:
+            if_range = request.headers.get('if-range')
+            if not if_range or if_range.strip() in (etag, last_modified):
+                byte_range = _parse_range(range_header, size)
+                if byte_range is False:
+                    headers.append(('Content-Range', f'bytes */{size}'))
+                    return Response(b'', status='416 RANGE NOT SATISFIABLE', headers=headers)
+                if byte_range is not None:
+                    start, end = byte_range
+                    offset, length = start, end - start + 1
+                    status = '206 PARTIAL CONTENT'
+                    headers.append(('Content-Range', f'bytes {start}-{end}/{size}'))
+
+        if size <= self.cache_max_file_size:
+            version = (served_st.st_mtime_ns, size)
+            entry = self.cache.get(served_path)
+            if entry is not None and entry[0] == version:
+                content = entry[1]
+            else:
+                with open(served_path, 'rb') as f:
+                    content = f.read()
+                self.cache.set(served_path, (version, content))
+            if status == '200 OK':
+                return Response(content, status=status, headers=headers)
+            return Response(memoryview(content)[offset:offset + length], status=status, headers=headers)
+
+        return FileResponse(served_path, status=status, headers=headers, offset=offset, length=length)
@@ -1,10 +1,261 @@
-# utils/logger.py
+import os
+import sys
+import time
+import uuid
+import queue
+import atexit
+import random
 import logging
+import datetime
+import threading
+from logging.handlers import QueueHandler, QueueListener
 
-# Configure the root logger
-logging.basicConfig(
-    level=logging.WARNING, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
+from EasyAPI.serializers import get_serializer
 
-# Create a global logger instance
+# Shared logger for the service modules
 logger = logging.getLogger(__name__)
+
+DEFAULT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Attributes every LogRecord has; anything else was passed through ``extra``
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'taskName'}
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    Queue handler that never blocks the logging thread.
+
+    Records are put on a bounded queue without waiting; when the queue is full
+    the record is dropped and counted instead. Formatting is left entirely to
+    the handlers on the listener thread.
+    """
+    def __init__(self, queue):
+        super().__init__(queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Records are consumed in-process, so they need not be made picklable
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Formatter writing one JSON object per record, including ``extra`` fields.
+    """
+    def format(self, record):
+        entry = {
+            'time': datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return get_serializer().dumps(entry).decode('utf-8')
+
+
+class LogPipeline:
+    def __init__(self, handlers, queue_size=10000):
+        """
+        Initialize a queue between loggers and the handlers that write records.
+
+        Args:
+            handlers (list): The handlers that format and write records on the
+                background thread.
+            queue_size (int): Maximum number of pending records. Further records
+                are dropped until the writer catches up.
+        """
+        self.handlers = list(handlers)
+        self.queue_size = queue_size
+        self.queue = queue.Queue(queue_size)
+        self.handler = DroppingQueueHandler(self.queue)
+        self.listener = None
+        self._pid = None
+
+    @property
+    def dropped(self):
+        """
+        int: Number of records dropped because the queue was full.
+        """
+        return self.handler.dropped
+
+    def start(self):
+        """
+        Start the background writer thread in this process.
+        """
+        self.listener = QueueListener(self.queue, *self.handlers, respect_handler_level=True)
+        self.listener.start()
+        self._pid = os.getpid()
+
+    def stop(self):
+        """
+        Write the pending records and stop the background thread.
+        """
+        if self.listener is not None and self._pid == os.getpid():
+            self.listener.stop()
+        self.listener = None
+        for handler in self.handlers:
+            handler.flush()
+
+    def _after_fork(self):
+        # Threads do not survive fork: give the child its own queue and writer
+        if self.listener is not None:
+            self.queue = queue.Queue(self.queue_size)
+            self.handler.queue = self.queue
+            self.start()
+
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+
+def setup_logging(level=logging.INFO, json=False, stream=None, handlers=None, queue_size=10000,
+                  logger_name='EasyAPI', fmt=DEFAULT_FORMAT):
+    """
+    Route the framework's log records through a non-blocking queue.
+
+    Records are enqueued on the calling thread and formatted and written by a
+    background thread, so logging never waits on a slow terminal or disk.
+    Worker processes forked afterwards get their own writer thread. Calling
+    this again replaces the previous configuration.
+
+    Args:
+        level (int): The level of the framework logger.
+        json (bool): Whether to write one JSON object per line.
+        stream (file): Where the default handler writes. Defaults to stderr.
+        handlers (list): Handlers to write records with, instead of the default one.
+        queue_size (int): Maximum number of pending records before records are dropped.
+        logger_name (str): The logger to configure. Other applications' and the
+            root logger's configuration is left alone.
+        fmt (str): The format of the default handler when ``json`` is False.
+
+    Returns:
+        LogPipeline: The running pipeline.
+    """
+    global _pipeline
+    if handlers is None:
+        handler = logging.StreamHandler(stream or sys.stderr)
+        handler.setFormatter(JSONFormatter() if json else logging.Formatter(fmt))
+        handlers = [handler]
+
+    with _pipeline_lock:
+        target = logging.getLogger(logger_name)
+        if _pipeline is not None:
+            target.removeHandler(_pipeline.handler)
+            _pipeline.stop()
+        _pipeline = LogPipeline(handlers, queue_size)
+        _pipeline.start()
+        target.addHandler(_pipeline.handler)
+        target.setLevel(level)
+        target.propagate = False
+    return _pipeline
+
+
+def shutdown_logging():
+    """
+    Flush and stop the pipeline started by ``setup_logging``.
+    """
+    if _pipeline is not None:
+        _pipeline.stop()
+
+
+def _after_fork():
+    if _pipeline is not None:
+        _pipeline._after_fork()
+
+
+os.register_at_fork(after_in_child=_after_fork)
+atexit.register(shutdown_logging)
+
+
+class AccessLogMiddleware:
+    def __init__(self, logger=None, sample_rate=1.0, route_sample_rates=None,
+                 request_id_header='X-Request-ID', slow_threshold=1.0):
+        """
+        Initialize the access log middleware.
+
+        Each logged request produces one record whose ``extra`` fields (request
+        ID, method, path, route, status, duration and response size) come out
+        as keys with ``JSONFormatter``. Busy routes can be sampled, while server
+        errors and slow requests are always logged. The request ID is taken
+        from ``request_id_header`` when the client sends one, stored as
+        ``request.state.request_id`` and echoed on the response.
+
+        Args:
+            logger (Logger): Where records go. Defaults to ``EasyAPI.access``.
+            sample_rate (float): Fraction of requests logged.
+            route_sample_rates (dict): Sample rate per route rule, overriding
+                ``sample_rate``. Routes can also set a ``log_sample_rate`` option.
+            request_id_header (str): The header carrying the request ID.
+            slow_threshold (float): Requests slower than this many seconds are
+                always logged. None disables this.
+        """
+        self.logger = logger or logging.getLogger('EasyAPI.access')
+        self.sample_rate = sample_rate
+        self.route_sample_rates = route_sample_rates or {}
+        self.request_id_header = request_id_header
+        self.environ_key = 'HTTP_' + request_id_header.upper().replace('-', '_')
+        self.slow_threshold = slow_threshold
+
+    def _sample_rate(self, route):
+        if route is None:
+            return self.sample_rate
+        rate = route.options.get('log_sample_rate')
+        if rate is None:
+            rate = self.route_sample_rates.get(route.path, self.sample_rate)
+        return rate
+
+    def around(self, request, call_next):
+        request_id = request.environ.get(self.environ_key) or uuid.uuid4().hex
+        request.state.request_id = request_id
+        start = time.perf_counter()
+        status = '500'
+        response = None
+        try:
+            response = call_next(request)
+            status = response.status[:3]
+            return response
+        except Exception as e:
+            status = str(getattr(e, 'code', 500))
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            if response is not None and hasattr(response, 'set_header'):
+                response.set_header(self.request_id_header, request_id)
+            self._log(request, response, request_id, status, duration)
+
+    def _log(self, request, response, request_id, status, duration):
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        route = request.route
+        always = status.startswith('5') or (self.slow_threshold is not None and duration >= self.slow_threshold)
+        if not always:
+            rate = self._sample_rate(route)
+            if rate < 1 and random.random() >= rate:
+                return
+        size = None
+        if response is not None and not getattr(response, 'is_streaming', True):
+            size = len(response.content)
+        duration_ms = round(duration * 1000, 3)
+        self.logger.info(
+            '%s %s %s %.1fms', request.method, request.path, status, duration_ms,
+            extra={
+                'request_id': request_id,
+                'method': request.method,
+                'path': request.path,
+                'route': route.path if route is not None else None,
+                'status': int(status) if status.isdigit() else status,
+                'duration_ms': duration_ms,
+                'response_bytes': size,
+                'client': request.environ.get('REMOTE_ADDR'),
+            },
+        )
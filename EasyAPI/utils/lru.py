@@ -0,0 +1,95 @@
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    def __init__(self, max_entries=1024, max_bytes=None, sizeof=len):
+        """
+        Initialize a thread-safe least-recently-used cache.
+
+        Args:
+            max_entries (int): Maximum number of entries.
+            max_bytes (int): Maximum total size of the entries, or None for no limit.
+            sizeof (function): Returns the size of a value, used with ``max_bytes``.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        """
+        Get a value and mark it as recently used.
+
+        Args:
+            key (hashable): The cache key.
+            default (object): Returned when the key is missing.
+
+        Returns:
+            object: The cached value or ``default``.
+        """
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """
+        Store a value, evicting the least recently used entries if needed.
+
+        Values larger than ``max_bytes`` are not stored.
+
+        Args:
+            key (hashable): The cache key.
+            value (object): The value to store.
+        """
+        size = self.sizeof(value) if self.max_bytes is not None else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = value
+            self._size += size
+            while len(self._entries) > self.max_entries or (
+                self.max_bytes is not None and self._size > self.max_bytes
+            ):
+                self._remove(next(iter(self._entries)))
+
+    def pop(self, key, default=None):
+        """
+        Remove a value from the cache.
+
+        Args:
+            key (hashable): The cache key.
+            default (object): Returned when the key is missing.
+
+        Returns:
+            object: The removed value or ``default``.
+        """
+        with self._lock:
+            if key not in self._entries:
+                return default
+            return self._remove(key)
+
+    def _remove(self, key):
+        value = self._entries.pop(key)
+        if self.max_bytes is not None:
+            self._size -= self.sizeof(value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
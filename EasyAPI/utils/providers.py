@@ -0,0 +1,72 @@
+import threading
+
+
+class ProviderRegistry:
+    def __init__(self, kind):
+        """
+        Initialize a registry of lazily loaded service backends.
+
+        Each backend is a loader function that imports its vendor SDK inside
+        the function body and returns what the service needs from it, so an
+        SDK is only imported once a service is created with its provider, and
+        importing a service module never pulls in every SDK it supports.
+
+        Args:
+            kind (str): What the providers are, used in error messages.
+        """
+        self.kind = kind
+        self._loaders = {}
+        self._loaded = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, name):
+        return name in self._loaders
+
+    def names(self):
+        return sorted(self._loaders)
+
+    def register(self, name, package=None):
+        """
+        Decorator registering the loader of a provider.
+
+        Args:
+            name (str): The provider name services are created with.
+            package (str): The pip package providing the SDK, for error
+                messages. Defaults to ``name``.
+        """
+        def decorator(loader):
+            self._loaders[name] = (loader, package or name)
+            return loader
+        return decorator
+
+    def load(self, name):
+        """
+        Run the loader of a provider, once per process.
+
+        Args:
+            name (str): The provider name.
+
+        Returns:
+            object: What the loader returned.
+
+        Raises:
+            ValueError: If no provider has this name.
+            ImportError: If the provider's SDK is not installed.
+        """
+        try:
+            return self._loaded[name]
+        except KeyError:
+            pass
+        try:
+            loader, package = self._loaders[name]
+        except KeyError:
+            raise ValueError(f'Unsupported {self.kind}: {name!r} (expected one of {", ".join(self.names())})') from None
+        with self._lock:
+            if name not in self._loaded:
+                try:
+                    self._loaded[name] = loader()
+                except ImportError as e:
+                    raise ImportError(
+                        f'The {name!r} {self.kind} requires the {package} package: pip install {package}'
+                    ) from e
+            return self._loaded[name]
@@ -0,0 +1,50 @@
+"""
+Run the EasyAPI benchmark suite.
+
+Usage:
+    python -m benchmarks                                  # run everything
+    python -m benchmarks -k routing                       # only cases whose name contains "routing"
+    python -m benchmarks --save benchmarks/baseline.json  # store a baseline
+    python -m benchmarks --compare benchmarks/baseline.json --threshold 0.15
+
+With ``--compare`` the exit status is 1 when any case is slower than the
+baseline by more than the threshold, so the run can gate CI.
+"""
+import sys
+import argparse
+
+from benchmarks import harness
+from benchmarks.cases import all_cases
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Run the EasyAPI benchmarks.')
+    parser.add_argument('-k', dest='filter', help='Only run cases whose name contains this string.')
+    parser.add_argument('--save', metavar='PATH', help='Write the results to a JSON baseline file.')
+    parser.add_argument('--compare', metavar='PATH', help='Compare the results against a JSON baseline file.')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Relative slowdown counted as a regression (default: 0.10).')
+    parser.add_argument('--min-time', type=float, default=0.2, help='Minimum seconds per repetition.')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of repetitions per case.')
+    args = parser.parse_args(argv)
+
+    cases = [case for case in all_cases() if not args.filter or args.filter in case.name]
+    document = harness.run(cases, min_time=args.min_time, repeat=args.repeat)
+
+    if args.save:
+        harness.save(document, args.save)
+        print(f'Saved results to {args.save}')
+
+    if args.compare:
+        rows = harness.compare(harness.load(args.compare), document, args.threshold)
+        print()
+        harness.print_comparison(rows)
+        regressions = [row[0] for row in rows if row[4]]
+        if regressions:
+            print(f'\n{len(regressions)} regression(s) above {args.threshold:.0%}: {", ".join(regressions)}')
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
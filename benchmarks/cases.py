@@ -0,0 +1,226 @@
+import io
+import os
+import atexit
+import shutil
+import logging
+import tempfile
+
+from EasyAPI.app import EasyAPI
+from EasyAPI.blueprint import Blueprint
+from EasyAPI.ratelimit import RateLimit, RateLimiter, TokenBucketLimiter
+from EasyAPI.request import Request
+from EasyAPI.response import JSONResponse, Response
+
+from benchmarks.harness import Benchmark
+
+# Route registration logs at INFO; keep it out of the timings
+logging.getLogger('EasyAPI').setLevel(logging.WARNING)
+
+
+def make_environ(path='/', method='GET', body=b'', headers=None, query=''):
+    environ = {
+        'PATH_INFO': path,
+        'REQUEST_METHOD': method,
+        'QUERY_STRING': query,
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '8000',
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(body),
+    }
+    if body:
+        environ['CONTENT_LENGTH'] = str(len(body))
+        environ['CONTENT_TYPE'] = 'application/json'
+    for name, value in (headers or {}).items():
+        environ['HTTP_' + name.upper().replace('-', '_')] = value
+    return environ
+
+
+def _start_response(status, headers, exc_info=None):
+    pass
+
+
+def drive(app, environ):
+    """
+    Send one request through ``wsgi_app`` and consume the body like a server would.
+    """
+    body = app.wsgi_app(environ, _start_response)
+    for _ in body:
+        pass
+    close = getattr(body, 'close', None)
+    if close is not None:
+        close()
+
+
+def _ok(request):
+    return Response('ok')
+
+
+def _item(request):
+    return Response(str(request.path_params['id']))
+
+
+def routing_app(count):
+    """
+    Build an app with ``count`` routes, half static and half parameterized.
+    """
+    app = EasyAPI()
+    for i in range(count // 2):
+        app.add_route(f'/section{i % 50}/page{i}', _ok)
+        app.add_route(f'/section{i % 50}/items{i}/<int:id>', _item)
+    app.finalize()
+    return app
+
+
+def routing_cases():
+    cases = []
+    for count in (10, 1000, 10000):
+        last = count // 2 - 1
+
+        def setup(count=count, last=last):
+            app = routing_app(count)
+            static = make_environ(f'/section{last % 50}/page{last}')
+            param = make_environ(f'/section{last % 50}/items{last}/42')
+            missing = make_environ('/nowhere/at/all')
+            return app, static, param, missing
+
+        cases.append(Benchmark(f'routing.static_{count}', lambda s: drive(s[0], s[1]), setup))
+        cases.append(Benchmark(f'routing.param_{count}', lambda s: drive(s[0], s[2]), setup))
+        cases.append(Benchmark(f'routing.miss_{count}', lambda s: drive(s[0], s[3]), setup))
+    return cases
+
+
+def request_cases():
+    headers = {f'X-Header-{i}': 'v' * 32 for i in range(100)}
+    body = b'{"items": [' + b','.join(b'{"id": %d, "name": "item"}' % i for i in range(30000)) + b']}'
+
+    def headers_setup():
+        return make_environ('/', headers=headers)
+
+    def build_headers(environ):
+        request = Request(environ)
+        request.headers.get('x-header-99')
+
+    def body_setup():
+        return make_environ('/', 'POST', body)
+
+    def parse_body(environ):
+        environ['wsgi.input'].seek(0)
+        Request(environ).json
+
+    return [
+        Benchmark('request.construct', lambda e: Request(e), headers_setup),
+        Benchmark('request.headers_100', build_headers, headers_setup),
+        Benchmark(f'request.json_{len(body) // 1024}k', parse_body, body_setup),
+    ]
+
+
+def middleware_cases():
+    cases = []
+    for depth in (0, 5, 20):
+        def setup(depth=depth):
+            app = EasyAPI()
+            app.add_route('/', _ok)
+            for _ in range(depth):
+                app.before_request(lambda request: None)
+                app.after_request(lambda request, response: response)
+                app.around_request(lambda request, call_next: call_next(request))
+            app.finalize()
+            return app, make_environ('/')
+
+        cases.append(Benchmark(f'middleware.depth_{depth}', lambda s: drive(*s), setup))
+    return cases
+
+
+def response_cases():
+    small = 'hello world'
+    large = 'x' * (1024 * 1024)
+    payload = {'items': [{'id': i, 'name': 'item', 'tags': ['a', 'b']} for i in range(1000)]}
+
+    def encode(response):
+        for _ in response({}, _start_response):
+            pass
+
+    return [
+        Benchmark('response.text_small', lambda: encode(Response(small))),
+        Benchmark('response.text_1m', lambda: encode(Response(large))),
+        Benchmark('response.json_1000', lambda: encode(JSONResponse(payload))),
+    ]
+
+
+def static_cases():
+    directory = tempfile.mkdtemp(prefix='easyapi-bench-')
+    atexit.register(shutil.rmtree, directory, ignore_errors=True)
+    with open(os.path.join(directory, 'small.css'), 'w') as f:
+        f.write('body { color: black; }\n' * 200)
+    with open(os.path.join(directory, 'large.bin'), 'wb') as f:
+        f.write(os.urandom(4 * 1024 * 1024))
+
+    def setup():
+        app = EasyAPI()
+        app.set_static_folder(directory)
+        app.finalize()
+        etag = app.static_files.serve(Request(make_environ('/static/small.css')), 'small.css').get_header('ETag')
+        return app, etag
+
+    return [
+        Benchmark('static.small_cached', lambda s: drive(s[0], make_environ('/static/small.css')), setup),
+        Benchmark('static.not_modified', lambda s: drive(
+            s[0], make_environ('/static/small.css', headers={'If-None-Match': s[1]})), setup),
+        Benchmark('static.large_file', lambda s: drive(s[0], make_environ('/static/large.bin')), setup),
+    ]
+
+
+def blueprint_cases():
+    def register():
+        app = EasyAPI()
+        blueprint = Blueprint()
+        for i in range(100):
+            blueprint.route(f'/items{i}/<int:id>')(_item)
+        app.register_blueprint(blueprint, url_prefix='/api')
+        app.finalize()
+
+    def mounted():
+        app = EasyAPI()
+        api = Blueprint('api')
+        api.before_request(lambda request: None)
+        for i in range(100):
+            api.route(f'/items{i}/<int:id>')(_item)
+        health = Blueprint('health')
+        health.route('/')(_ok)
+        app.register_blueprint(api, url_prefix='/api/v1')
+        app.register_blueprint(health, url_prefix='/api/v1/health')
+        app.finalize()
+        return app
+
+    return [
+        Benchmark('blueprint.register_100', register),
+        Benchmark('blueprint.dispatch', lambda app: drive(app, make_environ('/api/v1/items50/7')), mounted),
+        Benchmark('blueprint.dispatch_nested_prefix', lambda app: drive(app, make_environ('/api/v1/health')), mounted),
+    ]
+
+
+def ratelimit_cases():
+    def limiter_setup():
+        # Enough tokens that the benchmark measures decisions, not denials
+        return TokenBucketLimiter(), RateLimit(10 ** 9, 1)
+
+    def app_setup():
+        app = EasyAPI()
+        app.use_middleware(RateLimiter())
+        app.add_route('/', _ok, rate_limit=RateLimit(10 ** 9, 1))
+        app.finalize()
+        environ = make_environ('/')
+        environ['REMOTE_ADDR'] = '10.0.0.1'
+        return app, environ
+
+    return [
+        Benchmark('ratelimit.token_bucket', lambda s: s[0].hit('/:10.0.0.1', s[1]), limiter_setup),
+        Benchmark('ratelimit.request', lambda s: drive(*s), app_setup),
+    ]
+
+
+def all_cases():
+    return (
+        routing_cases() + request_cases() + middleware_cases()
+        + response_cases() + static_cases() + blueprint_cases() + ratelimit_cases()
+    )
@@ -0,0 +1,155 @@
+import gc
+import sys
+import json
+import time
+import platform
+import statistics
+
+
+class Benchmark:
+    def __init__(self, name, func, setup=None, group=None):
+        """
+        Initialize a benchmark case.
+
+        Args:
+            name (str): The unique name results are stored under.
+            func (function): The operation to time, called without arguments.
+                If ``setup`` is given, ``func`` is called with its return value.
+            setup (function): Called once before timing; its result is passed to ``func``.
+            group (str): Name used to filter and group cases on the command line.
+        """
+        self.name = name
+        self.func = func
+        self.setup = setup
+        self.group = group or name.split('.')[0]
+
+
+def _time(func, number):
+    start = time.perf_counter_ns()
+    for _ in range(number):
+        func()
+    return time.perf_counter_ns() - start
+
+
+def measure(benchmark, min_time=0.2, repeat=5):
+    """
+    Time a benchmark.
+
+    The number of calls per repetition is calibrated so one repetition takes
+    at least ``min_time`` seconds; the median of the repetitions is reported,
+    which is less sensitive to outliers than the mean.
+
+    Args:
+        benchmark (Benchmark): The case to run.
+        min_time (float): Minimum duration of one repetition in seconds.
+        repeat (int): Number of timed repetitions.
+
+    Returns:
+        dict: ``ns_per_op`` (median), ``min_ns_per_op``, ``stdev_ns`` and ``number``.
+    """
+    func = benchmark.func
+    if benchmark.setup is not None:
+        state = benchmark.setup()
+        inner = func
+        func = lambda: inner(state)
+
+    number = 1
+    while True:
+        elapsed = _time(func, number)
+        if elapsed >= min_time * 1e9 or number >= 1 << 24:
+            break
+        number *= 10 if elapsed < min_time * 1e8 else 2
+
+    gc_enabled = gc.isenabled()
+    gc.collect()
+    gc.disable()
+    try:
+        samples = [_time(func, number) / number for _ in range(repeat)]
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return {
+        'ns_per_op': statistics.median(samples),
+        'min_ns_per_op': min(samples),
+        'stdev_ns': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        'number': number,
+    }
+
+
+def run(benchmarks, min_time=0.2, repeat=5, out=sys.stdout):
+    """
+    Run benchmarks and collect their results.
+
+    Args:
+        benchmarks (list): The ``Benchmark`` cases.
+        min_time (float): Minimum duration of one repetition in seconds.
+        repeat (int): Number of timed repetitions.
+        out (file): Where progress is written, or None for silence.
+
+    Returns:
+        dict: The results document, as stored in baseline files.
+    """
+    results = {}
+    for benchmark in benchmarks:
+        result = measure(benchmark, min_time, repeat)
+        results[benchmark.name] = result
+        if out is not None:
+            out.write(f'{benchmark.name:<40} {format_ns(result["ns_per_op"]):>12}/op'
+                      f'  (±{format_ns(result["stdev_ns"])}, {result["number"]} loops)\n')
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+
+
+def format_ns(ns):
+    for unit, scale in (('s', 1e9), ('ms', 1e6), ('us', 1e3)):
+        if ns >= scale:
+            return f'{ns / scale:.2f}{unit}'
+    return f'{ns:.0f}ns'
+
+
+def save(document, path):
+    with open(path, 'w') as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(baseline, current, threshold=0.10):
+    """
+    Compare results against a baseline.
+
+    Args:
+        baseline (dict): The baseline results document.
+        current (dict): The new results document.
+        threshold (float): Relative slowdown, e.g. 0.10 for 10%, above which a
+            case counts as a regression.
+
+    Returns:
+        list: ``(name, baseline_ns, current_ns, ratio, regressed)`` for every
+        case present in both documents.
+    """
+    rows = []
+    for name, result in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            continue
+        ratio = result['ns_per_op'] / base['ns_per_op'] if base['ns_per_op'] else 1.0
+        rows.append((name, base['ns_per_op'], result['ns_per_op'], ratio, ratio > 1 + threshold))
+    return rows
+
+
+def print_comparison(rows, out=sys.stdout):
+    for name, base, current, ratio, regressed in rows:
+        flag = '  REGRESSION' if regressed else ''
+        out.write(f'{name:<40} {format_ns(base):>12} -> {format_ns(current):>12}  {ratio:6.2f}x{flag}\n')
@@ -0,0 +1,107 @@
+"""
+Check the import time of EasyAPI modules against a budget.
+
+Usage:
+    python -m benchmarks.startup               # check every budget
+    python -m benchmarks.startup --repeat 10   # more runs per module
+
+Each module is imported in a fresh interpreter, since anything already in
+``sys.modules`` would make the import free. The exit status is 1 when a module
+takes longer than its budget or imports a vendor SDK, which service modules
+must only import once a provider that needs it is chosen.
+"""
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+# Seconds allowed for importing each module in a fresh interpreter
+BUDGETS = {
+    'EasyAPI.app': 0.25,
+    'EasyAPI.services.cache': 0.1,
+    'EasyAPI.services.cloud_storage': 0.1,
+    'EasyAPI.services.database': 0.1,
+    'EasyAPI.services.llm': 0.1,
+}
+
+# Top-level packages only imported by the providers that need them
+VENDOR_MODULES = (
+    'anthropic', 'azure', 'boto3', 'brotli', 'google.cloud', 'groq', 'lz4', 'memcache',
+    'msgpack', 'mysql', 'numpy', 'openai', 'psycopg2', 'pymongo', 'redis', 'sqlalchemy',
+    'sqlite3', 'tenacity', 'zstandard',
+)
+
+_PROBE = """
+import sys, json, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+vendors = [name for name in {vendors!r} if name in sys.modules]
+print(json.dumps({{'seconds': elapsed, 'vendors': vendors}}))
+"""
+
+
+def measure_import(module, repeat=5):
+    """
+    Time the import of a module in fresh interpreters.
+
+    Args:
+        module (str): The dotted module name.
+        repeat (int): Number of interpreters to start.
+
+    Returns:
+        dict: ``seconds`` (median), ``min_seconds`` and ``vendors``, the
+        vendor modules the import pulled in.
+    """
+    samples = []
+    vendors = set()
+    code = _PROBE.format(module=module, vendors=VENDOR_MODULES)
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, '-c', code], capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output.splitlines()[-1])
+        samples.append(result['seconds'])
+        vendors.update(result['vendors'])
+    return {'seconds': statistics.median(samples), 'min_seconds': min(samples), 'vendors': sorted(vendors)}
+
+
+def check(budgets=None, repeat=5, out=sys.stdout):
+    """
+    Measure every module with a budget and print a table.
+
+    Returns:
+        list: The names of the modules over budget or importing vendor SDKs.
+    """
+    budgets = budgets if budgets is not None else BUDGETS
+    failures = []
+    print(f'{"module":<36} {"import":>10} {"budget":>10}', file=out)
+    for module, budget in budgets.items():
+        result = measure_import(module, repeat)
+        over = result['seconds'] > budget or result['vendors']
+        note = ''
+        if result['vendors']:
+            note = '  imports ' + ', '.join(result['vendors'])
+        elif over:
+            note = '  over budget'
+        print(f'{module:<36} {result["seconds"] * 1000:>8.1f}ms {budget * 1000:>8.1f}ms{note}', file=out)
+        if over:
+            failures.append(module)
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.startup',
+                                     description='Check EasyAPI import times against their budgets.')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of fresh interpreters per module.')
+    args = parser.parse_args(argv)
+    failures = check(repeat=args.repeat)
+    if failures:
+        print(f'\n{len(failures)} module(s) over budget or importing vendor SDKs: {", ".join(failures)}')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,4 +1,4 @@
-from EasyAPI import routes
+from EasyAPI import routes as handlers
 from EasyAPI.app import EasyAPI
 from EasyAPI.response import Response
 from EasyAPI.middleware import log_request, add_custom_header
@@ -46,88 +46,64 @@ app.set_static_folder("static")
 
 # Advanced Usage
 
-# Initialize services
-oauth_service = OAuthService(
-    provider="google",
-    client_id="your-client-id",
-    client_secret="your-client-secret",
-    redirect_uri="http://localhost:5000/callback",
-)
+# Register services once; handlers receive them by parameter name
+app = EasyAPI()
 
-payment_service = StripePaymentService(api_key="your-stripe-api-key")
+app.register_service(
+    "oauth_service",
+    lambda: OAuthService(
+        provider="google",
+        client_id="your-client-id",
+        client_secret="your-client-secret",
+        redirect_uri="http://localhost:5000/callback",
+    ),
+)
 
-cache_service = CacheService(provider="redis", host="localhost", port=6379, db=0)
+app.register_service(
+    "payment_service", lambda: StripePaymentService(api_key="your-stripe-api-key")
+)
 
-task_queue_service = TaskQueueService(
-    broker_url="redis://localhost:6379/0", backend_url="redis://localhost:6379/1"
+# Connection-holding services are created in each worker after fork
+app.register_service(
+    "cache_service",
+    lambda: CacheService(provider="redis", host="localhost", port=6379, db=0),
+    scope="worker",
+    on_shutdown=lambda cache: cache.client.close(),
 )
 
-app = EasyAPI()
+app.register_service(
+    "task_queue_service",
+    lambda: TaskQueueService(
+        broker_url="redis://localhost:6379/0", backend_url="redis://localhost:6379/1"
+    ),
+    scope="worker",
+)
 
-# Register routes with their respective services
-app.add_route("/", lambda req: routes.get_home(req))
+# Register routes; services are injected into the handlers' extra parameters
+app.add_route("/", handlers.get_home)
 
 # OAuth routes
-app.add_route(
-    "/login", lambda req: routes.get_login(req, oauth_service), methods=["GET"]
-)
-app.add_route(
-    "/callback", lambda req: routes.get_callback(req, oauth_service), methods=["GET"]
-)
-app.add_route(
-    "/refresh_token",
-    lambda req: routes.post_refresh_token(req, oauth_service),
-    methods=["POST"],
-)
+app.add_route("/login", handlers.get_login, methods=["GET"])
+app.add_route("/callback", handlers.get_callback, methods=["GET"])
+app.add_route("/refresh_token", handlers.post_refresh_token, methods=["POST"])
 
 # Payment routes
-app.add_route(
-    "/create_payment",
-    lambda req: routes.post_create_payment(req, payment_service),
-    methods=["POST"],
-)
-app.add_route(
-    "/create_subscription",
-    lambda req: routes.post_create_subscription(req, payment_service),
-    methods=["POST"],
-)
-app.add_route(
-    "/create_customer",
-    lambda req: routes.post_create_customer(req, payment_service),
-    methods=["POST"],
-)
-app.add_route(
-    "/webhook",
-    lambda req: routes.post_handle_webhook(req, payment_service),
-    methods=["POST"],
-)
+app.add_route("/create_payment", handlers.post_create_payment, methods=["POST"])
+app.add_route("/create_subscription", handlers.post_create_subscription, methods=["POST"])
+app.add_route("/create_customer", handlers.post_create_customer, methods=["POST"])
+app.add_route("/webhook", handlers.post_handle_webhook, methods=["POST"])
 
 # Cache routes
-app.add_route(
-    "/cached_data",
-    lambda req: routes.get_cached_data(req, cache_service),
-    methods=["GET"],
-)
-app.add_route(
-    "/clear_cache",
-    lambda req: routes.post_clear_cache(req, cache_service),
-    methods=["POST"],
-)
+app.add_route("/cached_data", handlers.get_cached_data, methods=["GET"])
+app.add_route("/clear_cache", handlers.post_clear_cache, methods=["POST"])
 
 # Task queue routes
-app.add_route(
-    "/start_task",
-    lambda req: routes.post_start_task(req, task_queue_service),
-    methods=["POST"],
-)
-app.add_route(
-    "/task_result",
-    lambda req: routes.get_task_result(req, task_queue_service),
-    methods=["GET"],
-)
+app.add_route("/start_task", handlers.post_start_task, methods=["POST"])
+app.add_route("/task_result", handlers.get_task_result, methods=["GET"])
 
-# Static files
-app.add_route("/static/<path:path>", lambda req: routes.get_static_file(req, app))
+# Static files; the application itself is available as the "app" service
+app.set_static_folder("static")
+app.add_route("/static/<path:path>", handlers.get_static_file)
 
 if __name__ == "__main__":
     app.run()
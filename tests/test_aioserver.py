@@ -0,0 +1,161 @@
+import time
+import socket
+import threading
+import http.client
+import unittest
+from EasyAPI.aioserver import AsyncHTTPServer
+from EasyAPI.app import EasyAPI
+from EasyAPI.response import FileResponse, Response, StreamingResponse
+from EasyAPI.server import create_listener
+
+
+class TestAsyncHTTPServer(unittest.TestCase):
+
+    def setUp(self):
+        self.app = EasyAPI(thread_pool_size=2, max_body_size=1024)
+        self.app.add_route('/', lambda request: Response("Welcome Home!"))
+        self.app.add_route('/echo', lambda request: Response(request.body), methods=['POST'])
+        self.app.add_route('/stream', lambda request: StreamingResponse(iter([b'a', b'b', b'c'])))
+        self.app.add_route('/file', lambda request: FileResponse(__file__, offset=10))
+
+        async def hello(request):
+            return Response(f"hello {request.path_params['name']}")
+
+        self.app.add_route('/hello/<str:name>', hello)
+        self.server = AsyncHTTPServer(self.app, create_listener('127.0.0.1', 0), header_timeout=0.5)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+        self.server.wait_ready(5)
+        self.port = self.server.socket.getsockname()[1]
+
+    def tearDown(self):
+        self.server.drain()
+        self.thread.join(5)
+        self.server.socket.close()
+
+    def connect(self):
+        return http.client.HTTPConnection('127.0.0.1', self.port, timeout=5)
+
+    def raw(self, data):
+        sock = socket.create_connection(('127.0.0.1', self.port), timeout=5)
+        sock.sendall(data)
+        received = b''
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            received += chunk
+        sock.close()
+        return received
+
+    def test_keep_alive(self):
+        conn = self.connect()
+        conn.request('GET', '/')
+        first = conn.getresponse()
+        self.assertEqual(first.read(), b"Welcome Home!")
+        self.assertEqual(first.getheader('Content-Length'), '13')
+        sock = conn.sock
+
+        conn.request('POST', '/echo', body=b'ping')
+        self.assertEqual(conn.getresponse().read(), b"ping")
+        conn.request('GET', '/hello/world')
+        self.assertEqual(conn.getresponse().read(), b"hello world")
+        conn.request('GET', '/missing')
+        self.assertEqual(conn.getresponse().status, 404)
+        self.assertIs(conn.sock, sock)
+        conn.close()
+
+    def test_pipelining(self):
+        received = self.raw(
+            b'GET / HTTP/1.1\r\nHost: x\r\n\r\n'
+            b'POST /echo HTTP/1.1\r\nHost: x\r\nContent-Length: 4\r\n\r\npong'
+            b'GET /hello/pipe HTTP/1.1\r\nHost: x\r\nConnection: close\r\n\r\n'
+        )
+        self.assertEqual(received.count(b'HTTP/1.1 200 OK'), 3)
+        first = received.index(b'Welcome Home!')
+        self.assertLess(first, received.index(b'pong'))
+        self.assertLess(received.index(b'pong'), received.index(b'hello pipe'))
+        self.assertIn(b'Connection: close', received)
+
+    def test_chunked_request_and_response(self):
+        received = self.raw(
+            b'POST /echo HTTP/1.1\r\nHost: x\r\nTransfer-Encoding: chunked\r\n\r\n'
+            b'3\r\nabc\r\n4;ext=1\r\ndefg\r\n0\r\n\r\n'
+            b'GET /stream HTTP/1.1\r\nHost: x\r\nConnection: close\r\n\r\n'
+        )
+        self.assertIn(b'content-length: 7\r\n\r\nabcdefg', received)
+        self.assertIn(b'transfer-encoding: chunked', received)
+        self.assertTrue(received.endswith(b'1\r\na\r\n1\r\nb\r\n1\r\nc\r\n0\r\n\r\n'))
+
+    def test_body_limits(self):
+        conn = self.connect()
+        conn.request('POST', '/echo', body=b'x' * 2048)
+        response = conn.getresponse()
+        response.read()
+        self.assertEqual(response.status, 413)
+        conn.request('GET', '/')
+        self.assertEqual(conn.getresponse().read(), b"Welcome Home!")
+        conn.close()
+
+        received = self.raw(
+            b'POST /echo HTTP/1.1\r\nHost: x\r\nTransfer-Encoding: chunked\r\n\r\n'
+            + b'800\r\n' + b'x' * 2048 + b'\r\n0\r\n\r\n'
+        )
+        self.assertTrue(received.startswith(b'HTTP/1.1 413 '))
+        self.assertIn(b'Connection: close', received)
+
+    def test_file_and_head(self):
+        with open(__file__, 'rb') as f:
+            expected = f.read()[10:]
+        conn = self.connect()
+        conn.request('GET', '/file')
+        self.assertEqual(conn.getresponse().read(), expected)
+        conn.request('HEAD', '/')
+        response = conn.getresponse()
+        self.assertEqual(response.getheader('Content-Length'), '13')
+        self.assertEqual(response.read(), b'')
+        conn.request('GET', '/')
+        self.assertEqual(conn.getresponse().read(), b"Welcome Home!")
+        conn.close()
+
+    def test_malformed_requests(self):
+        self.assertTrue(self.raw(b'NONSENSE\r\n\r\n').startswith(b'HTTP/1.1 400 '))
+        self.assertTrue(self.raw(b'GET / HTTP/2.0\r\n\r\n').startswith(b'HTTP/1.1 505 '))
+        smuggled = self.raw(
+            b'POST /echo HTTP/1.1\r\nContent-Length: 3\r\nTransfer-Encoding: chunked\r\n\r\n0\r\n\r\n'
+        )
+        self.assertTrue(smuggled.startswith(b'HTTP/1.1 400 '))
+
+    def test_header_timeout(self):
+        self.assertTrue(self.raw(b'GET / HTTP/1.1\r\nHost: x\r\n').startswith(b'HTTP/1.1 408 '))
+
+
+class TestGracefulTimeout(unittest.TestCase):
+
+    def test_drain_closes_connections_after_graceful_timeout(self):
+        app = EasyAPI()
+        app.add_route('/', lambda request: Response("Welcome Home!"))
+        server = AsyncHTTPServer(app, create_listener('127.0.0.1', 0), header_timeout=30, graceful_timeout=0.2)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        server.wait_ready(5)
+        # A half-sent request head keeps the connection busy until the header timeout
+        sock = socket.create_connection(server.socket.getsockname()[:2], timeout=5)
+        try:
+            sock.sendall(b'GET / HTTP/1.1\r\n')
+            while not any(not connection.idle for connection in server.connections):
+                time.sleep(0.01)
+            server.drain()
+            thread.join(5)
+            self.assertFalse(thread.is_alive())
+            try:
+                self.assertEqual(sock.recv(1024), b'')
+            except ConnectionResetError:
+                pass
+        finally:
+            sock.close()
+            server.socket.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -37,5 +37,21 @@ class TestEasyAPI(unittest.TestCase):
 
         self.assertEqual(response[0], b"404 Not Found")
 
+    def test_body_too_large(self):
+        app = EasyAPI(max_body_size=4)
+        app.add_route('/upload', lambda request: Response(request.body), methods=['POST'])
+        statuses = []
+        environ = {
+            'PATH_INFO': '/upload',
+            'REQUEST_METHOD': 'POST',
+            'QUERY_STRING': '',
+            'CONTENT_LENGTH': '1000',
+            'wsgi.input': None,
+        }
+        response = app(environ, lambda status, headers: statuses.append(status))
+
+        self.assertEqual(statuses, ['413 REQUEST ENTITY TOO LARGE'])
+        self.assertEqual(response[0], b"Request Entity Too Large")
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,94 @@
+import asyncio
+import unittest
+from EasyAPI.app import EasyAPI
+from EasyAPI.response import Response
+
+
+def run_asgi(app, path, method='GET', body=b'', headers=None):
+    scope = {
+        'type': 'http',
+        'method': method,
+        'path': path,
+        'query_string': b'',
+        'headers': headers or [],
+    }
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    return sent
+
+
+class TestASGI(unittest.TestCase):
+
+    def setUp(self):
+        self.app = EasyAPI(thread_pool_size=2)
+
+    def tearDown(self):
+        self.app.shutdown()
+
+    def test_sync_handler(self):
+        self.app.add_route('/', lambda request: Response("Welcome Home!"))
+        sent = run_asgi(self.app, '/')
+        self.assertEqual(sent[0]['status'], 200)
+        self.assertIn((b'content-type', b'text/html'), sent[0]['headers'])
+        self.assertEqual(b''.join(m.get('body', b'') for m in sent[1:]), b"Welcome Home!")
+
+    def test_async_handler_with_body(self):
+        async def echo(request):
+            await asyncio.sleep(0)
+            return Response(f"echo {request.body}")
+
+        self.app.add_route('/echo', echo, methods=['POST'])
+        sent = run_asgi(self.app, '/echo', method='POST', body=b'hi',
+                        headers=[(b'content-type', b'text/plain')])
+        self.assertEqual(b''.join(m.get('body', b'') for m in sent[1:]), b"echo hi")
+
+    def test_not_found(self):
+        sent = run_asgi(self.app, '/missing')
+        self.assertEqual(sent[0]['status'], 404)
+
+    def test_async_handler_over_wsgi(self):
+        async def home(request):
+            return Response("async over wsgi")
+
+        self.app.add_route('/', home)
+        environ = {
+            'PATH_INFO': '/',
+            'REQUEST_METHOD': 'GET',
+            'QUERY_STRING': '',
+            'wsgi.input': None,
+        }
+        response = self.app(environ, lambda status, headers: None)
+        self.assertEqual(response[0], b"async over wsgi")
+
+    def test_lifespan(self):
+        events = []
+        self.app.on_startup(lambda: events.append('startup'))
+
+        @self.app.on_shutdown
+        async def close():
+            events.append('shutdown')
+
+        messages = [{'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message['type'])
+
+        asyncio.run(self.app({'type': 'lifespan'}, receive, send))
+        self.assertEqual(events, ['startup', 'shutdown'])
+        self.assertEqual(sent, ['lifespan.startup.complete', 'lifespan.shutdown.complete'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import io
+import os
+import json
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from benchmarks import harness
+from benchmarks.__main__ import main
+from benchmarks.harness import Benchmark
+
+
+def document(**results):
+    return {'meta': {}, 'results': {name: {'ns_per_op': ns} for name, ns in results.items()}}
+
+
+class TestBenchmarkHarness(unittest.TestCase):
+
+    def test_measure(self):
+        calls = []
+        result = harness.measure(Benchmark('noop', calls.append, setup=lambda: 1), min_time=0.001, repeat=2)
+        self.assertGreater(result['number'], 0)
+        self.assertGreater(result['ns_per_op'], 0)
+        self.assertEqual(set(calls), {1})
+
+    def test_compare(self):
+        rows = harness.compare(document(a=100, b=100, gone=1), document(a=105, b=150, new=1), threshold=0.1)
+        self.assertEqual([(row[0], row[4]) for row in rows], [('a', False), ('b', True)])
+
+    def test_compare_exit_status(self):
+        fd, path = tempfile.mkstemp(suffix='.json')
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        args = ['-k', 'response.text_small', '--min-time', '0.001', '--repeat', '2']
+        with redirect_stdout(io.StringIO()):
+            self.assertEqual(main(args + ['--save', path]), 0)
+            with open(path) as f:
+                baseline = json.load(f)
+            baseline['results']['response.text_small']['ns_per_op'] /= 100
+            harness.save(baseline, path)
+            self.assertEqual(main(args + ['--compare', path]), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
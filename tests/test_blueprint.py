@@ -0,0 +1,102 @@
+import io
+import unittest
+from EasyAPI.app import EasyAPI
+from EasyAPI.blueprint import Blueprint
+from EasyAPI.exceptions import HTTPException
+from EasyAPI.response import Response
+
+
+class Unauthorized(HTTPException):
+    code = 401
+    status = '401 UNAUTHORIZED'
+    message = 'Unauthorized'
+
+
+def make_environ(path='/', method='GET'):
+    return {
+        'PATH_INFO': path,
+        'REQUEST_METHOD': method,
+        'QUERY_STRING': '',
+        'wsgi.input': io.BytesIO(),
+    }
+
+
+class TestBlueprint(unittest.TestCase):
+
+    def setUp(self):
+        self.app = EasyAPI()
+        self.calls = []
+
+        self.api = Blueprint('api')
+        self.api.before_request(lambda request: self.calls.append('api'))
+
+        @self.api.route('/users/<int:id>')
+        def get_user(request):
+            return Response(f"user {request.path_params['id']}")
+
+    def call(self, path, method='GET'):
+        captured = {}
+
+        def start_response(status, headers):
+            captured['status'] = status
+
+        body = b''.join(self.app(make_environ(path, method), start_response))
+        return captured['status'], body
+
+    def test_prefix_and_middleware(self):
+        self.app.register_blueprint(self.api, url_prefix='/api')
+        self.app.add_route('/', lambda request: Response('home'))
+
+        self.assertEqual(self.call('/api/users/3'), ('200 OK', b'user 3'))
+        self.assertEqual(self.call('/'), ('200 OK', b'home'))
+        self.assertEqual(self.calls, ['api'])
+        self.assertIn(('/api/users/<int:id>', 'GET'), self.app.routes)
+
+    def test_nested_blueprints(self):
+        admin = Blueprint('admin')
+        admin.before_request(lambda request: self.calls.append('admin'))
+        admin.add_route('/', lambda request: Response('admin'))
+        self.api.register_blueprint(admin, url_prefix='/admin')
+        self.app.register_blueprint(self.api, url_prefix='/api/')
+
+        self.assertEqual(self.call('/api/admin'), ('200 OK', b'admin'))
+        self.assertEqual(self.calls, ['api', 'admin'])
+
+    def test_longer_prefix_skips_outer_middleware(self):
+        health = Blueprint('health')
+        health.add_route('/', lambda request: Response('ok'))
+        self.app.register_blueprint(self.api, url_prefix='/api')
+        self.app.register_blueprint(health, url_prefix='/api/health')
+        self.app.add_route('/api/version', lambda request: Response('1.0'))
+
+        self.assertEqual(self.call('/api/health'), ('200 OK', b'ok'))
+        self.assertEqual(self.call('/api/version'), ('200 OK', b'1.0'))
+        self.assertEqual(self.calls, [])
+
+    def test_error_handlers(self):
+        def deny(request):
+            if request.path.endswith('/secret'):
+                raise Unauthorized()
+
+        self.api.before_request(deny)
+        self.api.add_route('/secret', lambda request: Response('secret'))
+        self.api.register_error_handler(401, lambda request: Response('api denied', status='401 UNAUTHORIZED'))
+        self.api.register_error_handler(404, lambda request: Response('no such api', status='404 NOT FOUND'))
+        self.app.register_blueprint(self.api, url_prefix='/api')
+
+        self.assertEqual(self.call('/api/secret'), ('401 UNAUTHORIZED', b'api denied'))
+        self.assertEqual(self.call('/api/missing'), ('404 NOT FOUND', b'no such api'))
+        self.assertEqual(self.call('/missing'), ('404 NOT FOUND', b'404 Not Found'))
+        # The prefix only covers whole path segments
+        self.assertEqual(self.call('/apis'), ('404 NOT FOUND', b'404 Not Found'))
+
+    def test_unhandled_error_falls_back_to_app(self):
+        self.app.register_error_handler(404, lambda request: Response('app 404', status='404 NOT FOUND'))
+        self.app.register_blueprint(self.api, url_prefix='/api')
+
+        self.assertEqual(self.call('/api/missing'), ('404 NOT FOUND', b'app 404'))
+        self.assertEqual(self.calls, ['api'])
+
+
+if __name__ == '__main__':
+    unittest.main()
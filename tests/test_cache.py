@@ -0,0 +1,384 @@
+import io
+import time
+import queue
+import fnmatch
+import asyncio
+import unittest
+import threading
+from types import SimpleNamespace
+from EasyAPI.app import EasyAPI
+from EasyAPI.response import Response
+from EasyAPI.services.cache import CacheService
+from EasyAPI.services.codecs import ValueCodec
+
+
+class FakeRedisServer:
+    def __init__(self):
+        self.data = {}
+        self.subscribers = []
+
+
+class FakePubSub:
+    def __init__(self, server):
+        self.server = server
+        self.messages = queue.Queue()
+
+    def subscribe(self, channel):
+        self.channel = channel
+        self.server.subscribers.append(self)
+
+    def get_message(self, timeout=0.0):
+        try:
+            return self.messages.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        if self in self.server.subscribers:
+            self.server.subscribers.remove(self)
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.commands.append((name, args, kwargs))
+
+    def execute(self):
+        self.client.round_trips += 1
+        return [getattr(self.client, name)(*args, **kwargs) for name, args, kwargs in self.commands]
+
+
+class FakeRedis:
+    def __init__(self, server):
+        self.server = server
+        self.gets = 0
+        self.round_trips = 0
+
+    def get(self, key):
+        self.gets += 1
+        return self.server.data.get(key)
+
+    def mget(self, keys):
+        self.round_trips += 1
+        return [self.server.data.get(key) for key in keys]
+
+    def set(self, key, value, ex=None):
+        self.server.data[key] = value
+
+    def delete(self, *keys):
+        for key in keys:
+            self.server.data.pop(key, None)
+
+    def incr(self, key, amount=1):
+        self.server.data[key] = int(self.server.data.get(key, 0)) + amount
+        return self.server.data[key]
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def flushdb(self, asynchronous=False):
+        self.server.data.clear()
+
+    def scan_iter(self, match='*', count=None):
+        return [key for key in list(self.server.data) if fnmatch.fnmatchcase(key, match)]
+
+    def unlink(self, *keys):
+        self.round_trips += 1
+        return sum(self.server.data.pop(key, None) is not None for key in keys)
+
+    def publish(self, channel, message):
+        for pubsub in list(self.server.subscribers):
+            if pubsub.channel == channel:
+                pubsub.messages.put({'type': 'message', 'data': message.encode()})
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        return FakePubSub(self.server)
+
+
+class FakeMemcache:
+    def __init__(self, data):
+        self.data = data
+        self.gets = 0
+
+    def get(self, key):
+        self.gets += 1
+        return self.data.get(key)
+
+    def set(self, key, value, time=0):
+        self.data[key] = value
+
+    def add(self, key, value, time=0):
+        if key in self.data:
+            return False
+        self.data[key] = value
+        return True
+
+    def get_multi(self, keys):
+        return {key: self.data[key] for key in keys if key in self.data}
+
+    def set_multi(self, mapping, time=0):
+        self.data.update(mapping)
+        return []
+
+    def incr(self, key, delta=1):
+        if key not in self.data:
+            return None
+        self.data[key] = int(self.data[key]) + delta
+        return self.data[key]
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+    def delete_multi(self, keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+
+def wait_until(predicate, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError('Condition not met in time')
+        time.sleep(0.005)
+
+
+class TestNearCache(unittest.TestCase):
+
+    def redis_service(self, server, **options):
+        service = CacheService('redis', near_cache=options or True, client=FakeRedis(server))
+        self.addCleanup(service.close)
+        wait_until(lambda: service.near.active)
+        return service
+
+    def test_hot_reads_skip_the_network(self):
+        server = FakeRedisServer()
+        service = self.redis_service(server)
+        service.set('k', b'v')
+        for _ in range(10):
+            self.assertEqual(service.get('k'), b'v')
+        self.assertEqual(service.client.gets, 0)
+        self.assertIsNone(service.get('missing'))
+
+        stats = service.tier_stats()
+        self.assertEqual(stats['l1']['hits'], 10)
+        self.assertEqual(stats['l1']['misses'], 1)
+        self.assertEqual(stats['l2'], {'hits': 0, 'misses': 1, 'hit_ratio': 0.0})
+
+    def test_invalidation_across_services(self):
+        server = FakeRedisServer()
+        first = self.redis_service(server)
+        second = self.redis_service(server)
+        first.set('k', b'old')
+        self.assertEqual(second.get('k'), b'old')
+
+        first.set('k', b'new')
+        wait_until(lambda: 'k' not in second.near.entries)
+        self.assertEqual(second.get('k'), b'new')
+
+        second.delete('k')
+        wait_until(lambda: 'k' not in first.near.entries)
+        self.assertIsNone(first.get('k'))
+
+        first.set('a', b'1')
+        second.get('a')
+        first.flush()
+        wait_until(lambda: len(second.near.entries) == 0)
+
+    def test_ttl(self):
+        service = self.redis_service(FakeRedisServer(), ttl=0.05)
+        service.set('k', b'v')
+        service.get('k')
+        time.sleep(0.06)
+        service.get('k')
+        self.assertEqual(service.client.gets, 1)
+
+    def test_memcached_generation(self):
+        data = {}
+        first = CacheService('memcached', near_cache={'poll_interval': 0}, client=FakeMemcache(data))
+        second = CacheService('memcached', near_cache={'poll_interval': 0}, client=FakeMemcache(data))
+        first.set('k', b'old')
+        self.assertEqual(second.get('k'), b'old')
+        self.assertEqual(second.get('k'), b'old')
+        self.assertEqual(first.get('k'), b'old')
+        self.assertEqual(second.tier_stats()['l1']['hits'], 1)
+
+        first.set('k', b'new')
+        self.assertEqual(second.get('k'), b'new')
+        self.assertEqual(second.tier_stats()['l1']['hits'], 1)
+
+    def test_codec_with_near_cache(self):
+        service = self.redis_service(FakeRedisServer())
+        service.codec = ValueCodec('json')
+        service.set('k', {'a': [1, 2]})
+        self.assertEqual(service.get('k'), {'a': [1, 2]})
+        self.assertEqual(service.get('k'), {'a': [1, 2]})
+        # The near cache holds the encoded value, so callers never share objects
+        self.assertIsNot(service.get('k'), service.get('k'))
+        self.assertEqual(service.get_many(['k', 'x']), {'k': {'a': [1, 2]}})
+
+    def test_tag_invalidation_across_services(self):
+        server = FakeRedisServer()
+        first = self.redis_service(server)
+        second = self.redis_service(server)
+        first.set('k', b'v', tags=['t'])
+        self.assertEqual(second.get('k'), b'v')
+        calls = (second.client.gets, second.client.round_trips)
+        self.assertEqual(second.get('k'), b'v')
+        # The value and the tag version both come from the near cache
+        self.assertEqual((second.client.gets, second.client.round_trips), calls)
+
+        first.invalidate_tags('t')
+        wait_until(lambda: second.get('k') is None)
+
+    def test_without_near_cache(self):
+        service = CacheService('redis', client=FakeRedis(FakeRedisServer()))
+        service.set('k', b'v')
+        self.assertEqual(service.get('k'), b'v')
+        self.assertEqual(service.client.gets, 1)
+        self.assertNotIn('l1', service.tier_stats())
+
+
+class TestBatchOperations(unittest.TestCase):
+
+    def test_redis_batches_in_chunks(self):
+        service = CacheService('redis', client=FakeRedis(FakeRedisServer()), chunk_size=2)
+        service.set_many({'a': b'1', 'b': b'2', 'c': b'3'})
+        self.assertEqual(service.client.round_trips, 2)
+        self.assertEqual(service.get_many(['a', 'b', 'c', 'd', 'a']), {'a': b'1', 'b': b'2', 'c': b'3'})
+        self.assertEqual(service.client.round_trips, 4)
+        service.delete_many(['a', 'b'])
+        self.assertEqual(service.get_many(['a', 'b', 'c']), {'c': b'3'})
+        self.assertEqual(service.incr('n'), 1)
+        self.assertEqual(service.incr('n', 5), 6)
+
+    def test_memcached(self):
+        service = CacheService('memcached', client=FakeMemcache({}))
+        service.set_many({'a': b'1', 'b': b'2'})
+        self.assertEqual(service.get_many(['a', 'b', 'c']), {'a': b'1', 'b': b'2'})
+        service.delete_many(['a'])
+        self.assertEqual(service.get_many(['a', 'b']), {'b': b'2'})
+        self.assertEqual(service.incr('n', 2), 2)
+        self.assertEqual(service.incr('n'), 3)
+
+    def test_near_cache_serves_part_of_a_batch(self):
+        service = CacheService('redis', near_cache=True, client=FakeRedis(FakeRedisServer()))
+        self.addCleanup(service.close)
+        wait_until(lambda: service.near.active)
+        service.set('a', b'1')
+        service.client.server.data['b'] = b'2'
+        requested = []
+        mget = service.client.mget
+        service.client.mget = lambda keys: requested.append(keys) or mget(keys)
+        self.assertEqual(service.get_many(['a', 'b']), {'a': b'1', 'b': b'2'})
+        self.assertEqual(requested, [['b']])
+
+    def test_request_batcher(self):
+        service = CacheService('redis', client=FakeRedis(FakeRedisServer()))
+        service.set_many({'a': b'1', 'b': b'2'})
+        request = SimpleNamespace(environ={}, state=SimpleNamespace())
+        batcher = service.batcher(request)
+        self.assertIs(service.batcher(request), batcher)
+        trips = service.client.round_trips
+
+        refs = [batcher.load(key) for key in ('a', 'b', 'c')]
+        self.assertEqual([ref.value for ref in refs], [b'1', b'2', None])
+        self.assertEqual(batcher.get('a'), b'1')
+        self.assertEqual(service.client.round_trips, trips + 1)
+
+    def test_async_batcher_coalesces_concurrent_gets(self):
+        service = CacheService('redis', client=FakeRedis(FakeRedisServer()))
+        service.set_many({'a': b'1', 'b': b'2'})
+        batcher = service.batcher()
+        trips = service.client.round_trips
+
+        async def main():
+            return await asyncio.gather(*(batcher.get_async(key) for key in ('a', 'b', 'c', 'a')))
+
+        self.assertEqual(asyncio.run(main()), [b'1', b'2', None, b'1'])
+        self.assertEqual(service.client.round_trips, trips + 1)
+
+    def test_async_batcher_uses_the_app_executor(self):
+        service = CacheService('redis', client=FakeRedis(FakeRedisServer()))
+        service.set('a', b'1')
+        threads = []
+        get_many = service.get_many
+        service.get_many = lambda keys: threads.append(threading.current_thread().name) or get_many(keys)
+        app = EasyAPI(thread_pool_size=1)
+
+        async def handler(request):
+            return Response(await service.batcher(request).get_async('a'))
+
+        app.add_route('/', handler)
+        request = app.make_request({'PATH_INFO': '/', 'REQUEST_METHOD': 'GET', 'wsgi.input': io.BytesIO()})
+        try:
+            self.assertEqual(asyncio.run(app.handle_request_async(request)).content, b'1')
+        finally:
+            app._shutdown_executor()
+        self.assertEqual(len(threads), 1)
+        self.assertTrue(threads[0].startswith('EasyAPI'))
+
+
+class TestInvalidation(unittest.TestCase):
+
+    def setUp(self):
+        self.service = CacheService('redis', client=FakeRedis(FakeRedisServer()), codec='pickle')
+
+    def test_namespace(self):
+        users = self.service.namespace('users')
+        users.set('1', {'name': 'ada'})
+        users.set_many({'2': {'name': 'bob'}})
+        self.service.set('other', b'kept')
+        self.assertEqual(users.get_many(['1', '2']), {'1': {'name': 'ada'}, '2': {'name': 'bob'}})
+
+        self.assertEqual(users.invalidate(), 1)
+        self.assertIsNone(users.get('1'))
+        self.assertEqual(users.get_many(['1', '2']), {})
+        self.assertEqual(self.service.get('other'), b'kept')
+        users.set('1', {'name': 'eve'})
+        self.assertEqual(users.get('1'), {'name': 'eve'})
+
+    def test_tags(self):
+        self.service.set('a', 1, tags=['user:1'])
+        self.service.set_many({'b': 2, 'c': 3}, tags=['user:1', 'team:9'])
+        self.service.set('d', 4, tags=['team:9'])
+        self.service.set('e', 5)
+
+        self.service.invalidate_tags('user:1')
+        self.assertIsNone(self.service.get('a'))
+        self.assertEqual(self.service.get_many(['a', 'b', 'c', 'd', 'e']), {'d': 4, 'e': 5})
+        self.service.set('a', 6, tags=['user:1'])
+        self.assertEqual(self.service.get('a'), 6)
+
+    def test_bytes_starting_with_0xff(self):
+        jpeg = b'\xff\xd8\xff\xe0' + bytes(range(256))
+        for codec in (None, 'pickle'):
+            service = CacheService('redis', client=FakeRedis(FakeRedisServer()), codec=codec)
+            service.set('img', jpeg)
+            self.assertEqual(service.get('img'), jpeg)
+            self.assertEqual(service.get_many(['img']), {'img': jpeg})
+
+    def test_tags_need_bytes_without_codec(self):
+        service = CacheService('redis', client=FakeRedis(FakeRedisServer()))
+        service.set('a', b'1', tags=['t'])
+        self.assertEqual(service.get('a'), b'1')
+        with self.assertRaises(TypeError):
+            service.set('b', {'not': 'bytes'}, tags=['t'])
+
+    def test_purge_and_delete_matching(self):
+        users = self.service.namespace('users')
+        admins = self.service.namespace('users:admin')
+        users.set_many({str(i): i for i in range(5)})
+        admins.set('1', 1)
+        self.service.set('session:1', 1)
+
+        self.assertEqual(users.purge(count=2), 5)
+        self.assertEqual(admins.get('1'), 1)
+        self.assertEqual(self.service.delete_matching('session:*'), 1)
+        self.assertEqual(self.service.get('users:admin:0:1'), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
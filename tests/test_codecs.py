@@ -0,0 +1,67 @@
+import pickle
+import unittest
+from EasyAPI.services.codecs import ValueCodec, libraries
+
+try:
+    libraries.load('numpy')
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class TestValueCodec(unittest.TestCase):
+
+    def test_round_trip(self):
+        codec = ValueCodec('pickle', threshold=64)
+        for value in ({'a': 1}, [1, 'two', None], 'text', 3.5, b'raw bytes', None):
+            self.assertEqual(codec.decode(codec.encode(value)), value)
+
+    def test_compresses_large_values(self):
+        codec = ValueCodec('json', threshold=64)
+        value = {'items': ['repeated'] * 200}
+        encoded = codec.encode(value)
+        self.assertLess(len(encoded), len(ValueCodec('json', compression=None).encode(value)))
+        self.assertEqual(codec.decode(encoded), value)
+        # Small values are not worth compressing
+        self.assertEqual(codec.encode('hi')[1:], b'"hi"')
+
+    def test_mixed_formats(self):
+        reader = ValueCodec('json', compression=None, accept=('pickle',))
+        for writer in (ValueCodec('pickle', threshold=0), ValueCodec('json', threshold=0)):
+            self.assertEqual(reader.decode(writer.encode({'a': [1] * 100})), {'a': [1] * 100})
+
+    def test_rejects_codecs_not_accepted(self):
+        reader = ValueCodec('json')
+        pickled = ValueCodec('pickle', compression=None).encode({'a': 1})
+        with self.assertRaises(ValueError):
+            reader.decode(pickled)
+        self.assertEqual(reader.decode(ValueCodec('json', compression=None).encode(b'raw')), b'raw')
+        with self.assertRaises(ValueError):
+            ValueCodec('json', accept=('yaml',))
+
+    def test_values_written_without_a_codec(self):
+        codec = ValueCodec()
+        legacy = pickle.dumps({'a': 1})
+        self.assertEqual(codec.decode(legacy), legacy)
+        self.assertEqual(codec.decode(b'42'), b'42')
+        self.assertIsNone(codec.decode(None))
+        # Non-ASCII text starts with a byte above 0x80 that is not a header
+        for text in ('über', '日本', '€5'):
+            self.assertEqual(codec.decode(text.encode()), text.encode())
+        self.assertEqual(codec.decode(b'\x8f\x00'), b'\x8f\x00')
+
+    def test_unknown_codec(self):
+        with self.assertRaises(ValueError):
+            ValueCodec('yaml')
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def test_numpy_arrays(self):
+        codec = ValueCodec('json')
+        array = numpy.arange(12, dtype='float32').reshape(3, 4)
+        decoded = codec.decode(codec.encode(array))
+        self.assertEqual(decoded.dtype, array.dtype)
+        self.assertTrue((decoded == array).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import gzip
+import io
+import json
+import unittest
+from EasyAPI.app import EasyAPI
+from EasyAPI.compression import CompressionMiddleware, parse_accept_encoding
+from EasyAPI.response import Response, StreamingResponse
+
+
+class TestCompression(unittest.TestCase):
+
+    def setUp(self):
+        self.app = EasyAPI()
+        self.middleware = CompressionMiddleware(minimum_size=100, encodings=['gzip'])
+        self.app.use_middleware(self.middleware)
+        self.payload = json.dumps([{'id': i, 'name': 'item'} for i in range(200)])
+        self.app.add_route('/items', lambda request: Response(
+            self.payload, headers=[('Content-Type', 'application/json'), ('ETag', '"v1"')]))
+        self.app.add_route('/small', lambda request: Response('ok', headers=[('Content-Type', 'text/plain')]))
+        self.app.add_route('/image', lambda request: Response(
+            b'\x89PNG' * 100, headers=[('Content-Type', 'image/png')]))
+        self.app.add_route('/stream', lambda request: StreamingResponse(
+            (f'row {i}\n' for i in range(1000)), content_type='text/csv'))
+
+    def get(self, path, accept_encoding='gzip, br;q=0.5'):
+        environ = {
+            'PATH_INFO': path,
+            'REQUEST_METHOD': 'GET',
+            'QUERY_STRING': '',
+            'HTTP_ACCEPT_ENCODING': accept_encoding,
+            'wsgi.input': io.BytesIO(),
+        }
+        captured = {}
+
+        def start_response(status, headers):
+            captured['headers'] = dict(headers)
+
+        data = b''.join(self.app(environ, start_response))
+        return captured['headers'], data
+
+    def test_parse_accept_encoding(self):
+        self.assertEqual(parse_accept_encoding('gzip;q=0.5, br, zstd;q=0'), {'gzip': 0.5, 'br': 1.0})
+
+    def test_compresses_json(self):
+        headers, data = self.get('/items')
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+        self.assertEqual(headers['Vary'], 'Accept-Encoding')
+        self.assertEqual(headers['ETag'], '"v1-gzip"')
+        self.assertEqual(int(headers['Content-Length']), len(data))
+        self.assertEqual(gzip.decompress(data).decode(), self.payload)
+
+    def test_caches_compressed_output(self):
+        first = self.get('/items')[1]
+        self.assertEqual(len(self.middleware.cache), 1)
+        self.assertEqual(self.get('/items')[1], first)
+        self.assertEqual(len(self.middleware.cache), 1)
+
+    def test_same_etag_on_different_routes(self):
+        for path in ('/a', '/b'):
+            body = json.dumps({'path': path, 'rows': list(range(100))})
+            self.app.add_route(path, lambda request, body=body: Response(
+                body, headers=[('Content-Type', 'application/json'), ('ETag', '"1"')]))
+        for path in ('/a', '/b', '/a'):
+            data = self.get(path)[1]
+            self.assertEqual(json.loads(gzip.decompress(data))['path'], path)
+
+    def test_skips_small_and_binary_bodies(self):
+        self.assertNotIn('Content-Encoding', self.get('/small')[0])
+        self.assertNotIn('Content-Encoding', self.get('/image')[0])
+
+    def test_skips_without_accept_encoding(self):
+        headers, data = self.get('/items', accept_encoding='identity')
+        self.assertNotIn('Content-Encoding', headers)
+        self.assertEqual(data.decode(), self.payload)
+
+    def test_streaming(self):
+        headers, data = self.get('/stream')
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+        self.assertNotIn('Content-Length', headers)
+        expected = ''.join(f'row {i}\n' for i in range(1000)).encode()
+        self.assertEqual(gzip.decompress(data), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
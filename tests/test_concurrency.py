@@ -0,0 +1,134 @@
+import io
+import time
+import asyncio
+import threading
+import unittest
+from EasyAPI.app import EasyAPI
+from EasyAPI.concurrency import AIMD, ConcurrencyGate
+from EasyAPI.exceptions import BadRequest
+from EasyAPI.response import Response
+
+
+def make_environ(path='/'):
+    return {
+        'PATH_INFO': path,
+        'REQUEST_METHOD': 'GET',
+        'QUERY_STRING': '',
+        'wsgi.input': io.BytesIO(),
+    }
+
+
+class TestConcurrencyLimits(unittest.TestCase):
+
+    def setUp(self):
+        self.app = EasyAPI()
+        self.release = threading.Event()
+        self.entered = threading.Event()
+
+        def slow(request):
+            self.entered.set()
+            self.release.wait(5)
+            return Response('slow')
+
+        self.slow = slow
+        self.app.add_route('/health', lambda request: Response('ok'))
+
+    def call(self, path, results=None):
+        captured = {}
+
+        def start_response(status, headers):
+            captured['status'] = status
+            captured['headers'] = dict(headers)
+
+        body = b''.join(self.app(make_environ(path), start_response))
+        if results is not None:
+            results.append((captured['status'], body))
+        return captured['status'], captured['headers']
+
+    def start(self, path, results):
+        thread = threading.Thread(target=self.call, args=(path, results))
+        thread.start()
+        self.addCleanup(thread.join, 5)
+        self.addCleanup(self.release.set)
+        self.assertTrue(self.entered.wait(5))
+        return thread
+
+    def test_client_errors_do_not_shrink_adaptive_limit(self):
+        limiter = self.app.enable_concurrency_limits(limit=50, adaptive=True)
+
+        def bad(request):
+            raise BadRequest()
+
+        self.app.add_route('/bad', bad)
+        for _ in range(40):
+            self.assertEqual(self.call('/bad')[0], '400 BAD REQUEST')
+        self.assertEqual(limiter.gate.limit, 50)
+
+    def test_route_limit_sheds_without_affecting_other_routes(self):
+        limiter = self.app.enable_concurrency_limits()
+        self.app.add_route('/slow', self.slow, concurrency={'limit': 1, 'queue_size': 0})
+        results = []
+        thread = self.start('/slow', results)
+
+        status, headers = self.call('/slow')
+        self.assertEqual(status, '503 SERVICE UNAVAILABLE')
+        self.assertEqual(headers['Retry-After'], '1')
+        self.assertEqual(self.call('/health')[0], '200 OK')
+        self.assertEqual(limiter.stats()['/slow']['shed'], 1)
+
+        self.release.set()
+        thread.join(5)
+        self.assertEqual(results, [('200 OK', b'slow')])
+        self.assertEqual(limiter.stats()['/slow']['inflight'], 0)
+
+    def test_queue_deadline(self):
+        self.app.enable_concurrency_limits(limit=1, queue_size=1, queue_timeout=0.05)
+        self.app.add_route('/slow', self.slow)
+        self.start('/slow', [])
+
+        start = time.perf_counter()
+        self.assertEqual(self.call('/health')[0], '503 SERVICE UNAVAILABLE')
+        self.assertGreaterEqual(time.perf_counter() - start, 0.05)
+
+    def test_queued_request_gets_the_slot(self):
+        limiter = self.app.enable_concurrency_limits(limit=1, queue_timeout=5)
+        self.app.add_route('/slow', self.slow)
+        self.start('/slow', [])
+
+        results = []
+        waiting = threading.Thread(target=self.call, args=('/health', results))
+        waiting.start()
+        while not limiter.gate.queue:
+            time.sleep(0.001)
+        self.release.set()
+        waiting.join(5)
+        self.assertEqual(results, [('200 OK', b'ok')])
+
+    def test_async_gate(self):
+        gate = ConcurrencyGate('test', limit=1, queue_timeout=0.05)
+
+        async def run():
+            self.assertTrue(await gate.acquire_async())
+            self.assertFalse(await gate.acquire_async())
+            waiter = asyncio.ensure_future(gate.acquire_async())
+            await asyncio.sleep(0)
+            gate.release(0.01, False)
+            self.assertTrue(await waiter)
+
+        asyncio.run(run())
+        self.assertEqual((gate.inflight, gate.shed), (1, 1))
+
+    def test_aimd(self):
+        aimd = AIMD(initial=10, min_limit=2, max_limit=11, latency_threshold=0.1)
+        self.assertEqual(aimd.update(0.5, False, 5), 9)
+        self.assertEqual(aimd.update(0.01, True, 5), 8)
+        for _ in range(100):
+            aimd.update(0.01, False, 20)
+        self.assertEqual(aimd.limit, 11)
+        for _ in range(100):
+            aimd.update(1.0, False, 1)
+        self.assertEqual(aimd.limit, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import io
+import unittest
+from unittest import mock
+from EasyAPI.app import EasyAPI
+from EasyAPI.container import Container, injection_plan
+from EasyAPI.response import Response
+
+
+def make_environ(path='/'):
+    return {
+        'PATH_INFO': path,
+        'REQUEST_METHOD': 'GET',
+        'QUERY_STRING': '',
+        'wsgi.input': io.BytesIO(),
+    }
+
+
+def call(app, path='/'):
+    captured = {}
+
+    def start_response(status, headers):
+        captured['status'] = status
+
+    body = b''.join(app(make_environ(path), start_response))
+    return captured['status'], body
+
+
+class Greeter:
+    def __init__(self, greeting):
+        self.greeting = greeting
+
+
+class TestContainer(unittest.TestCase):
+
+    def test_injection_plan(self):
+        def handler(request, greeter, cache=None, *rest, flag=False):
+            pass
+
+        self.assertEqual(injection_plan(handler), (('greeter', False), ('cache', True)))
+        self.assertEqual(injection_plan(lambda request: None), ())
+
+    def test_singleton_is_created_once(self):
+        container = Container()
+        created = []
+        container.register('greeter', lambda: created.append(1) or Greeter('hi'))
+        self.assertIs(container.resolve('greeter'), container.resolve('greeter'))
+        self.assertEqual(len(created), 1)
+        with self.assertRaises(LookupError):
+            container.resolve('missing')
+
+    def test_worker_scope_is_created_per_process(self):
+        container = Container()
+        container.register('greeter', lambda: Greeter('hi'), scope='worker')
+        first = container.resolve('greeter')
+        with mock.patch('EasyAPI.container.os.getpid', return_value=-1):
+            child = container.resolve('greeter')
+            self.assertIsNot(child, first)
+            self.assertIs(container.resolve('greeter'), child)
+
+    def test_lifecycle_hooks(self):
+        events = []
+        container = Container()
+        container.register('a', lambda: 'a', on_startup=events.append,
+                           on_shutdown=lambda s: events.append('stop ' + s))
+
+        async def stop_b(service):
+            events.append('stop ' + service)
+
+        container.register('b', instance='b', on_shutdown=stop_b)
+        container.startup()
+        container.shutdown()
+        self.assertEqual(events, ['a', 'stop b', 'stop a'])
+
+
+class TestAppInjection(unittest.TestCase):
+
+    def setUp(self):
+        self.app = EasyAPI()
+
+    def test_handler_receives_services(self):
+        def greet(request, greeter, suffix='!'):
+            return Response(greeter.greeting + suffix)
+
+        async def greet_async(request, greeter):
+            return Response(greeter.greeting.upper())
+
+        self.app.add_route('/', greet)
+        self.app.add_route('/async', greet_async)
+        self.app.register_service('greeter', instance=Greeter('hello'))
+        self.assertEqual(call(self.app), ('200 OK', b'hello!'))
+        self.assertEqual(call(self.app, '/async'), ('200 OK', b'HELLO'))
+
+    def test_app_is_a_service(self):
+        self.app.add_route('/', lambda request, app: Response(type(app).__name__))
+        self.assertEqual(call(self.app)[1], b'EasyAPI')
+
+    def test_missing_service_fails_at_finalize(self):
+        self.app.add_route('/', lambda request, nothing: Response(''))
+        with self.assertRaises(LookupError):
+            self.app.finalize()
+
+    def test_startup_and_shutdown(self):
+        events = []
+        self.app.register_service('greeter', lambda: Greeter('hi'), scope='worker',
+                                  on_startup=lambda s: events.append('open'),
+                                  on_shutdown=lambda s: events.append('close'))
+        self.app.add_route('/', lambda request, greeter: Response(greeter.greeting))
+        self.app.startup()
+        self.assertEqual(call(self.app)[1], b'hi')
+        self.app.shutdown()
+        self.assertEqual(events, ['open', 'close'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+import io
+import sys
+import json
+import queue
+import logging
+import unittest
+from EasyAPI.app import EasyAPI
+from EasyAPI.response import Response
+from EasyAPI.utils.logs import AccessLogMiddleware, DroppingQueueHandler, JSONFormatter, setup_logging, shutdown_logging
+
+
+def make_environ(path='/', headers=None):
+    environ = {
+        'PATH_INFO': path,
+        'REQUEST_METHOD': 'GET',
+        'QUERY_STRING': '',
+        'wsgi.input': io.BytesIO(),
+    }
+    for name, value in (headers or {}).items():
+        environ['HTTP_' + name.upper().replace('-', '_')] = value
+    return environ
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+class TestLogPipeline(unittest.TestCase):
+
+    def tearDown(self):
+        shutdown_logging()
+        target = logging.getLogger('EasyAPI.test')
+        target.handlers.clear()
+
+    def test_full_queue_drops(self):
+        handler = DroppingQueueHandler(queue.Queue(2))
+        target = logging.getLogger('EasyAPI.test.dropping')
+        target.addHandler(handler)
+        self.addCleanup(target.removeHandler, handler)
+        target.propagate = False
+        for i in range(5):
+            target.warning('record %d', i)
+        self.assertEqual(handler.queue.qsize(), 2)
+        self.assertEqual(handler.dropped, 3)
+
+    def test_records_are_written_in_background(self):
+        stream = io.StringIO()
+        pipeline = setup_logging(json=True, stream=stream, logger_name='EasyAPI.test')
+        logging.getLogger('EasyAPI.test.child').info('hello %s', 'world', extra={'request_id': 'abc'})
+        pipeline.stop()
+
+        entry = json.loads(stream.getvalue())
+        self.assertEqual(entry['message'], 'hello world')
+        self.assertEqual(entry['level'], 'INFO')
+        self.assertEqual(entry['logger'], 'EasyAPI.test.child')
+        self.assertEqual(entry['request_id'], 'abc')
+        self.assertEqual(pipeline.dropped, 0)
+
+    def test_json_formatter_exceptions(self):
+        try:
+            raise ValueError('boom')
+        except ValueError:
+            record = logging.getLogger('x').makeRecord('x', logging.ERROR, __file__, 1, 'failed', (), sys.exc_info())
+        entry = json.loads(JSONFormatter().format(record))
+        self.assertIn('ValueError: boom', entry['exception'])
+
+
+class TestAccessLog(unittest.TestCase):
+
+    def setUp(self):
+        self.handler = ListHandler()
+        self.access = logging.getLogger('EasyAPI.test.access')
+        self.access.addHandler(self.handler)
+        self.access.setLevel(logging.INFO)
+        self.access.propagate = False
+        self.addCleanup(self.access.removeHandler, self.handler)
+        self.app = EasyAPI()
+
+    def call(self, path='/', headers=None):
+        captured = {}
+
+        def start_response(status, response_headers):
+            captured['headers'] = dict(response_headers)
+
+        b''.join(self.app(make_environ(path, headers), start_response))
+        return captured['headers']
+
+    def test_access_record(self):
+        self.app.use_middleware(AccessLogMiddleware(self.access))
+        self.app.add_route('/users/<int:id>', lambda request: Response('user'))
+        headers = self.call('/users/1', {'X-Request-ID': 'req-1'})
+        self.assertEqual(headers['X-Request-ID'], 'req-1')
+
+        [record] = self.handler.records
+        self.assertEqual(record.request_id, 'req-1')
+        self.assertEqual(record.route, '/users/<int:id>')
+        self.assertEqual(record.status, 200)
+        self.assertEqual(record.response_bytes, 4)
+        self.assertGreaterEqual(record.duration_ms, 0)
+
+        headers = self.call('/users/2')
+        self.assertEqual(len(headers['X-Request-ID']), 32)
+
+    def test_sampling(self):
+        self.app.use_middleware(AccessLogMiddleware(self.access, route_sample_rates={'/health': 0}))
+        self.app.add_route('/health', lambda request: Response('ok'))
+        self.app.add_route('/quiet', lambda request: Response('ok'), log_sample_rate=0)
+
+        def fail(request):
+            return Response('error', status='500 INTERNAL SERVER ERROR')
+
+        self.app.add_route('/fail', fail, log_sample_rate=0)
+        for path in ('/health', '/quiet', '/fail', '/missing'):
+            self.call(path)
+        self.assertEqual([record.path for record in self.handler.records], ['/fail', '/missing'])
+
+
+if __name__ == '__main__':
+    unittest.main()
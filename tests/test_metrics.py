@@ -0,0 +1,119 @@
+import io
+import threading
+import unittest
+from EasyAPI.app import EasyAPI
+from EasyAPI.exceptions import BadRequest
+from EasyAPI.metrics import Metrics
+from EasyAPI.response import Response
+
+
+def make_environ(path='/', method='GET', body=b''):
+    return {
+        'PATH_INFO': path,
+        'REQUEST_METHOD': method,
+        'QUERY_STRING': '',
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.input': io.BytesIO(body),
+    }
+
+
+def call(app, path='/', method='GET', body=b''):
+    captured = {}
+
+    def start_response(status, headers):
+        captured['status'] = status
+
+    data = b''.join(app(make_environ(path, method, body), start_response))
+    return captured['status'], data
+
+
+class Store:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def fail(self):
+        raise RuntimeError('down')
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_per_thread_aggregates(self):
+        metrics = Metrics(buckets=(0.1, 1.0))
+
+        def record():
+            for _ in range(1000):
+                metrics.inc('easyapi_requests_total', ('/', 'GET', '200'))
+                metrics.observe('easyapi_request_duration_seconds', ('/', 'GET'), 0.5)
+
+        threads = [threading.Thread(target=record) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        values, histograms = metrics.collect()
+        self.assertEqual(values[('easyapi_requests_total', ('/', 'GET', '200'))], 4000)
+        self.assertEqual(histograms[('easyapi_request_duration_seconds', ('/', 'GET'))], [0, 4000, 0, 2000.0, 4000])
+
+        text = metrics.render()
+        self.assertIn('easyapi_requests_total{route="/",method="GET",status="200"} 4000', text)
+        self.assertIn('easyapi_request_duration_seconds_bucket{route="/",method="GET",le="0.1"} 0', text)
+        self.assertIn('easyapi_request_duration_seconds_bucket{route="/",method="GET",le="1"} 4000', text)
+        self.assertIn('easyapi_request_duration_seconds_bucket{route="/",method="GET",le="+Inf"} 4000', text)
+        self.assertIn('easyapi_requests_in_flight 0', text)
+
+    def test_app_metrics(self):
+        app = EasyAPI()
+        app.enable_metrics()
+        app.register_service('store', instance=Store())
+
+        def get_item(request, store):
+            store.get(request.path_params['id'])
+            return Response('item')
+
+        def broken(request, store):
+            store.fail()
+
+        def invalid(request):
+            raise BadRequest()
+
+        app.add_route('/items/<int:id>', get_item)
+        app.add_route('/broken', broken)
+        app.add_route('/invalid', invalid, methods=['POST'])
+
+        call(app, '/items/1')
+        call(app, '/items/2')
+        call(app, '/missing')
+        call(app, '/invalid', 'POST', b'abc')
+        with self.assertRaises(RuntimeError):
+            call(app, '/broken')
+
+        status, text = call(app, '/metrics')
+        text = text.decode()
+        self.assertEqual(status, '200 OK')
+        self.assertIn('easyapi_requests_total{route="/items/<int:id>",method="GET",status="200"} 2', text)
+        self.assertIn('easyapi_requests_total{route="<unmatched>",method="GET",status="404"} 1', text)
+        self.assertIn('easyapi_requests_total{route="/invalid",method="POST",status="400"} 1', text)
+        self.assertIn('easyapi_requests_total{route="/broken",method="GET",status="500"} 1', text)
+        self.assertIn('easyapi_handler_duration_seconds_count{route="/items/<int:id>",method="GET"} 2', text)
+        self.assertIn('easyapi_middleware_duration_seconds_count{route="/items/<int:id>",method="GET"} 2', text)
+        self.assertIn('easyapi_request_bytes_total{route="/invalid",method="POST"} 3', text)
+        self.assertIn('easyapi_response_bytes_total{route="/items/<int:id>",method="GET"} 8', text)
+        self.assertIn('easyapi_service_call_duration_seconds_count{service="store",method="get"} 2', text)
+        self.assertIn('easyapi_service_call_errors_total{service="store",method="fail"} 1', text)
+        # Only the metrics request itself is in flight while rendering
+        self.assertIn('easyapi_requests_in_flight 1', text)
+
+    def test_disabled_by_default(self):
+        app = EasyAPI()
+        app.add_route('/', lambda request: Response('ok'))
+        self.assertEqual(call(app), ('200 OK', b'ok'))
+        self.assertIsNone(app.metrics)
+        self.assertEqual(call(app, '/metrics')[0], '404 NOT FOUND')
+
+
+if __name__ == '__main__':
+    unittest.main()
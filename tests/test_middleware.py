@@ -0,0 +1,163 @@
+import asyncio
+import io
+import unittest
+from EasyAPI.app import EasyAPI
+from EasyAPI.middleware import add_custom_header, log_request
+from EasyAPI.response import Response
+
+
+def make_environ(path='/'):
+    return {
+        'PATH_INFO': path,
+        'REQUEST_METHOD': 'GET',
+        'QUERY_STRING': '',
+        'wsgi.input': io.BytesIO(),
+    }
+
+
+class TestMiddlewarePipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.app = EasyAPI()
+        self.calls = []
+
+        def home(request):
+            self.calls.append('handler')
+            return Response("Welcome Home!")
+
+        self.app.add_route('/', home)
+
+    def call(self, path='/'):
+        captured = {}
+
+        def start_response(status, headers):
+            captured['status'] = status
+            captured['headers'] = headers
+
+        body = self.app(make_environ(path), start_response)
+        return captured['status'], dict(captured['headers']), b''.join(body)
+
+    def test_builtin_middleware(self):
+        self.app.use_middleware(log_request)
+        self.app.use_middleware(add_custom_header)
+        with self.assertLogs('EasyAPI.access', level='INFO') as logs:
+            _, headers, body = self.call()
+        self.assertEqual(logs.records[0].getMessage(), "Received GET request for /")
+        self.assertEqual(body, b"Welcome Home!")
+        self.assertEqual(headers['X-Custom-Header'], 'This is a custom header')
+
+    def test_phase_order(self):
+        self.app.before_request(lambda request: self.calls.append('before'))
+        self.app.after_request(lambda request, response: self.calls.append('after'))
+
+        @self.app.around_request
+        def outer(request, call_next):
+            self.calls.append('outer in')
+            response = call_next(request)
+            self.calls.append('outer out')
+            return response
+
+        @self.app.around_request
+        def inner(request, call_next):
+            self.calls.append('inner in')
+            response = call_next(request)
+            self.calls.append('inner out')
+            return response
+
+        self.call()
+        self.assertEqual(self.calls, [
+            'before', 'outer in', 'inner in', 'handler', 'after', 'inner out', 'outer out',
+        ])
+
+    def test_before_short_circuits(self):
+        self.app.before_request(lambda request: Response("Denied", status='403 FORBIDDEN'))
+        self.app.after_request(lambda request, response: self.calls.append('after'))
+        status, _, body = self.call()
+        self.assertEqual(status, '403 FORBIDDEN')
+        self.assertEqual(self.calls, [])
+
+    def test_middleware_object(self):
+        class Timing:
+            def around(self, request, call_next):
+                response = call_next(request)
+                response.set_header('X-Route', request.route.path)
+                return response
+
+        self.app.use_middleware(Timing())
+        self.assertEqual(self.call()[1]['X-Route'], '/')
+
+    def test_async_variant_of_a_hook(self):
+        class Tagging:
+            def before(self, request):
+                request.state.path = 'sync'
+
+            async def before_async(self, request):
+                request.state.path = 'async'
+
+            def after(self, request, response):
+                response.set_header('X-Path', request.state.path)
+
+        self.app.use_middleware(Tagging())
+        self.assertEqual(self.call()[1]['X-Path'], 'sync')
+        scope = {'type': 'http', 'method': 'GET', 'path': '/', 'query_string': b'', 'headers': []}
+        sent = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            sent.append(message)
+
+        asyncio.run(self.app(scope, receive, send))
+        self.app.shutdown()
+        self.assertIn((b'x-path', b'async'), sent[0]['headers'])
+
+    def test_middleware_added_after_first_request(self):
+        self.call()
+        self.app.after_request(lambda request, response: Response("replaced"))
+        self.assertEqual(self.call()[2], b"replaced")
+
+    def test_async_around_with_async_handler_over_wsgi(self):
+        async def around(request, call_next):
+            self.calls.append('async around')
+            response = await call_next(request)
+            response.set_header('X-Around', 'yes')
+            return response
+
+        async def hello(request):
+            await asyncio.sleep(0)
+            return Response("hello")
+
+        self.app.add_route('/hello', hello)
+        self.app.around_request(around)
+        status, headers, body = self.call('/hello')
+        self.assertEqual(status, '200 OK')
+        self.assertEqual(body, b"hello")
+        self.assertEqual(headers['X-Around'], 'yes')
+        self.assertEqual(self.calls, ['async around'])
+
+    def test_async_pipeline(self):
+        async def around(request, call_next):
+            self.calls.append('async around')
+            return await call_next(request)
+
+        self.app.around_request(around)
+        self.app.after_request(add_custom_header)
+        scope = {'type': 'http', 'method': 'GET', 'path': '/', 'query_string': b'', 'headers': []}
+        messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        asyncio.run(self.app(scope, receive, send))
+        self.app.shutdown()
+        self.assertEqual(self.calls, ['async around', 'handler'])
+        self.assertIn((b'x-custom-header', b'This is a custom header'), sent[0]['headers'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+import io
+import os
+import time
+import asyncio
+import pstats
+import shutil
+import tempfile
+import unittest
+from EasyAPI.app import EasyAPI
+from EasyAPI.profiler import Profiler
+from EasyAPI.response import Response
+
+
+def make_environ(path='/', headers=None):
+    environ = {
+        'PATH_INFO': path,
+        'REQUEST_METHOD': 'GET',
+        'QUERY_STRING': '',
+        'wsgi.input': io.BytesIO(),
+    }
+    for name, value in (headers or {}).items():
+        environ['HTTP_' + name.upper().replace('-', '_')] = value
+    return environ
+
+
+def busy(request):
+    deadline = time.perf_counter() + 0.05
+    while time.perf_counter() < deadline:
+        sum(range(100))
+    return Response('done')
+
+
+# Each spin outlasts the interpreter's 5ms switch interval, so the sampler
+# thread gets the GIL while it runs rather than only when the loop is idle
+def spin_a():
+    deadline = time.perf_counter() + 0.02
+    while time.perf_counter() < deadline:
+        sum(range(100))
+
+
+def spin_b():
+    deadline = time.perf_counter() + 0.02
+    while time.perf_counter() < deadline:
+        sum(range(100))
+
+
+async def handler_a(request):
+    for _ in range(3):
+        spin_a()
+        await asyncio.sleep(0)
+    return Response('a')
+
+
+async def handler_b(request):
+    for _ in range(3):
+        spin_b()
+        await asyncio.sleep(0)
+    return Response('b')
+
+
+class TestProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.app = EasyAPI()
+        self.app.add_route('/users/<int:id>', busy)
+
+    def call(self, path='/users/1', headers=None):
+        body = self.app(make_environ(path, headers), lambda status, headers: None)
+        return b''.join(body)
+
+    def files(self):
+        return sorted(os.listdir(self.directory))
+
+    def test_rate(self):
+        profiler = self.app.enable_profiling(self.directory, rate=1.0)
+        self.assertEqual(self.call(), b'done')
+        self.call('/users/2')
+        self.assertEqual(profiler.profiled, {'GET /users/<int:id>': 2})
+        [name] = self.files()
+        self.assertTrue(name.startswith('GET_users_int_id.') and name.endswith('.pstats'))
+        stats = pstats.Stats(os.path.join(self.directory, name))
+        self.assertTrue(any(func[2] == 'busy' for func in stats.stats))
+
+    def test_off_by_default(self):
+        profiler = self.app.enable_profiling(self.directory, secret='s3cret')
+        self.call()
+        self.call(headers={'X-Profile': 'forged.token'})
+        self.assertEqual(profiler.profiled, {})
+        self.assertEqual(self.files(), [])
+
+    def test_signed_header(self):
+        profiler = self.app.enable_profiling(self.directory, secret='s3cret')
+        self.call(headers={'X-Profile': profiler.sign()})
+        self.assertEqual(profiler.profiled, {'GET /users/<int:id>': 1})
+        self.assertFalse(profiler.verify(profiler.sign(expires_in=-10)))
+        self.assertFalse(Profiler(self.directory, secret='other').verify(profiler.sign()))
+
+    def test_sampler(self):
+        profiler = self.app.enable_profiling(self.directory, rate=1.0, mode='sample', interval=0.001)
+        self.addCleanup(profiler.close)
+        self.call()
+        [name] = self.files()
+        self.assertTrue(name.endswith('.collapsed'))
+        with open(os.path.join(self.directory, name)) as f:
+            lines = f.read().splitlines()
+        self.assertTrue(lines)
+        self.assertTrue(any('busy (test_profiler.py' in line for line in lines))
+        stack, count = lines[0].rsplit(' ', 1)
+        self.assertGreater(int(count), 0)
+
+
+    def test_sampler_with_overlapping_async_requests(self):
+        self.app.add_route('/a', handler_a)
+        self.app.add_route('/b', handler_b)
+        profiler = self.app.enable_profiling(self.directory, rate=1.0, mode='sample', interval=0.001)
+        self.addCleanup(profiler.close)
+
+        async def main():
+            requests = [self.app.make_request(make_environ(path)) for path in ('/a', '/b')]
+            return await asyncio.gather(*(self.app.handle_request_async(request) for request in requests))
+
+        responses = asyncio.run(main())
+        self.app.shutdown()
+        self.assertEqual([response.content for response in responses], [b'a', b'b'])
+        self.assertEqual(profiler.profiled, {'GET /a': 1, 'GET /b': 1})
+        for route, own, other in (('a', 'spin_a', 'spin_b'), ('b', 'spin_b', 'spin_a')):
+            [name] = [name for name in self.files() if name.startswith(f'GET_{route}.')]
+            with open(os.path.join(self.directory, name)) as f:
+                stacks = f.read()
+            self.assertIn(own, stacks)
+            # Samples of the other request, or of the loop itself, are not mixed in
+            self.assertNotIn(other, stacks)
+            self.assertNotIn('run_forever', stacks)
+
+
+if __name__ == '__main__':
+    unittest.main()
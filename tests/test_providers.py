@@ -0,0 +1,60 @@
+import sys
+import unittest
+from EasyAPI.services.cache import CacheService
+from EasyAPI.services.cloud_storage import CloudStorageService
+from EasyAPI.services.database import DatabaseConnector
+from EasyAPI.utils.providers import ProviderRegistry
+from benchmarks.startup import measure_import
+
+
+class TestProviderRegistry(unittest.TestCase):
+
+    def test_loads_once(self):
+        registry = ProviderRegistry('widget provider')
+        calls = []
+
+        @registry.register('local')
+        def _local():
+            calls.append(1)
+            return dict
+
+        self.assertIs(registry.load('local'), dict)
+        self.assertIs(registry.load('local'), dict)
+        self.assertEqual(calls, [1])
+        with self.assertRaises(ValueError):
+            registry.load('remote')
+
+    def test_missing_sdk(self):
+        registry = ProviderRegistry('widget provider')
+
+        @registry.register('remote', package='remote-widgets')
+        def _remote():
+            import easyapi_missing_widgets
+            return easyapi_missing_widgets
+
+        with self.assertRaisesRegex(ImportError, 'pip install remote-widgets'):
+            registry.load('remote')
+
+
+class TestLazyServices(unittest.TestCase):
+
+    def test_sqlite_connector(self):
+        connector = DatabaseConnector('sqlite', ':memory:')
+        self.assertEqual(connector.fetch_data('SELECT 1'), [(1,)])
+        self.assertIn('sqlite3', sys.modules)
+
+    def test_unsupported_providers(self):
+        with self.assertRaises(ValueError):
+            DatabaseConnector('oracle', '').connect()
+        with self.assertRaises(ValueError):
+            CloudStorageService('dropbox')
+        with self.assertRaises(ValueError):
+            CacheService('couchbase')
+
+    def test_service_imports_skip_vendor_sdks(self):
+        for module in ('EasyAPI.services.database', 'EasyAPI.services.llm', 'EasyAPI.compression'):
+            self.assertEqual(measure_import(module, repeat=1)['vendors'], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,166 @@
+import io
+import time
+import asyncio
+import unittest
+import threading
+from types import SimpleNamespace
+from EasyAPI.app import EasyAPI
+from EasyAPI.ratelimit import RateLimit, RateLimiter, RedisSlidingWindowLimiter, TokenBucketLimiter
+from EasyAPI.response import Response
+
+
+def make_environ(path='/', addr='10.0.0.1', headers=None):
+    environ = {
+        'PATH_INFO': path,
+        'REQUEST_METHOD': 'GET',
+        'QUERY_STRING': '',
+        'REMOTE_ADDR': addr,
+        'wsgi.input': io.BytesIO(),
+    }
+    for name, value in (headers or {}).items():
+        environ['HTTP_' + name.upper().replace('-', '_')] = value
+    return environ
+
+
+class UnavailableRedis:
+    provider = 'redis'
+
+    def __init__(self):
+        self.calls = 0
+        self.client = SimpleNamespace(register_script=lambda source: self.run)
+
+    def run(self, keys, args):
+        self.calls += 1
+        raise ConnectionError('redis is down')
+
+
+class SlowRedis:
+    provider = 'redis'
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.threads = []
+        self.client = SimpleNamespace(register_script=lambda source: self.run)
+
+    def run(self, keys, args):
+        self.threads.append(threading.current_thread())
+        time.sleep(self.delay)
+        return [1, 9, 60000, 0]
+
+
+class TestRateLimit(unittest.TestCase):
+
+    def setUp(self):
+        self.app = EasyAPI()
+        self.app.use_middleware(RateLimiter())
+        self.app.add_route('/limited', lambda request: Response('ok'), rate_limit='2/minute')
+        self.app.add_route('/open', lambda request: Response('ok'))
+
+    def call(self, path, **options):
+        captured = {}
+
+        def start_response(status, headers):
+            captured['status'] = status
+            captured['headers'] = dict(headers)
+
+        b''.join(self.app(make_environ(path, **options), start_response))
+        return captured['status'], captured['headers']
+
+    def test_limit_per_client(self):
+        status, headers = self.call('/limited')
+        self.assertEqual(status, '200 OK')
+        self.assertEqual(headers['RateLimit-Limit'], '2')
+        self.assertEqual(headers['RateLimit-Remaining'], '1')
+        self.assertEqual(headers['RateLimit-Policy'], '2;w=60')
+        self.call('/limited')
+
+        status, headers = self.call('/limited')
+        self.assertEqual(status, '429 TOO MANY REQUESTS')
+        self.assertEqual(headers['RateLimit-Remaining'], '0')
+        self.assertEqual(headers['Retry-After'], '30')
+
+        self.assertEqual(self.call('/limited', addr='10.0.0.2')[0], '200 OK')
+        status, headers = self.call('/open')
+        self.assertEqual(status, '200 OK')
+        self.assertNotIn('RateLimit-Limit', headers)
+
+    def test_api_key_and_shared_scope(self):
+        policy = {'rate': '1/hour', 'key': 'api_key', 'scope': 'llm'}
+        self.app.add_route('/complete', lambda request: Response('ok'), rate_limit=policy)
+        self.app.add_route('/embed', lambda request: Response('ok'), rate_limit=policy)
+
+        self.assertEqual(self.call('/complete', headers={'X-API-Key': 'a'})[0], '200 OK')
+        self.assertEqual(self.call('/embed', headers={'X-API-Key': 'a'})[0], '429 TOO MANY REQUESTS')
+        self.assertEqual(self.call('/embed', headers={'X-API-Key': 'b'})[0], '200 OK')
+        # Requests without a key are not limited by this policy
+        self.assertEqual(self.call('/embed')[0], '200 OK')
+        self.assertEqual(self.call('/embed')[0], '200 OK')
+
+    def test_token_bucket_refills(self):
+        limiter = TokenBucketLimiter()
+        policy = RateLimit(10, 1, burst=1)
+        self.assertTrue(limiter.hit('k', policy).allowed)
+        denied = limiter.hit('k', policy)
+        self.assertFalse(denied.allowed)
+        self.assertAlmostEqual(denied.retry_after, 0.1, places=2)
+        time.sleep(0.11)
+        self.assertTrue(limiter.hit('k', policy).allowed)
+
+    def test_token_bucket_forgets_idle_keys(self):
+        limiter = TokenBucketLimiter(max_keys=2)
+        policy = RateLimit(1, 60)
+        for key in ('a', 'b', 'c'):
+            limiter.hit(key, policy)
+        self.assertEqual(list(limiter._buckets), ['b', 'c'])
+
+    def test_redis_fallback(self):
+        cache_service = UnavailableRedis()
+        limiter = RedisSlidingWindowLimiter(cache_service, retry_interval=60)
+        policy = RateLimit.parse('1/second')
+        with self.assertLogs('EasyAPI.ratelimit', 'WARNING'):
+            self.assertTrue(limiter.hit('k', policy).allowed)
+        self.assertFalse(limiter.hit('k', policy).allowed)
+        # Redis is not retried on every request while it is down
+        self.assertEqual(cache_service.calls, 1)
+
+    def test_redis_round_trip_does_not_block_the_loop(self):
+        cache_service = SlowRedis(0.2)
+        app = EasyAPI()
+        app.use_middleware(RateLimiter(RedisSlidingWindowLimiter(cache_service)))
+        app.add_route('/limited', lambda request: Response('ok'), rate_limit='10/minute')
+        scope = {'type': 'http', 'method': 'GET', 'path': '/limited', 'query_string': b'',
+                 'headers': [], 'client': ('10.0.0.1', 1234)}
+        sent = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            sent.append(message)
+
+        async def main():
+            ticks = 0
+            request = asyncio.ensure_future(app(scope, receive, send))
+            while not request.done():
+                await asyncio.sleep(0.01)
+                ticks += 1
+            await request
+            return ticks, threading.current_thread()
+
+        ticks, loop_thread = asyncio.run(main())
+        app.shutdown()
+        self.assertEqual(sent[0]['status'], 200)
+        self.assertIn((b'ratelimit-remaining', b'9'), sent[0]['headers'])
+        self.assertNotIn(loop_thread, cache_service.threads)
+        # The loop kept running while the script was waiting on Redis
+        self.assertGreater(ticks, 5)
+
+    def test_parse(self):
+        policy = RateLimit.parse('100/minutes', key='user')
+        self.assertEqual((policy.limit, policy.period, policy.key), (100, 60, 'user'))
+        with self.assertRaises(ValueError):
+            RateLimit.parse('5/fortnight')
+
+
+if __name__ == '__main__':
+    unittest.main()
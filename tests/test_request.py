@@ -0,0 +1,147 @@
+import io
+import unittest
+from EasyAPI.exceptions import BadRequest
+from EasyAPI.multipart import MultipartParser
+from EasyAPI.request import Request
+
+
+def make_environ(body=b'', content_type='', query_string='', **extra):
+    environ = {
+        'PATH_INFO': '/submit',
+        'REQUEST_METHOD': 'POST',
+        'QUERY_STRING': query_string,
+        'CONTENT_TYPE': content_type,
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.input': io.BytesIO(body),
+    }
+    environ.update(extra)
+    return environ
+
+
+class TestRequest(unittest.TestCase):
+
+    def test_body_is_read_lazily(self):
+        environ = make_environ(b'hello')
+        request = Request(environ)
+        self.assertEqual(environ['wsgi.input'].tell(), 0)
+        self.assertEqual(request.raw_body, b'hello')
+        self.assertEqual(request.body, 'hello')
+        self.assertEqual(request.body, 'hello')
+
+    def test_headers_are_case_insensitive(self):
+        request = Request(make_environ(HTTP_STRIPE_SIGNATURE='sig', content_type='text/plain'))
+        self.assertEqual(request.headers.get('Stripe-Signature'), 'sig')
+        self.assertEqual(request.headers['content-type'], 'text/plain')
+        self.assertIn('STRIPE-SIGNATURE', request.headers)
+
+    def test_query_params(self):
+        request = Request(make_environ(query_string='task_id=1&tag=a&tag=b'))
+        self.assertEqual(request.query_params, {'task_id': ['1'], 'tag': ['a', 'b']})
+
+    def test_json(self):
+        request = Request(make_environ(b'{"a": [1, 2]}', 'application/json'))
+        self.assertEqual(request.json, {'a': [1, 2]})
+        self.assertIsNone(Request(make_environ()).json)
+
+    def test_form_data(self):
+        request = Request(make_environ(b'email=a%40b.c&email=x&empty=', 'application/x-www-form-urlencoded'))
+        self.assertEqual(request.form_data, {'email': 'a@b.c', 'empty': ''})
+        self.assertEqual(Request(make_environ(b'{}', 'application/json')).form_data, {})
+
+    def test_slots_and_state(self):
+        request = Request(make_environ())
+        with self.assertRaises(AttributeError):
+            request.user = 'alice'
+        request.state.user = 'alice'
+        self.assertEqual(request.state.user, 'alice')
+
+
+def multipart_body(boundary, fields):
+    lines = []
+    for name, filename, content in fields:
+        lines.append(b'--' + boundary)
+        disposition = f'Content-Disposition: form-data; name="{name}"'
+        if filename:
+            disposition += f'; filename="{filename}"'
+        lines.append(disposition.encode())
+        if filename:
+            lines.append(b'Content-Type: application/octet-stream')
+        lines.append(b'')
+        lines.append(content)
+    lines.append(b'--' + boundary + b'--')
+    lines.append(b'')
+    return b'\r\n'.join(lines)
+
+
+class TestRequestStreaming(unittest.TestCase):
+
+    def test_iter_body(self):
+        request = Request(make_environ(b'x' * 10))
+        self.assertEqual(list(request.iter_body(chunk_size=4)), [b'xxxx', b'xxxx', b'xx'])
+
+    def test_max_body_size_declared(self):
+        from EasyAPI.exceptions import RequestEntityTooLarge
+        request = Request(make_environ(b'x' * 10), max_body_size=5)
+        self.assertTrue(request.content_too_large)
+        with self.assertRaises(RequestEntityTooLarge):
+            request.raw_body
+
+    def test_max_body_size_without_length(self):
+        from EasyAPI.exceptions import RequestEntityTooLarge
+        environ = make_environ(b'x' * 10)
+        del environ['CONTENT_LENGTH']
+        environ['wsgi.input_terminated'] = True
+        request = Request(environ, max_body_size=5)
+        with self.assertRaises(RequestEntityTooLarge):
+            list(request.iter_body(chunk_size=4))
+
+    def test_body_file_spools_to_disk(self):
+        request = Request(make_environ(b'x' * 100), spool_threshold=10)
+        body_file = request.body_file
+        self.assertTrue(body_file._rolled)
+        self.assertEqual(body_file.read(), b'x' * 100)
+        self.assertEqual(request.raw_body, b'x' * 100)
+
+    def test_multipart_form(self):
+        boundary = b'----boundary42'
+        payload = b'\x00\x01binary\r\n--not-the-boundary' * 5000
+        body = multipart_body(boundary, [
+            ('email', None, b'a@b.c'),
+            ('upload', 'data.bin', payload),
+        ])
+        request = Request(make_environ(body, 'multipart/form-data; boundary="----boundary42"'),
+                          spool_threshold=1024)
+        self.assertEqual(request.form_data, {'email': 'a@b.c'})
+        upload = request.files['upload']
+        self.assertEqual(upload.filename, 'data.bin')
+        self.assertEqual(upload.size, len(payload))
+        self.assertEqual(upload.read(), payload)
+
+    def test_iter_multipart_streams_parts(self):
+        boundary = b'xyz'
+        body = multipart_body(boundary, [
+            ('first', 'a.txt', b'A' * 200000),
+            ('second', None, b'two'),
+        ])
+        request = Request(make_environ(body, 'multipart/form-data; boundary=xyz'))
+        parts = []
+        for part in request.iter_multipart():
+            if part.is_file:
+                parts.append((part.name, sum(len(chunk) for chunk in part)))
+            else:
+                parts.append((part.name, part.read()))
+        self.assertEqual(parts, [('first', 200000), ('second', b'two')])
+
+    def test_multipart_preamble_is_not_buffered(self):
+        body = b'preamble\r\n' + multipart_body(b'xyz', [('name', None, b'value')])
+        request = Request(make_environ(body, 'multipart/form-data; boundary=xyz'))
+        self.assertEqual(request.form_data, {'name': 'value'})
+
+        parser = MultipartParser(io.BytesIO(b'x' * 1000000), b'xyz', chunk_size=4096)
+        with self.assertRaises(BadRequest):
+            list(parser)
+        self.assertLess(len(parser._buffer), 8192)
+
+
+if __name__ == '__main__':
+    unittest.main()
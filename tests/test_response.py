@@ -0,0 +1,108 @@
+import os
+import tempfile
+import unittest
+from EasyAPI.response import FileResponse, Response, StreamingResponse, redirect
+
+
+def call(response, environ=None):
+    captured = {}
+
+    def start_response(status, headers):
+        captured['status'] = status
+        captured['headers'] = dict(headers)
+
+    body = response(environ or {}, start_response)
+    try:
+        data = b''.join(bytes(chunk) for chunk in body)
+    finally:
+        if hasattr(body, 'close'):
+            body.close()
+    return captured['status'], captured['headers'], data
+
+
+class TestResponse(unittest.TestCase):
+
+    def test_bytes_are_not_copied(self):
+        content = b'x' * 1024
+        response = Response(content)
+        self.assertIs(response.content, content)
+        _, headers, data = call(response)
+        self.assertEqual(headers['Content-Length'], '1024')
+        self.assertEqual(data, content)
+
+    def test_memoryview(self):
+        buffer = bytearray(b'abcdef')
+        response = Response(memoryview(buffer)[1:4])
+        self.assertEqual(call(response)[2], b'bcd')
+
+    def test_headers(self):
+        response = Response('ok')
+        response.set_header('X-Test', '1')
+        response.set_header('x-test', '2')
+        self.assertEqual(response.get_header('X-TEST'), '2')
+        self.assertEqual(len([h for h in response.headers if h[0].lower() == 'x-test']), 1)
+
+    def test_streaming_generator(self):
+        closed = []
+
+        def rows():
+            try:
+                yield 'id,name\n'
+                yield b'1,alice\n'
+            finally:
+                closed.append(True)
+
+        status, headers, data = call(StreamingResponse(rows(), content_type='text/csv'))
+        self.assertEqual(data, b'id,name\n1,alice\n')
+        self.assertNotIn('Content-Length', headers)
+        self.assertEqual(closed, [True])
+
+    def test_streaming_async_generator(self):
+        async def chunks():
+            for i in range(3):
+                yield str(i)
+
+        self.assertEqual(call(StreamingResponse(chunks()))[2], b'012')
+
+    def test_redirect(self):
+        status, headers, _ = call(redirect('/login'))
+        self.assertEqual(status, '302 FOUND')
+        self.assertEqual(headers['Location'], '/login')
+
+
+class TestFileResponse(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.json')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(b'0123456789')
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_reads_file(self):
+        status, headers, data = call(FileResponse(self.path))
+        self.assertEqual(headers['Content-Type'], 'application/json')
+        self.assertEqual(headers['Content-Length'], '10')
+        self.assertEqual(data, b'0123456789')
+
+    def test_slice(self):
+        _, headers, data = call(FileResponse(self.path, offset=2, length=3))
+        self.assertEqual(headers['Content-Length'], '3')
+        self.assertEqual(data, b'234')
+
+    def test_uses_file_wrapper(self):
+        wrapped = []
+
+        def file_wrapper(f, block_size):
+            wrapped.append(f)
+            return iter([f.read()])
+
+        data = call(FileResponse(self.path, offset=4), {'wsgi.file_wrapper': file_wrapper})[2]
+        self.assertEqual(data, b'456789')
+        self.assertEqual(len(wrapped), 1)
+        wrapped[0].close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,178 @@
+import io
+import time
+import threading
+import unittest
+from EasyAPI.app import EasyAPI
+from EasyAPI.compression import CompressionMiddleware
+from EasyAPI.response import Response, StreamingResponse
+from EasyAPI.response_cache import CachePolicy, ResponseCache
+
+
+def make_environ(path='/', query='', headers=None):
+    environ = {
+        'PATH_INFO': path,
+        'REQUEST_METHOD': 'GET',
+        'QUERY_STRING': query,
+        'wsgi.input': io.BytesIO(),
+    }
+    for name, value in (headers or {}).items():
+        environ['HTTP_' + name.upper().replace('-', '_')] = value
+    return environ
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.app = EasyAPI()
+        self.cache = ResponseCache()
+        self.app.use_middleware(self.cache)
+        self.calls = 0
+
+    def call(self, path='/', query='', headers=None):
+        captured = {}
+
+        def start_response(status, response_headers):
+            captured['status'] = status
+            captured['headers'] = dict(response_headers)
+
+        body = b''.join(self.app(make_environ(path, query, headers), start_response))
+        return captured['status'], captured['headers'], body
+
+    def add_counting_route(self, path='/', **options):
+        def handler(request):
+            self.calls += 1
+            return Response(f"call {self.calls}")
+        self.app.add_route(path, handler, **options)
+
+    def test_uncached_route(self):
+        self.add_counting_route('/')
+        self.call()
+        _, headers, body = self.call()
+        self.assertEqual(body, b"call 2")
+        self.assertNotIn('X-Cache', headers)
+
+    def test_hit_and_miss(self):
+        self.add_counting_route('/', cache={'ttl': 60})
+        _, headers, body = self.call()
+        self.assertEqual(headers['X-Cache'], 'MISS')
+        status, headers, body = self.call()
+        self.assertEqual(status, '200 OK')
+        self.assertEqual(body, b"call 1")
+        self.assertEqual(headers['X-Cache'], 'HIT')
+        self.assertEqual(headers['Age'], '0')
+        self.assertEqual(self.calls, 1)
+
+    def test_query_is_normalized(self):
+        self.add_counting_route('/', cache=60)
+        self.call(query='b=2&a=1')
+        _, _, body = self.call(query='a=1&b=2')
+        self.assertEqual(body, b"call 1")
+        _, _, body = self.call(query='a=2')
+        self.assertEqual(body, b"call 2")
+
+    def test_vary_headers(self):
+        self.add_counting_route('/', cache=CachePolicy(ttl=60, vary=['Accept-Language']))
+        self.call(headers={'Accept-Language': 'en'})
+        _, _, body = self.call(headers={'Accept-Language': 'fr'})
+        self.assertEqual(body, b"call 2")
+        _, _, body = self.call(headers={'Accept-Language': 'en'})
+        self.assertEqual(body, b"call 1")
+
+    def test_request_cache_control(self):
+        self.add_counting_route('/', cache=60)
+        self.call()
+        _, _, body = self.call(headers={'Cache-Control': 'no-cache'})
+        self.assertEqual(body, b"call 2")
+        _, _, body = self.call()
+        self.assertEqual(body, b"call 2")
+        _, headers, body = self.call(headers={'Cache-Control': 'no-store'})
+        self.assertEqual(body, b"call 3")
+        self.assertNotIn('X-Cache', headers)
+
+    def test_response_cache_control(self):
+        def private(request):
+            self.calls += 1
+            return Response("private", headers=[('Cache-Control', 'private')])
+
+        def stream(request):
+            self.calls += 1
+            return StreamingResponse(iter([b"a", b"b"]))
+
+        self.app.add_route('/private', private, cache=60)
+        self.app.add_route('/stream', stream, cache=60)
+        for _ in range(2):
+            self.call('/private')
+            self.call('/stream')
+        self.assertEqual(self.calls, 4)
+
+    def test_stale_while_revalidate(self):
+        self.add_counting_route('/', cache={'ttl': 0.05, 'stale_while_revalidate': 60})
+        self.call()
+        time.sleep(0.1)
+        _, headers, body = self.call()
+        self.assertEqual(headers['X-Cache'], 'STALE')
+        self.assertEqual(body, b"call 1")
+
+        deadline = time.time() + 2
+        while self.calls < 2 and time.time() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.05)
+        _, _, body = self.call()
+        self.assertEqual(body, b"call 2")
+
+    def test_single_flight(self):
+        release = threading.Event()
+
+        def slow(request):
+            self.calls += 1
+            release.wait(2)
+            return Response("slow")
+
+        self.app.add_route('/slow', slow, cache=60)
+        self.app.finalize()
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.call('/slow'))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.1)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(sorted(r[1]['X-Cache'] for r in results), ['HIT'] * 4 + ['MISS'])
+        self.assertTrue(all(r[2] == b"slow" for r in results))
+
+
+class TestResponseCacheWithCompression(unittest.TestCase):
+
+    def test_variants_per_accept_encoding(self):
+        app = EasyAPI()
+        app.use_middleware(ResponseCache())
+        app.use_middleware(CompressionMiddleware(minimum_size=10))
+        app.add_route('/', lambda request: Response('x' * 1000), cache={'ttl': 60})
+
+        def call(headers=None):
+            captured = {}
+
+            def start_response(status, response_headers):
+                captured['headers'] = dict(response_headers)
+
+            body = b''.join(app(make_environ('/', headers=headers), start_response))
+            return captured['headers'], body
+
+        headers, _ = call({'Accept-Encoding': 'gzip'})
+        self.assertEqual((headers['Content-Encoding'], headers['X-Cache']), ('gzip', 'MISS'))
+        headers, body = call()
+        self.assertNotIn('Content-Encoding', headers)
+        self.assertEqual(headers['X-Cache'], 'MISS')
+        self.assertEqual(body, b'x' * 1000)
+        headers, _ = call({'Accept-Encoding': 'gzip'})
+        self.assertEqual((headers['Content-Encoding'], headers['X-Cache']), ('gzip', 'HIT'))
+        headers, body = call()
+        self.assertEqual(headers['X-Cache'], 'HIT')
+        self.assertEqual(body, b'x' * 1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
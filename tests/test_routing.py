@@ -0,0 +1,76 @@
+import unittest
+from EasyAPI.app import EasyAPI
+from EasyAPI.response import Response
+from EasyAPI.routing import Router
+
+
+class TestRouter(unittest.TestCase):
+
+    def setUp(self):
+        self.router = Router()
+
+    def test_static_route(self):
+        self.router.add('/about', 'about')
+        route, params = self.router.match('/about', 'GET')
+        self.assertEqual(route.handler, 'about')
+        self.assertEqual(params, {})
+
+    def test_typed_parameters(self):
+        self.router.add('/users/<int:id>', 'by_id')
+        self.router.add('/users/<slug>', 'by_slug')
+        route, params = self.router.match('/users/42', 'GET')
+        self.assertEqual(route.handler, 'by_id')
+        self.assertEqual(params, {'id': 42})
+        route, params = self.router.match('/users/alice', 'GET')
+        self.assertEqual(route.handler, 'by_slug')
+        self.assertEqual(params, {'slug': 'alice'})
+
+    def test_static_segment_wins_over_parameter(self):
+        self.router.add('/users/<int:id>', 'by_id')
+        self.router.add('/users/me', 'me')
+        route, _ = self.router.match('/users/me', 'GET')
+        self.assertEqual(route.handler, 'me')
+
+    def test_path_converter(self):
+        self.router.add('/static/<path:path>', 'static')
+        route, params = self.router.match('/static/css/site.css', 'GET')
+        self.assertEqual(route.handler, 'static')
+        self.assertEqual(params, {'path': 'css/site.css'})
+
+    def test_method_falls_back_to_other_branch(self):
+        self.router.add('/items/new', 'create', methods=['POST'])
+        self.router.add('/items/<name>', 'show')
+        route, params = self.router.match('/items/new', 'GET')
+        self.assertEqual(route.handler, 'show')
+        self.assertEqual(params, {'name': 'new'})
+
+    def test_no_match(self):
+        self.router.add('/users/<int:id>', 'by_id')
+        self.assertEqual(self.router.match('/users/abc', 'GET'), (None, None))
+        self.assertEqual(self.router.match('/users/1', 'POST'), (None, None))
+        self.assertEqual(self.router.match('/users/1/extra', 'GET'), (None, None))
+
+    def test_invalid_rules(self):
+        with self.assertRaises(ValueError):
+            self.router.add('/files/<path:rest>/edit', 'edit')
+        with self.assertRaises(ValueError):
+            self.router.add('/users/<uuid:id>', 'by_uuid')
+
+
+class TestAppRouting(unittest.TestCase):
+
+    def test_path_params_on_request(self):
+        app = EasyAPI()
+        app.add_route('/users/<int:id>', lambda request: Response(f"user {request.path_params['id'] + 1}"))
+        environ = {
+            'PATH_INFO': '/users/41',
+            'REQUEST_METHOD': 'GET',
+            'QUERY_STRING': '',
+            'wsgi.input': None,
+        }
+        response = app(environ, lambda status, headers: None)
+        self.assertEqual(response[0], b"user 42")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+import io
+import uuid
+import datetime
+import unittest
+from dataclasses import dataclass
+from EasyAPI import serializers
+from EasyAPI.app import EasyAPI
+from EasyAPI.exceptions import BadRequest
+from EasyAPI.request import Request
+from EasyAPI.response import JSONResponse
+from EasyAPI.serializers import OrjsonSerializer, StdlibSerializer, get_serializer, set_serializer
+
+
+@dataclass
+class Item:
+    name: str
+    price: float
+
+
+def make_environ(body=b'', method='POST'):
+    return {
+        'PATH_INFO': '/items',
+        'REQUEST_METHOD': method,
+        'QUERY_STRING': '',
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.input': io.BytesIO(body),
+    }
+
+
+def available_serializers():
+    found = [StdlibSerializer()]
+    if serializers.orjson is not None:
+        found.append(OrjsonSerializer())
+    if serializers.msgspec is not None:
+        found.append(serializers.MsgspecSerializer())
+    return found
+
+
+class TestSerializers(unittest.TestCase):
+
+    def setUp(self):
+        self.previous = get_serializer()
+
+    def tearDown(self):
+        set_serializer(self.previous)
+
+    def test_round_trip(self):
+        value = {'id': 1, 'tags': ['a', 'é'], 'nested': {'ok': True, 'none': None}}
+        for serializer in available_serializers():
+            with self.subTest(serializer=serializer.name):
+                data = serializer.dumps(value)
+                self.assertIsInstance(data, bytes)
+                self.assertEqual(serializer.loads(data), value)
+                self.assertEqual(serializer.loads(memoryview(data)), value)
+
+    def test_extra_types(self):
+        value = {
+            'when': datetime.date(2024, 1, 2),
+            'id': uuid.UUID(int=1),
+            'item': Item('pen', 1.5),
+        }
+        for serializer in available_serializers():
+            with self.subTest(serializer=serializer.name):
+                decoded = serializer.loads(serializer.dumps(value))
+                self.assertEqual(decoded['when'], '2024-01-02')
+                self.assertEqual(decoded['id'], str(uuid.UUID(int=1)))
+                self.assertEqual(decoded['item'], {'name': 'pen', 'price': 1.5})
+
+    def test_non_string_keys(self):
+        for serializer in available_serializers():
+            with self.subTest(serializer=serializer.name):
+                self.assertEqual(serializer.loads(serializer.dumps({1: 'a', 2: 'b'})), {'1': 'a', '2': 'b'})
+
+    def test_typed_decode(self):
+        for serializer in available_serializers():
+            with self.subTest(serializer=serializer.name):
+                item = serializer.decode(b'{"name": "pen", "price": 1.5}', Item)
+                self.assertEqual(item, Item('pen', 1.5))
+                with self.assertRaises(ValueError):
+                    serializer.decode(b'{"name": "pen"}', Item)
+
+    def test_malformed_json_raises_value_error(self):
+        for serializer in available_serializers():
+            with self.subTest(serializer=serializer.name):
+                with self.assertRaises(ValueError):
+                    serializer.loads(b'{"name": ')
+                with self.assertRaises(ValueError):
+                    serializer.decode(b'{"name": ', Item)
+
+    @unittest.skipIf(serializers.msgspec is None, 'msgspec is not installed')
+    def test_msgspec_malformed_body_is_400(self):
+        set_serializer('msgspec')
+        with self.assertRaises(BadRequest):
+            Request(make_environ(b'{"name": ')).json
+        with self.assertRaises(BadRequest):
+            Request(make_environ(b'{"name": ')).json_as(Item)
+
+    def test_set_serializer_by_name(self):
+        set_serializer('json')
+        self.assertIsInstance(get_serializer(), StdlibSerializer)
+
+
+class TestJSONRequestResponse(unittest.TestCase):
+
+    def test_json_response(self):
+        response = JSONResponse({'ok': True}, status='201 CREATED')
+        self.assertIsInstance(response.content, bytes)
+        self.assertEqual(get_serializer().loads(response.content), {'ok': True})
+        self.assertEqual(response.get_header('Content-Type'), 'application/json')
+
+        response = JSONResponse([1], headers=[('X-Total', '1')], serializer=StdlibSerializer())
+        self.assertEqual(response.content, b'[1]')
+        self.assertEqual(response.get_header('Content-Type'), 'application/json')
+
+    def test_request_json(self):
+        request = Request(make_environ(b'{"name": "pen", "price": 1.5}'))
+        self.assertIs(request.json, request.json)
+        self.assertEqual(request.json_as(Item), Item('pen', 1.5))
+        with self.assertRaises(BadRequest):
+            Request(make_environ(b'{"name": ')).json
+        with self.assertRaises(BadRequest):
+            Request(make_environ(b'[1, 2]')).json_as(Item)
+
+    def test_invalid_json_is_400(self):
+        app = EasyAPI()
+        app.add_route('/items', lambda request: JSONResponse(request.json), methods=['POST'])
+        captured = {}
+
+        def start_response(status, headers):
+            captured['status'] = status
+
+        body = b''.join(app(make_environ(b'{"name": '), start_response))
+        self.assertEqual(captured['status'], '400 BAD REQUEST')
+        self.assertIn(b'Invalid JSON', body)
+
+        body = b''.join(app(make_environ(b'{"a":1}'), start_response))
+        self.assertEqual(captured['status'], '200 OK')
+        self.assertEqual(body, b'{"a":1}')
+
+
+if __name__ == '__main__':
+    unittest.main()
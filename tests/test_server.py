@@ -0,0 +1,100 @@
+import socket
+import http.client
+import threading
+import unittest
+from EasyAPI.app import EasyAPI
+from EasyAPI.response import FileResponse, Response
+from EasyAPI.server import WSGIServer, create_listener
+
+
+class TestWSGIServer(unittest.TestCase):
+
+    def setUp(self):
+        self.app = EasyAPI()
+        self.app.add_route('/', lambda request: Response("Welcome Home!"))
+        self.app.add_route('/echo', lambda request: Response(request.body), methods=['POST'])
+
+        def stream(environ, start_response):
+            start_response('200 OK', [('Content-Type', 'text/plain')])
+            return iter([b'a', b'b', b'c'])
+
+        self.app.add_route('/raw', lambda request: stream)
+        self.app.add_route('/file', lambda request: FileResponse(__file__, offset=10))
+        self.server = WSGIServer(self.app, create_listener('127.0.0.1', 0), threads=2)
+        self.thread = threading.Thread(target=self.server.serve_forever, kwargs={'poll_interval': 0.05})
+        self.thread.start()
+        self.port = self.server.server_port
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.server.socket.close()
+        self.thread.join()
+
+    def test_keep_alive(self):
+        conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=5)
+        conn.request('GET', '/')
+        first = conn.getresponse()
+        self.assertEqual(first.read(), b"Welcome Home!")
+        self.assertEqual(first.getheader('Content-Length'), '13')
+        sock = conn.sock
+
+        conn.request('POST', '/echo', body=b'ping')
+        second = conn.getresponse()
+        self.assertEqual(second.read(), b"ping")
+        self.assertIs(conn.sock, sock)
+
+        conn.request('GET', '/missing')
+        self.assertEqual(conn.getresponse().status, 404)
+        conn.close()
+
+    def test_unread_body_is_drained(self):
+        conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=5)
+        self.app.add_route('/ignore', lambda request: Response("ignored"), methods=['PUT'])
+        conn.request('PUT', '/ignore', body=b'x' * 1000)
+        conn.getresponse().read()
+        conn.request('GET', '/')
+        self.assertEqual(conn.getresponse().read(), b"Welcome Home!")
+        conn.close()
+
+    def test_chunked_response(self):
+        conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=5)
+        conn.request('GET', '/raw')
+        response = conn.getresponse()
+        self.assertEqual(response.getheader('Transfer-Encoding'), 'chunked')
+        self.assertEqual(response.read(), b'abc')
+        conn.close()
+
+    def test_chunked_request(self):
+        conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=5)
+        conn.request('POST', '/echo', body=iter([b'ping ', b'', b'pong']), encode_chunked=True)
+        response = conn.getresponse()
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.read(), b'ping pong')
+        # The connection is still usable after the decoded body
+        conn.request('GET', '/')
+        self.assertEqual(conn.getresponse().read(), b"Welcome Home!")
+        conn.close()
+
+    def test_ambiguous_framing_is_refused(self):
+        for head, status in (
+            (b'Transfer-Encoding: chunked\r\nContent-Length: 3\r\n', b'400'),
+            (b'Transfer-Encoding: gzip\r\n', b'501'),
+        ):
+            with socket.create_connection(('127.0.0.1', self.port), timeout=5) as sock:
+                sock.sendall(b'POST /echo HTTP/1.1\r\nHost: x\r\n' + head + b'\r\n0\r\n\r\n')
+                self.assertEqual(sock.recv(65536).split(b' ')[1], status)
+
+    def test_sendfile(self):
+        with open(__file__, 'rb') as f:
+            expected = f.read()[10:]
+        conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=5)
+        conn.request('GET', '/file')
+        self.assertEqual(conn.getresponse().read(), expected)
+        conn.request('GET', '/')
+        self.assertEqual(conn.getresponse().read(), b"Welcome Home!")
+        conn.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import gzip
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from EasyAPI.app import EasyAPI
+
+
+class TestStaticFiles(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        with open(os.path.join(self.folder, 'app.js'), 'wb') as f:
+            f.write(b'console.log("hello");')
+        with open(os.path.join(self.folder, 'app.js.gz'), 'wb') as f:
+            f.write(gzip.compress(b'console.log("hello");'))
+        with open(os.path.join(self.folder, 'big.bin'), 'wb') as f:
+            f.write(os.urandom(4096))
+        self.app = EasyAPI()
+        self.app.set_static_folder(self.folder, cache_max_file_size=1024)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def get(self, path, **headers):
+        environ = {
+            'PATH_INFO': path,
+            'REQUEST_METHOD': 'GET',
+            'QUERY_STRING': '',
+            'wsgi.input': io.BytesIO(),
+        }
+        for name, value in headers.items():
+            environ['HTTP_' + name.upper()] = value
+        captured = {}
+
+        def start_response(status, response_headers):
+            captured['status'] = status
+            captured['headers'] = dict(response_headers)
+
+        body = self.app(environ, start_response)
+        data = b''.join(bytes(chunk) for chunk in body)
+        if hasattr(body, 'close'):
+            body.close()
+        return captured['status'], captured['headers'], data
+
+    def test_serves_file_with_validators(self):
+        status, headers, data = self.get('/static/app.js')
+        self.assertEqual(status, '200 OK')
+        self.assertEqual(data, b'console.log("hello");')
+        self.assertIn('javascript', headers['Content-Type'])
+        self.assertIn('ETag', headers)
+        self.assertIn('Last-Modified', headers)
+
+    def test_conditional_requests(self):
+        _, headers, _ = self.get('/static/app.js')
+        status, _, data = self.get('/static/app.js', if_none_match=headers['ETag'])
+        self.assertEqual(status, '304 NOT MODIFIED')
+        self.assertEqual(data, b'')
+        status, _, _ = self.get('/static/app.js', if_modified_since=headers['Last-Modified'])
+        self.assertEqual(status, '304 NOT MODIFIED')
+
+    def test_precompressed_sibling(self):
+        status, headers, data = self.get('/static/app.js', accept_encoding='gzip, deflate')
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(data), b'console.log("hello");')
+        _, plain_headers, _ = self.get('/static/app.js')
+        self.assertNotEqual(headers['ETag'], plain_headers['ETag'])
+
+    def test_range(self):
+        with open(os.path.join(self.folder, 'big.bin'), 'rb') as f:
+            content = f.read()
+        for path in ('/static/big.bin', '/static/app.js'):
+            status, headers, data = self.get(path, range='bytes=2-5')
+            self.assertEqual(status, '206 PARTIAL CONTENT')
+            self.assertEqual(len(data), 4)
+        self.assertEqual(self.get('/static/big.bin', range='bytes=-10')[2], content[-10:])
+        status, headers, _ = self.get('/static/big.bin', range='bytes=9999-')
+        self.assertEqual(status, '416 RANGE NOT SATISFIABLE')
+        self.assertEqual(headers['Content-Range'], 'bytes */4096')
+
+    def test_path_traversal(self):
+        self.assertEqual(self.get('/static/../' + os.path.basename(__file__))[0], '404 NOT FOUND')
+        self.assertEqual(self.get('/static/missing.js')[0], '404 NOT FOUND')
+
+    def test_cache_invalidated_on_change(self):
+        self.assertEqual(self.get('/static/app.js')[2], b'console.log("hello");')
+        path = os.path.join(self.folder, 'app.js')
+        with open(path, 'wb') as f:
+            f.write(b'changed')
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        self.assertEqual(self.get('/static/app.js')[2], b'changed')
+
+
+if __name__ == '__main__':
+    unittest.main()